@@ -0,0 +1,101 @@
+# backend/assistant/client.py
+#
+# Conversation with an OpenAI assistant for the Assistant page. A run is
+# polled with adaptive backoff instead of a fixed one-second sleep: the
+# first check comes after `initial` seconds and the wait grows by `factor`
+# up to `maximum`, so a quick reply is back in a fraction of a second and
+# no reply waits more than `maximum` past the run's end (the old loop lost
+# up to a second on every reply). The openai version pinned in
+# requirements.txt (1.2.x) has no streamed run events, so polling is the
+# only way to learn a run is done. Afterwards only messages newer than the
+# last one seen are fetched (messages.list with after=, oldest first)
+# rather than the thread's whole history. A run still going at the timeout
+# is cancelled before giving up, so it does not keep the thread busy (a
+# thread with an active run takes no new messages).
+
+import time
+
+# Run states that will not change by waiting longer
+TERMINAL = ("completed", "failed", "cancelled", "expired", "requires_action")
+
+
+class AssistantError(Exception):
+    """A run ended without completing."""
+
+
+class Backoff:
+    def __init__(self, initial=0.05, factor=1.5, maximum=0.5, timeout=120.0):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.timeout = timeout
+
+    def delays(self):
+        """Waits before each poll, until they add up to `timeout`."""
+        delay, waited = self.initial, 0.0
+        while waited < self.timeout:
+            yield delay
+            waited += delay
+            delay = min(delay * self.factor, self.maximum)
+
+
+def message_text(message):
+    """The text parts of a thread message, joined."""
+    return "".join(part.text.value for part in message.content if part.type == "text")
+
+
+class AssistantChat:
+    """
+    One conversation thread with assistant `assistant_id`, created on the
+    first message. `client` is an openai.OpenAI or a FakeOpenAI (see
+    fake_backend.py).
+
+        chat = AssistantChat(client, assistant_id)
+        replies = chat.send("Which route is cheapest?")
+    """
+
+    def __init__(self, client, assistant_id, thread_id=None, backoff=None, sleep=time.sleep):
+        self.client = client
+        self.assistant_id = assistant_id
+        self.thread_id = thread_id
+        self.backoff = backoff or Backoff()
+        self.sleep = sleep
+        # Id of the newest message already seen; later fetches start after it
+        self.last_seen = None
+        self.polls = 0
+
+    def send(self, text):
+        """Post `text`, wait for the assistant's run and return its new reply texts."""
+        threads = self.client.beta.threads
+        if self.thread_id is None:
+            self.thread_id = threads.create().id
+        message = threads.messages.create(thread_id=self.thread_id, role="user", content=text)
+        self.last_seen = message.id
+        run = threads.runs.create(thread_id=self.thread_id, assistant_id=self.assistant_id)
+
+        for delay in self.backoff.delays():
+            if run.status in TERMINAL:
+                break
+            self.sleep(delay)
+            run = threads.runs.retrieve(thread_id=self.thread_id, run_id=run.id)
+            self.polls += 1
+        if run.status not in TERMINAL:
+            status = run.status
+            threads.runs.cancel(thread_id=self.thread_id, run_id=run.id)
+            raise AssistantError(f"Assistant run {run.id} still {status!r} "
+                                 f"after {self.backoff.timeout}s, cancelled")
+        if run.status != "completed":
+            raise AssistantError(f"Assistant run {run.id} ended as {run.status!r}")
+        return [message_text(message) for message in self.new_messages()
+                if message.role == "assistant"]
+
+    def new_messages(self):
+        """Messages added to the thread since the last call, oldest first."""
+        # No cursor yet means from the start; `after` is left out then
+        cursor = {'after': self.last_seen} if self.last_seen is not None else {}
+        page = self.client.beta.threads.messages.list(
+            thread_id=self.thread_id, order="asc", limit=100, **cursor)
+        messages = list(page)
+        if messages:
+            self.last_seen = messages[-1].id
+        return messages
@@ -0,0 +1,136 @@
+# backend/assistant/fake_backend.py
+#
+# Offline stand-in for the parts of openai.OpenAI the Assistant page uses
+# (client.beta.assistants / threads / messages / runs). A run finishes
+# `latency` seconds (plus up to `jitter`) after it is created and then
+# adds the assistant's reply to the thread; until then retrieving it says
+# "in_progress", and cancelling it stops it for good. Runs fail with
+# probability `failure_rate`. Every call is
+# counted in `calls`, and `listed` counts the messages handed back by
+# messages.list, so polling and history fetching can be measured without
+# network access or an API key.
+
+import itertools
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+
+def _text_message(message_id, thread_id, role, text):
+    part = SimpleNamespace(type="text", text=SimpleNamespace(value=text, annotations=[]))
+    return SimpleNamespace(id=message_id, object="thread.message", thread_id=thread_id,
+                           role=role, content=[part], created_at=int(time.time()))
+
+
+def echo_reply(text):
+    return f"(offline assistant) You asked: {text}"
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.8, jitter=0.0, failure_rate=0.0, reply=echo_reply, seed=None,
+                 clock=time.monotonic):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.reply = reply
+        self.random = random.Random(seed)
+        self.clock = clock
+        self._ids = itertools.count(1)
+
+        self.threads = {}
+        self.runs = {}
+        self.calls = Counter()
+        self.listed = 0
+        self.beta = SimpleNamespace(
+            assistants=SimpleNamespace(retrieve=self._retrieve_assistant),
+            threads=SimpleNamespace(
+                create=self._create_thread,
+                messages=SimpleNamespace(create=self._create_message, list=self._list_messages),
+                runs=SimpleNamespace(create=self._create_run, retrieve=self._retrieve_run,
+                                     cancel=self._cancel_run)))
+
+    def _id(self, prefix):
+        return f"{prefix}_{next(self._ids):06d}"
+
+    def _retrieve_assistant(self, assistant_id):
+        self.calls['assistants.retrieve'] += 1
+        return SimpleNamespace(id=assistant_id, object="assistant", name="BitRoute (offline)")
+
+    def _create_thread(self):
+        self.calls['threads.create'] += 1
+        thread = SimpleNamespace(id=self._id("thread"), object="thread")
+        self.threads[thread.id] = []
+        return thread
+
+    def _create_message(self, thread_id, role, content):
+        self.calls['messages.create'] += 1
+        message = _text_message(self._id("msg"), thread_id, role, content)
+        self.threads[thread_id].append(message)
+        return message
+
+    def _list_messages(self, thread_id, after=None, before=None, order="desc", limit=20):
+        # No pagination: everything after the cursor comes back at once
+        self.calls['messages.list'] += 1
+        self._settle(thread_id)
+        messages = self.threads[thread_id]
+        if after is not None:
+            ids = [message.id for message in messages]
+            messages = messages[ids.index(after) + 1:]
+        if before is not None:
+            ids = [message.id for message in messages]
+            messages = messages[:ids.index(before)]
+        if order == "desc":
+            messages = messages[::-1]
+        self.listed += len(messages)
+        return _Page(messages)
+
+    def _create_run(self, thread_id, assistant_id):
+        self.calls['runs.create'] += 1
+        run = SimpleNamespace(id=self._id("run"), object="thread.run", thread_id=thread_id,
+                              assistant_id=assistant_id, status="in_progress")
+        run.done_at = self.clock() + self.latency + self.jitter * self.random.random()
+        run.fails = self.random.random() < self.failure_rate
+        # The run answers the newest user message
+        run.question = next(message for message in reversed(self.threads[thread_id])
+                            if message.role == "user")
+        self.runs[run.id] = run
+        return run
+
+    def _retrieve_run(self, run_id, thread_id):
+        self.calls['runs.retrieve'] += 1
+        self._settle(thread_id)
+        return self.runs[run_id]
+
+    def _cancel_run(self, thread_id, run_id):
+        # A run that already ended stays as it was
+        self.calls['runs.cancel'] += 1
+        self._settle(thread_id)
+        run = self.runs[run_id]
+        if run.status == "in_progress":
+            run.status = "cancelled"
+        return run
+
+    def _settle(self, thread_id):
+        # Finish the thread's runs whose time has come
+        now = self.clock()
+        for run in self.runs.values():
+            if run.thread_id != thread_id or run.status != "in_progress" or now < run.done_at:
+                continue
+            if run.fails:
+                run.status = "failed"
+                continue
+            text = self.reply(run.question.content[0].text.value)
+            self.threads[thread_id].append(
+                _text_message(self._id("msg"), thread_id, "assistant", text))
+            run.status = "completed"
+
+
+class _Page:
+    """Just enough of openai's cursor page: `.data` and iteration."""
+
+    def __init__(self, data):
+        self.data = list(data)
+
+    def __iter__(self):
+        return iter(self.data)
@@ -0,0 +1,167 @@
+# backend/ln_client/client.py
+#
+# Async payment client. Payments submitted with `pay` are queued and a
+# dispatcher groups whatever is waiting (up to `max_batch`, lingering at
+# most `linger` seconds for stragglers) into one call. Calls go out over a
+# small pool of connections, and each connection carries up to
+# `pipeline_depth` calls at once: the next batch is sent without waiting
+# for the previous reply. When every slot is busy the dispatcher waits,
+# so the queue itself is the backpressure.
+#
+# A batch that cannot be sent (the node refuses a connection) or gets
+# fewer results back than it had payments fails those payments' awaits
+# with the error; the dispatcher goes on with the next batch.
+
+import asyncio
+import time
+
+from .fake_node import FakeNode
+
+
+class LightningClient:
+    def __init__(self, node=None, pool_size=4, pipeline_depth=4, max_batch=64, linger=0.001):
+        # Without a real node, talk to an in-process fake one
+        self.node = node or FakeNode()
+        self.pool_size = pool_size
+        self.pipeline_depth = pipeline_depth
+        self.max_batch = max_batch
+        self.linger = linger
+
+        self._queue = None
+        self._pool = []
+        self._slots = None
+        self._dispatcher = None
+        self._calls = set()
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.batches = 0
+        self._started = None
+
+    async def pay(self, source, destination, amount):
+        """Submit one payment and wait for its result dict."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        await self._queue.put(({'source': source, 'destination': destination,
+                                'amount': amount}, future))
+        return await future
+
+    async def pay_many(self, payments):
+        """`payments` as (source, destination, amount) tuples; results in order."""
+        return await asyncio.gather(*(self.pay(*payment) for payment in payments))
+
+    def _ensure_started(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._queue = asyncio.Queue()
+            # One token per free pipeline slot across the whole pool
+            self._slots = asyncio.Semaphore(self.pool_size * self.pipeline_depth)
+            self._started = time.perf_counter()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.linger
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            acquired = sent = False
+            try:
+                await self._slots.acquire()
+                acquired = True
+                connection = await self._connection()
+                task = asyncio.create_task(self._send(connection, batch))
+                sent = True
+                self._calls.add(task)
+                task.add_done_callback(self._calls.discard)
+            except Exception as error:
+                self._fail(batch, error)
+            finally:
+                # _send gives the slot back once its call is done; a batch
+                # left behind by close() fails rather than hangs
+                if not sent:
+                    if acquired:
+                        self._slots.release()
+                    self._fail(batch, ConnectionError("client closed"))
+
+    def _fail(self, batch, error):
+        for _, future in batch:
+            if not future.done():
+                self.failed += 1
+                future.set_exception(error)
+
+    async def _connection(self):
+        # Open connections lazily up to pool_size, then spread calls over them
+        if len(self._pool) < self.pool_size:
+            connection = await self.node.connect()
+            self._pool.append([connection, 0])
+        entry = min(self._pool, key=lambda e: e[1])
+        entry[1] += 1
+        return entry
+
+    async def _send(self, entry, batch):
+        connection = entry[0]
+        self.batches += 1
+        try:
+            results = await connection.call([payment for payment, _ in batch])
+        except Exception as error:
+            results = [{'status': "FAILED", 'paths': [], 'error': str(error)} for _ in batch]
+        finally:
+            entry[1] -= 1
+            self._slots.release()
+
+        for (_, future), result in zip(batch, results):
+            if result['status'] == "SUCCESS":
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            if not future.done():
+                future.set_result(result)
+        if len(results) < len(batch):
+            self._fail(batch[len(results):], RuntimeError(
+                f"Node returned {len(results)} results for {len(batch)} payments"))
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+            # Whatever never made it into a batch fails instead of hanging
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_result({'status': "FAILED", 'paths': [], 'error': "client closed"})
+        if self._calls:
+            await asyncio.gather(*self._calls, return_exceptions=True)
+        for connection, _ in self._pool:
+            await connection.close()
+        self._pool = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        settled = self.succeeded + self.failed
+        return {
+            'submitted': self.submitted,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_batch': settled / self.batches if self.batches else 0.0,
+            'connections': len(self._pool),
+            'throughput': settled / elapsed if elapsed else 0.0,
+        }
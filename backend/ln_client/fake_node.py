@@ -0,0 +1,89 @@
+# backend/ln_client/fake_node.py
+#
+# In-process stand-in for a Lightning node. Every call over a connection
+# costs one simulated round trip (`latency` plus up to `jitter` seconds)
+# for the whole batch, plus `per_payment` seconds per payment in it, so
+# batching and pipelining pay off the way they would against a real node.
+# Payments fail at random with probability `failure_rate`. With a
+# GraphSimulator attached, each batch is also routed over the simulated
+# network and payments without a route fail too.
+
+import asyncio
+import itertools
+import random
+
+SUCCESS = "SUCCESS"
+FAILED = "FAILED"
+
+
+class FakeNode:
+    def __init__(self, latency=0.01, jitter=0.0, per_payment=0.0, failure_rate=0.0,
+                 simulator=None, route_params=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_payment = per_payment
+        self.failure_rate = failure_rate
+        self.simulator = simulator
+        self.route_params = route_params or {}
+        self.random = random.Random(seed)
+        self._ids = itertools.count(1)
+
+        self.connections_opened = 0
+        self.calls = 0
+        self.payments = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def connect(self):
+        # A real client would pay a handshake here
+        await asyncio.sleep(self.latency)
+        self.connections_opened += 1
+        return FakeConnection(self)
+
+    async def handle(self, payments):
+        self.calls += 1
+        self.payments += len(payments)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency + self.jitter * self.random.random()
+            await asyncio.sleep(delay + self.per_payment * len(payments))
+            return self._settle(payments)
+        finally:
+            self.in_flight -= 1
+
+    def _settle(self, payments):
+        routed = [None] * len(payments)
+        if self.simulator is not None:
+            sim = self.simulator
+            graph = sim.mcfp_preprocess(**self.route_params)
+            routed = sim._route(graph, [
+                {'source': p['source'], 'sink': p['destination'], 'amount': p['amount']}
+                for p in payments], stop_on_failure=False)
+
+        results = []
+        for payment, paths in zip(payments, routed):
+            result = {'id': next(self._ids), 'status': SUCCESS, 'paths': paths or [],
+                      'error': None}
+            if self.random.random() < self.failure_rate:
+                result.update(status=FAILED, paths=[], error="simulated failure")
+            elif self.simulator is not None and paths is None:
+                result.update(status=FAILED, error="no route")
+            results.append(result)
+        return results
+
+
+class FakeConnection:
+    """One connection to a FakeNode; several calls may be in flight on it."""
+
+    def __init__(self, node):
+        self.node = node
+        self.closed = False
+
+    async def call(self, payments):
+        if self.closed:
+            raise ConnectionError("connection closed")
+        return await self.node.handle(payments)
+
+    async def close(self):
+        self.closed = True
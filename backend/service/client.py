@@ -0,0 +1,185 @@
+# backend/service/client.py
+#
+# Blocking client for the routing service (server.py), small enough for a
+# Streamlit script: JSON over HTTP/1.1 with the standard library only. Each
+# thread keeps its own keep-alive connection, so concurrent sessions do not
+# queue behind each other on the client side; the service batches them.
+
+import http.client
+import json
+import socket
+import threading
+
+import numpy as np
+
+from ..simulation.layout import Layout
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+
+class RoutingError(Exception):
+    """The service rejected a request or could not serve it."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def parse_address(address):
+    """
+    "host:port" (or "http://host:port") -> ("tcp", (host, port));
+    "unix:/path/to.sock" -> ("unix", "/path/to.sock").
+    """
+    address = str(address)
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if address.startswith("http://"):
+        address = address[len("http://"):]
+    host, _, port = address.rstrip("/").rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Expected host:port or unix:/path, got {address!r}")
+    return "tcp", (host, int(port))
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class RoutingClient:
+    """
+    Talks to one graph of a routing service.
+
+        client = RoutingClient("127.0.0.1:8765", graph="lightning_like_graph_md.csv")
+        success, graph_data, paths = client.pay(commodities, view={'hops': 1})
+
+    Replies mirror SharedSimulator: pay/route return (success, graph data
+    or failure message, paths), where graph data is node-link data of the
+    routed paths' neighbourhood when a `view` was asked for.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, graph=None, timeout=60.0):
+        self.address = address
+        self.graph = graph
+        self.timeout = timeout
+        self._kind, self._target = parse_address(address)
+        self._local = threading.local()
+        self._layout = None
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self._kind == "unix":
+                connection = _UnixConnection(self._target, self.timeout)
+            else:
+                connection = http.client.HTTPConnection(*self._target, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _request(self, method, op, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': "application/json"} if data is not None else {}
+        # A kept-alive connection the service has since closed fails on
+        # first use; that one attempt is retried on a fresh connection
+        for attempt in (0, 1):
+            connection = self._connection()
+            try:
+                connection.request(method, f"/{op}", body=data, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                # Never reuse a connection left mid-request
+                connection.close()
+                self._local.connection = None
+                stale = isinstance(e, (http.client.RemoteDisconnected, BrokenPipeError,
+                                       ConnectionResetError))
+                if attempt or not stale:
+                    raise
+        reply = json.loads(payload) if payload else {}
+        if response.status != 200:
+            raise RoutingError(response.status, reply.get('error', response.reason))
+        return reply
+
+    def call(self, op, **body):
+        """POST `body` (plus this client's graph) to `op` and return the JSON reply."""
+        if self.graph is not None:
+            body.setdefault('graph', self.graph)
+        return self._request("POST", op, body)
+
+    def health(self):
+        return self._request("GET", "health")
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # ------------------------------------------------------------------
+    # Simulator operations
+    # ------------------------------------------------------------------
+
+    def _routing(self, op, commodities, threshold, limit, aggressiveness, strategy, solver, view):
+        body = dict(commodities=commodities, threshold=threshold, limit=limit,
+                    aggressiveness=aggressiveness, strategy=strategy, solver=solver)
+        if view is not None:
+            body['view'] = view
+        reply = self.call(op, **body)
+        if not reply['success']:
+            return False, reply['message'], []
+        # Hops as (u, v) tuples again, like the simulator's own paths
+        paths = [[[tuple(hop) for hop in path] for path in commodity_paths]
+                 for commodity_paths in reply['paths']]
+        return True, reply.get('graph'), paths
+
+    def pay(self, commodities, threshold=.45, limit=.2, aggressiveness=0,
+            strategy="bfs", solver="greedy", view=None):
+        """
+        Route and commit a payment. `view` ({'hops', 'max_nodes', 'focus'},
+        see render_transaction_graph) asks for graph data to draw.
+        """
+        return self._routing("pay", commodities, threshold, limit, aggressiveness,
+                             strategy, solver, view)
+
+    def route(self, commodities, threshold=.45, limit=.2, aggressiveness=0,
+              strategy="bfs", solver="greedy", view=None):
+        """Route against the committed flow without committing anything."""
+        return self._routing("route", commodities, threshold, limit, aggressiveness,
+                             strategy, solver, view)
+
+    def get_layout(self):
+        """The graph's Layout, only transferred again when the graph changed."""
+        key = list(self._layout.key) if self._layout is not None else None
+        reply = self.call("layout", key=key)
+        if not reply.get('unchanged'):
+            pos = np.asarray(reply['pos'], dtype=np.float64).reshape(-1, 2)
+            self._layout = Layout(reply['node_ids'], pos, reply['num_edges'])
+        return self._layout
+
+    def get_graph_data(self):
+        return self.call("graph")['graph']
+
+    def add_node(self, node_id, **attrs):
+        self.call("nodes", node_id=node_id, attrs=attrs)
+
+    def add_channel(self, sender_id, receiver_id, amount):
+        return self.call("channels", sender=sender_id, receiver=receiver_id,
+                         amount=amount)['status']
+
+    def reset_flows(self):
+        self.call("reset")
+
+    def stats(self):
+        return self.call("stats")
+
+    def metrics(self):
+        return self.call("metrics")['text']
+
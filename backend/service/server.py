@@ -0,0 +1,505 @@
+# backend/service/server.py
+#
+# Local routing service that owns the simulators, so the Streamlit pages
+# (and anything else) send it small JSON requests over HTTP/1.1, on TCP or
+# a Unix socket, instead of running the solver in their own script thread.
+# Concurrent work is shared:
+#   pay        - payments are queued and a dispatcher settles whatever is
+#                waiting (up to `max_batch`, lingering at most `linger`
+#                seconds for stragglers) with one SharedSimulator.pay_many
+#                solve per graph and routing parameters; payments that
+#                arrive during a solve make up the next batch
+#   read-only  - identical in-flight requests (route previews, layout,
+#                graph data, stats) are coalesced: later callers await the
+#                first caller's result instead of computing it again
+# All simulator work runs on one worker thread, so the event loop keeps
+# accepting and parsing requests while a solve runs.
+#
+# Every operation is POST /<op> with a JSON object naming the `graph` (a
+# CSV the service was started with, by path or file name); GET /health
+# answers without touching a graph. Run from the repository root:
+#   python -m backend.service.server lightning_like_graph_md.csv lightning_like_graph_sm.csv
+#   python -m backend.service.server lightning_like_graph_lg.csv --listen unix:/tmp/bitroute.sock
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from ..simulation.graph_store import store_path
+from ..simulation.neighborhood import focus_subgraph
+from ..simulation.shared import SharedSimulator
+from .client import DEFAULT_ADDRESS, parse_address
+
+logger = logging.getLogger(__name__)
+
+# Seconds for a node's rating to fall halfway back to neutral when it is
+# neither rewarded nor penalised
+RATING_HALF_LIFE = 24 * 3600
+# Seconds a committed payment keeps its channel flow locked before it settles
+FLOW_TTL = 15 * 60
+MAX_BODY = 16 * 1024 * 1024
+# Tells this process's graph versions apart from an earlier run's
+INSTANCE = os.urandom(4).hex()
+ROUTING_DEFAULTS = (('threshold', .45), ('limit', .2), ('aggressiveness', 0),
+                    ('strategy', "bfs"), ('solver', "greedy"))
+# Type each routing parameter is coerced to; the batch key must be hashable
+ROUTING_TYPES = {'threshold': float, 'limit': float, 'aggressiveness': float,
+                 'strategy': str, 'solver': str}
+VIEW_DEFAULTS = (('hops', 1, int), ('max_nodes', 250, int), ('focus', True, bool))
+
+
+class BadRequest(Exception):
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def open_graph(file_path, rating_half_life=RATING_HALF_LIFE, instrument=False, persist=True,
+               flow_ttl=FLOW_TTL):
+    """
+    The SharedSimulator the service keeps for `file_path`, persisted in its
+    graph store unless `persist` is off.
+    """
+    return SharedSimulator.from_csv(file_path, store=store_path(file_path) if persist else None,
+                                    flow_ttl=flow_ttl, rating_half_life=rating_half_life,
+                                    instrument=instrument)
+
+
+class RoutingService:
+    """
+    Serves the graphs in `graph_paths`, each opened with `loader` (see
+    open_graph) the first time a request names it.
+
+        service = RoutingService(["lightning_like_graph_md.csv"])
+        asyncio.run(service.serve("127.0.0.1:8765"))
+    """
+
+    def __init__(self, graph_paths, loader=open_graph, max_batch=64, linger=0.002):
+        self.graphs = {}
+        for path in graph_paths:
+            self.graphs[str(path)] = str(path)
+            self.graphs.setdefault(os.path.basename(str(path)), str(path))
+        self.loader = loader
+        self.max_batch = max_batch
+        self.linger = linger
+
+        self._simulators = {}
+        self._inflight = {}
+        self._queue = None
+        self._dispatcher = None
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="routing")
+        self._server = None
+
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched = 0
+        self.largest_batch = 0
+        self._started = None
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    async def start(self, address=DEFAULT_ADDRESS):
+        """Listen on `address` ("host:port" or "unix:/path"); returns the bound address."""
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            self._server = await asyncio.start_unix_server(self._connection, target)
+            bound = address
+        else:
+            self._server = await asyncio.start_server(self._connection, *target)
+            host, port = self._server.sockets[0].getsockname()[:2]
+            bound = f"{host}:{port}"
+        self._queue = asyncio.Queue()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._started = time.perf_counter()
+        logger.info("Routing service listening on %s", bound)
+        return bound
+
+    async def serve(self, address=DEFAULT_ADDRESS):
+        await self.start(address)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        self._worker.shutdown(wait=True)
+
+    async def _connection(self, reader, writer):
+        # One request at a time per connection, kept alive until the client
+        # closes it; concurrency comes from concurrent connections
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, reply = await self._handle(method, target, body)
+                keep_alive = (version == "HTTP/1.1"
+                              and headers.get('connection', "").lower() != "close")
+                await self._respond(writer, status, reply, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # Malformed request line or headers, or the client went away
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, reply, keep_alive):
+        data = json.dumps(reply).encode()
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    async def _handle(self, method, target, body):
+        self.requests += 1
+        op = target.split("?", 1)[0].strip("/")
+        try:
+            if op == "health":
+                return HTTPStatus.OK, {'status': "ok", 'graphs': sorted(set(self.graphs.values()))}
+            if op not in OPERATIONS:
+                raise BadRequest(f"unknown operation {op!r}", HTTPStatus.NOT_FOUND)
+            if method != "POST":
+                raise BadRequest(f"{op} expects POST", HTTPStatus.METHOD_NOT_ALLOWED)
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError as e:
+                raise BadRequest(f"invalid JSON: {e}")
+            if not isinstance(request, dict):
+                raise BadRequest("expected a JSON object")
+            path = self.graphs.get(request.get('graph'))
+            if path is None:
+                raise BadRequest(f"unknown graph {request.get('graph')!r}", HTTPStatus.NOT_FOUND)
+            await self._load(path)
+
+            if op == "pay":
+                key, commodities, view = _routing_request(path, request)
+                future = asyncio.get_running_loop().create_future()
+                await self._queue.put((key, (commodities, view), future))
+                return HTTPStatus.OK, await future
+            handler = OPERATIONS[op]
+            if op in COALESCED:
+                key = (op, json.dumps(request, sort_keys=True))
+                return HTTPStatus.OK, await self._coalesced(key, handler, path, request)
+            return HTTPStatus.OK, await self._run(handler, self, path, request)
+        except BadRequest as e:
+            return e.status, {'error': str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            # Rejected by the simulator, e.g. an unknown solver
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except Exception as e:
+            logger.exception("Request %s %s failed", method, target)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+    # ------------------------------------------------------------------
+    # Sharing work
+    # ------------------------------------------------------------------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._worker, fn, *args)
+
+    async def _coalesced(self, key, handler, path, request):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(handler, self, path, request))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        elif key[0] != "load":
+            self.coalesced += 1
+        # Shielded, so one caller going away does not cancel it for the rest
+        return await asyncio.shield(task)
+
+    async def _load(self, path):
+        if path not in self._simulators:
+            await self._coalesced(("load", path), _load_graph, path, None)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            # One solve per graph and parameter set, in arrival order. Keys
+            # are checked by _routing_request, but nothing in one payment
+            # may stop the dispatcher: every later /pay would hang
+            groups = {}
+            for key, payment, future in batch:
+                try:
+                    groups.setdefault(key, []).append((payment, future))
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(BadRequest(f"invalid routing parameters: {e}"))
+            for key, items in groups.items():
+                self.batches += 1
+                self.batched += len(items)
+                self.largest_batch = max(self.largest_batch, len(items))
+                try:
+                    replies = await self._run(self._settle, key, [p for p, _ in items])
+                except Exception as e:
+                    if not isinstance(e, (ValueError, KeyError, TypeError)):
+                        logger.exception("Payment batch failed")
+                    replies = [e] * len(items)
+                for (_, future), reply in zip(items, replies):
+                    if future.done():
+                        continue
+                    if isinstance(reply, Exception):
+                        future.set_exception(reply)
+                    else:
+                        future.set_result(reply)
+
+    def _settle(self, key, payments):
+        # Worker thread: one joint solve for the whole group
+        path, threshold, limit, aggressiveness, strategy, solver = key
+        shared = self._simulators[path]
+        results = shared.pay_many([commodities for commodities, _ in payments], threshold, limit,
+                                  aggressiveness, strategy, solver)
+        replies = []
+        for result, (_, view) in zip(results, payments):
+            # The payments are committed by now: a reply that cannot be drawn
+            # still reports its outcome, just without graph data
+            try:
+                replies.append(_routing_reply(*result, view))
+            except Exception:
+                logger.exception("Drawing a payment reply failed")
+                replies.append(_routing_reply(*result, None))
+        return replies
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'batched_payments': self.batched,
+            'avg_batch': self.batched / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'uptime': elapsed,
+        }
+
+
+# ----------------------------------------------------------------------
+# Operations, run on the worker thread as handler(service, path, request)
+# ----------------------------------------------------------------------
+
+def _load_graph(service, path, _):
+    if path not in service._simulators:
+        service._simulators[path] = service.loader(path)
+
+
+def _routing_request(path, request):
+    try:
+        commodities = [{'source': c['source'], 'sink': c['sink'], 'amount': float(c['amount'])}
+                       for c in request['commodities']]
+    except (KeyError, TypeError, ValueError):
+        raise BadRequest("commodities must be a list of {source, sink, amount} objects")
+    params = []
+    for name, default in ROUTING_DEFAULTS:
+        value = request.get(name, default)
+        try:
+            params.append(ROUTING_TYPES[name](value))
+        except (TypeError, ValueError):
+            raise BadRequest(f"{name} must be a {ROUTING_TYPES[name].__name__}, got {value!r}")
+    return (path,) + tuple(params), commodities, _view_request(request.get('view'))
+
+
+def _view_request(view):
+    # None (no graph data wanted) or {'hops', 'max_nodes', 'focus'}
+    if view is None:
+        return None
+    if not isinstance(view, dict):
+        raise BadRequest("view must be an object with hops, max_nodes and focus")
+    checked = {}
+    for name, default, kind in VIEW_DEFAULTS:
+        value = view.get(name, default)
+        if kind is bool and not isinstance(value, bool) or (
+                kind is int and (isinstance(value, bool) or not isinstance(value, int))):
+            raise BadRequest(f"view {name} must be a {kind.__name__}, got {value!r}")
+        checked[name] = value
+    return checked
+
+
+def _routing_reply(success, graph, paths, view):
+    if not success:
+        return {'success': False, 'message': graph, 'paths': []}
+    reply = {'success': True, 'message': "", 'paths': paths}
+    if view is not None:
+        shown = graph
+        if view.get('focus', True):
+            shown = focus_subgraph(graph, paths, view.get('hops', 1), view.get('max_nodes', 250))
+        data = shown.node_link_data()
+        # Same version, same drawing: clients cache their rendering by it
+        # (see render_graph_data). A copy, the networkx graph keeps its own.
+        version = [INSTANCE, graph.version, view.get('focus', True), view.get('hops', 1),
+                   view.get('max_nodes', 250)]
+        data['graph'] = dict(data['graph'], version=":".join(map(str, version)))
+        reply['graph'] = data
+    return reply
+
+
+def _route(service, path, request):
+    key, commodities, view = _routing_request(path, request)
+    shared = service._simulators[path]
+    payment = shared.route(commodities, *key[1:])
+    # A preview only: nothing is committed, and it does not count as a
+    # rolled back payment either
+    shared.simulator.record_stats(payment.stats)
+    if not payment.success:
+        return _routing_reply(False, payment.message, [], view)
+    return _routing_reply(True, payment.graph, payment.paths, view)
+
+
+def _layout(service, path, request):
+    layout = service._simulators[path].get_layout()
+    if request.get('key') is not None and tuple(request['key']) == layout.key:
+        return {'unchanged': True}
+    return {'node_ids': layout.node_ids, 'pos': layout.pos.tolist(),
+            'num_edges': layout.num_edges}
+
+
+def _graph(service, path, request):
+    return {'graph': service._simulators[path].get_graph_data()}
+
+
+def _stats(service, path, request):
+    stats = service._simulators[path].stats()
+    stats['service'] = service.stats()
+    return stats
+
+
+def _metrics(service, path, request):
+    return {'text': service._simulators[path].metrics()}
+
+
+def _nodes(service, path, request):
+    attrs = dict(request.get('attrs') or {})
+    service._simulators[path].add_node(request['node_id'], **attrs)
+    return {'status': "SUCCESS"}
+
+
+def _channels(service, path, request):
+    status = service._simulators[path].add_channel(
+        request['sender'], request['receiver'], float(request['amount']))
+    return {'status': status}
+
+
+def _reset(service, path, request):
+    service._simulators[path].reset_flows()
+    return {'status': "SUCCESS"}
+
+
+OPERATIONS = {
+    'pay': None,  # queued for the dispatcher
+    'route': _route,
+    'layout': _layout,
+    'graph': _graph,
+    'stats': _stats,
+    'metrics': _metrics,
+    'nodes': _nodes,
+    'channels': _channels,
+    'reset': _reset,
+}
+# Read-only operations whose identical in-flight requests share one result
+COALESCED = {'route', 'layout', 'graph', 'stats', 'metrics'}
+
+
+def start_in_thread(graph_paths, address="127.0.0.1:0", **kwargs):
+    """
+    Run a RoutingService on a daemon thread with its own event loop, for a
+    process (like the Streamlit server) that has no service to talk to.
+    Returns (service, bound address) once it is listening.
+    """
+    service = RoutingService(graph_paths, **kwargs)
+    ready = threading.Event()
+    bound = []
+
+    def run():
+        async def main():
+            bound.append(await service.start(address))
+            ready.set()
+            await service._server.serve_forever()
+        try:
+            asyncio.run(main())
+        finally:
+            ready.set()
+
+    threading.Thread(target=run, name="routing-service", daemon=True).start()
+    ready.wait()
+    if not bound:
+        raise RuntimeError(f"Routing service could not listen on {address}")
+    return service, bound[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve routing requests for channel CSVs.")
+    parser.add_argument("graphs", nargs="+", help="channel CSVs to serve")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="host:port or unix:/path")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--linger", type=float, default=0.002,
+                        help="seconds to wait for more payments before solving")
+    parser.add_argument("--rating-half-life", type=float, default=RATING_HALF_LIFE)
+    parser.add_argument("--flow-ttl", type=float, default=FLOW_TTL,
+                        help="seconds before a payment's flow is released (0: never)")
+    parser.add_argument("--instrument", action="store_true", help="collect solver metrics")
+    parser.add_argument("--no-store", action="store_true",
+                        help="start from the CSV every time instead of a graph store")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    def loader(path):
+        return open_graph(path, args.rating_half_life, args.instrument, persist=not args.no_store,
+                          flow_ttl=args.flow_ttl or None)
+
+    service = RoutingService(args.graphs, loader=loader, max_batch=args.max_batch,
+                             linger=args.linger)
+    try:
+        asyncio.run(service.serve(args.listen))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
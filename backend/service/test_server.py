@@ -0,0 +1,63 @@
+# backend/service/test_server.py
+#
+# The routing service must turn malformed routing parameters into a 400 for
+# that request alone: the pay dispatcher is shared, and a payment that
+# kills it leaves every later /pay waiting forever.
+
+import pytest
+
+from .client import RoutingClient, RoutingError
+from .server import open_graph, start_in_thread
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    csv = tmp_path_factory.mktemp("graph") / "graph.csv"
+    csv.write_text("source,target,capacity\n"
+                   "Node_0,Node_1,5\nNode_1,Node_2,5\nNode_0,Node_3,5\nNode_3,Node_2,5\n")
+    _, address = start_in_thread([str(csv)], loader=lambda path: open_graph(path, persist=False))
+    client = RoutingClient(address, graph="graph.csv", timeout=10)
+    yield client
+    client.close()
+
+
+PAYMENT = [{'source': "Node_0", 'sink': "Node_2", 'amount': 1.0}]
+
+
+def test_pay_succeeds(client):
+    success, _, paths = client.pay(PAYMENT, threshold=0, limit=0)
+    assert success
+    assert paths[0][0][0][0] == "Node_0"
+
+
+@pytest.mark.parametrize("params", [
+    {'threshold': [0.4]},
+    {'limit': "low"},
+    {'aggressiveness': {'a': 1}},
+    {'view': [1]},
+    {'view': {'hops': "two"}},
+    {'view': {'focus': 1}},
+])
+def test_bad_params_are_rejected_and_dispatcher_survives(client, params):
+    body = dict(commodities=PAYMENT, threshold=0, limit=0)
+    body.update(params)
+    with pytest.raises(RoutingError) as error:
+        client.call("pay", **body)
+    assert error.value.status == 400
+    # The next valid payment is still settled
+    success, _, _ = client.pay(PAYMENT, threshold=0, limit=0)
+    assert success
+
+
+def test_route_rejects_bad_params(client):
+    with pytest.raises(RoutingError) as error:
+        client.call("route", commodities=PAYMENT, strategy=["bfs"])
+    # Lists are coerced to their str(), which no strategy matches
+    assert error.value.status == 400
+
+
+def test_view_returns_versioned_graph(client):
+    success, graph, _ = client.route(PAYMENT, threshold=0, limit=0, view={'hops': 1})
+    assert success
+    assert graph['graph']['version']
+    assert {node['id'] for node in graph['nodes']} >= {"Node_0", "Node_2"}
@@ -0,0 +1,148 @@
+# backend/simulation/batch.py
+#
+# Concurrent routing of independent commodity sets. The preprocessed graph
+# is published once in multiprocessing.shared_memory blocks. Workers map the
+# blocks read-only at start-up, and each task only carries its own
+# commodities. Every set gets a fresh residual, exactly as if it had been
+# passed to multi_commodity_flow_paths on its own.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .graph_view import GraphView
+
+
+class SharedGraph:
+    """
+    A CSRGraph or preprocessed GraphView copied into shared memory. Create
+    it in the parent, hand `spec` to workers, which call `attach`, and
+    `close()` it once they are done.
+    """
+
+    ARRAYS = ("rating", "capacity", "flow", "edge_u", "edge_v")
+
+    def __init__(self, graph):
+        # A view's arrays are the ones it routes with: its own copies of
+        # ratings or capacities if the base has been written since, sized
+        # to the base as it was when the view was taken
+        indptr, indices, arc_edge = graph.csr()
+        arrays = {name: getattr(graph, name) for name in self.ARRAYS}
+        arrays.update(indptr=indptr, indices=indices, arc_edge=arc_edge)
+        if isinstance(graph, GraphView):
+            arrays.update(node_mask=graph.node_mask, edge_mask=graph.edge_mask)
+
+        self._blocks = []
+        layout = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            layout[name] = (block.name, array.shape, array.dtype.str)
+
+        # Node ids travel once per worker (pickled with the initializer args)
+        self.spec = (layout, list(graph.node_ids[:len(arrays['rating'])]))
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def attach(spec):
+        """Map a published graph; returns (graph_or_view, open_blocks)."""
+        layout, node_ids = spec
+        blocks, arrays = [], {}
+        for name, (block_name, shape, dtype) in layout.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            arrays[name] = array
+
+        graph = CSRGraph()
+        graph.node_ids = node_ids
+        graph.node_index = {node: i for i, node in enumerate(node_ids)}
+        for name in SharedGraph.ARRAYS:
+            setattr(graph, name, arrays[name])
+        graph._csr = (arrays['indptr'], arrays['indices'], arrays['arc_edge'])
+        graph._csr_version = graph.structure_version
+
+        if 'node_mask' in arrays:
+            return GraphView(graph, arrays['node_mask'], arrays['edge_mask']), blocks
+        return graph, blocks
+
+
+class _BatchRunner:
+    def __init__(self, graph, strategy, solver, instrument=False):
+        # Imported here: graph_simulator imports this module
+        from .graph_simulator import GraphSimulator
+        self.graph = graph
+        self.simulator = GraphSimulator(backend="csr", instrument=instrument)
+        self.simulator.csr = graph.base if isinstance(graph, GraphView) else graph
+        self.strategy = strategy
+        self.solver = solver
+
+    def __call__(self, commodities):
+        # Rating penalties from failed searches are recorded, not applied:
+        # the shared arrays are read-only and the parent owns the ratings
+        penalties = []
+        self.simulator._scale_rating = lambda node, factor: penalties.append((node, factor))
+        stats = self.simulator.new_stats()
+        start = time.perf_counter()
+        routed = self.simulator._route(self.graph, commodities, strategy=self.strategy,
+                                       solver=self.solver, stats=stats)
+        elapsed = time.perf_counter() - start
+        success = len(routed) == len(commodities) and all(p is not None for p in routed)
+        return {'success': success, 'paths': routed if success else [], 'solve_time': elapsed,
+                'penalties': penalties, 'stats': stats}
+
+
+_runner = None
+_blocks = None
+
+
+def _init_worker(spec, strategy, solver, instrument):
+    global _runner, _blocks
+    graph, _blocks = SharedGraph.attach(spec)
+    _runner = _BatchRunner(graph, strategy, solver, instrument)
+
+
+def _run_batch(commodities):
+    return _runner(commodities)
+
+
+def route_batches(graph, commodity_sets, processes=None, strategy="bfs", solver="greedy",
+                  instrument=False):
+    """
+    Route each commodity set in `commodity_sets` independently over `graph`
+    (a CSRGraph or preprocessed GraphView). Returns one dict per set, in
+    submission order: {'success', 'paths', 'solve_time', 'penalties',
+    'stats'}, where `penalties` lists the (node, factor) rating changes the
+    run asked for and `stats` is a SolveStats with `instrument`, else
+    NULL_STATS (see stats.py).
+    """
+    commodity_sets = list(commodity_sets)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(commodity_sets) <= 1:
+        runner = _BatchRunner(graph, strategy, solver, instrument)
+        return [runner(commodities) for commodities in commodity_sets]
+
+    shared = SharedGraph(graph)
+    with shared, ProcessPoolExecutor(max_workers=min(processes, len(commodity_sets)),
+                                     initializer=_init_worker,
+                                     initargs=(shared.spec, strategy, solver, instrument)) as pool:
+        # map() yields in submission order regardless of completion order
+        return list(pool.map(_run_batch, commodity_sets))
@@ -0,0 +1,298 @@
+# backend/simulation/csr_graph.py
+
+import weakref
+
+import networkx as nx
+import numpy as np
+
+
+class CSRGraph:
+    """
+    Compact undirected channel graph.
+
+    Node ids are interned to ints (``node_ids[i]`` <-> ``node_index[id]``),
+    channels are stored once in ``edge_u``/``edge_v`` and adjacency is kept in
+    CSR form: the arcs of node ``i`` are ``indptr[i]:indptr[i+1]``, with
+    ``indices`` holding the neighbour and ``arc_edge`` the channel id.
+    Capacities, flows and ratings live in flat NumPy arrays.
+    """
+
+    def __init__(self):
+        self.node_ids = []
+        self.node_index = {}
+        self.rating = np.zeros(0, dtype=np.float64)
+        # Sparse store for extra node attributes (e.g. hedera account ids)
+        self.node_attrs = {}
+
+        self.edge_u = np.zeros(0, dtype=np.int64)
+        self.edge_v = np.zeros(0, dtype=np.int64)
+        self.capacity = np.zeros(0, dtype=np.float64)
+        self.flow = np.zeros(0, dtype=np.float64)
+
+        # Bumped on every mutation, used to invalidate derived structures
+        self.version = 0
+        # Bumped only when nodes or channels are added; the CSR adjacency
+        # depends on nothing else, so rating updates do not rebuild it
+        self.structure_version = 0
+        self._csr = None
+        self._csr_version = -1
+        self._edge_index = None
+        self._nx = None
+        self._nx_version = -1
+        # Live GraphViews; they get a chance to copy an array before we overwrite it
+        self._views = weakref.WeakSet()
+        # Receives every mutation once it is applied (see graph_store.py)
+        self.journal = None
+
+    def __getstate__(self):
+        # Derived caches, the view registry and the journal stay behind
+        state = self.__dict__.copy()
+        state.update(_csr=None, _csr_version=-1, _edge_index=None, _nx=None,
+                     _nx_version=-1, _views=None, journal=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views = weakref.WeakSet()
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_u)
+
+    def __contains__(self, node_id):
+        return node_id in self.node_index
+
+    def __len__(self):
+        return self.num_nodes
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_edges(cls, node_ids, edge_u, edge_v, capacity, rating):
+        """
+        Build a graph from interned columns. Duplicate channels (in either
+        direction) are merged the way ``nx.Graph.add_edge`` does: the first
+        occurrence keeps its position and the last one wins the capacity.
+        """
+        g = cls()
+        g.node_ids = list(node_ids)
+        g.node_index = {node: i for i, node in enumerate(g.node_ids)}
+        g.rating = np.asarray(rating, dtype=np.float64).copy()
+
+        edge_u = np.asarray(edge_u, dtype=np.int64)
+        edge_v = np.asarray(edge_v, dtype=np.int64)
+        capacity = np.asarray(capacity, dtype=np.float64)
+
+        if len(edge_u):
+            lo = np.minimum(edge_u, edge_v)
+            hi = np.maximum(edge_u, edge_v)
+            key = lo * max(g.num_nodes, 1) + hi
+            _, first = np.unique(key, return_index=True)
+            _, last = np.unique(key[::-1], return_index=True)
+            last = len(key) - 1 - last
+            order = np.argsort(first, kind="stable")
+            first, last = first[order], last[order]
+            edge_u, edge_v, capacity = edge_u[first], edge_v[first], capacity[last]
+
+        g.edge_u = edge_u
+        g.edge_v = edge_v
+        g.capacity = capacity.copy()
+        g.flow = np.zeros(len(edge_u), dtype=np.float64)
+        return g
+
+    @classmethod
+    def from_networkx(cls, graph):
+        node_ids = list(graph.nodes())
+        index = {node: i for i, node in enumerate(node_ids)}
+        rating = [data.get('rating', 0.0) for _, data in graph.nodes(data=True)]
+
+        edges = list(graph.edges(data='weight', default=1))
+        edge_u = [index[u] for u, _, _ in edges]
+        edge_v = [index[v] for _, v, _ in edges]
+        capacity = [w for _, _, w in edges]
+
+        g = cls.from_edges(node_ids, edge_u, edge_v, capacity, rating)
+        for node, data in graph.nodes(data=True):
+            extra = {k: v for k, v in data.items() if k != 'rating'}
+            if extra:
+                g.node_attrs[node] = extra
+        return g
+
+    def to_networkx(self):
+        # Materialized lazily and cached until the graph changes
+        if self._nx is not None and self._nx_version == self.version:
+            return self._nx
+
+        graph = nx.Graph()
+        ratings = self.rating.tolist()
+        for node, rating in zip(self.node_ids, ratings):
+            graph.add_node(node, rating=rating, **self.node_attrs.get(node, {}))
+
+        ids = self.node_ids
+        graph.add_weighted_edges_from(
+            (ids[u], ids[v], w) for u, v, w in
+            zip(self.edge_u.tolist(), self.edge_v.tolist(), self.capacity.tolist()))
+
+        self._nx = graph
+        self._nx_version = self.version
+        return graph
+
+    def node_link_data(self):
+        return nx.node_link_data(self.to_networkx())
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add_node(self, node_id, rating=None, **attrs):
+        idx = self.node_index.get(node_id)
+        if idx is None:
+            idx = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.node_index[node_id] = idx
+            self.rating = np.append(self.rating, 0.0 if rating is None else rating)
+            self.structure_version += 1
+        elif rating is not None:
+            self._before_write('rating')
+            self.rating[idx] = rating
+
+        if attrs:
+            self.node_attrs.setdefault(node_id, {}).update(attrs)
+        self.version += 1
+        if self.journal is not None:
+            self.journal.add_node(node_id, rating, attrs)
+        return idx
+
+    def add_edge(self, u_id, v_id, capacity):
+        u = self.node_index[u_id] if u_id in self.node_index else self.add_node(u_id)
+        v = self.node_index[v_id] if v_id in self.node_index else self.add_node(v_id)
+
+        edge = self.find_edge(u, v)
+        if edge is not None:
+            # Same as nx.Graph.add_edge: re-adding a channel updates its weight
+            self._before_write('capacity')
+            self.capacity[edge] = capacity
+        else:
+            edge = self.num_edges
+            self.edge_u = np.append(self.edge_u, u)
+            self.edge_v = np.append(self.edge_v, v)
+            self.capacity = np.append(self.capacity, float(capacity))
+            self.flow = np.append(self.flow, 0.0)
+            self._edge_index[(min(u, v), max(u, v))] = edge
+            self.structure_version += 1
+
+        self.version += 1
+        if self.journal is not None:
+            self.journal.add_edge(u_id, v_id, capacity)
+        return edge
+
+    def scale_ratings(self, indices, factor):
+        """Multiply the rating of each node index in `indices` (repeats compound)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        self._before_write('rating')
+        np.multiply.at(self.rating, indices, factor)
+        self.version += 1
+        if self.journal is not None:
+            touched = np.unique(indices)
+            self.journal.ratings(touched, self.rating[touched])
+
+    def write_ratings(self, indices, values, journal=True):
+        """
+        Set the ratings of node `indices` to `values`. `journal=False` keeps
+        the write out of the journal (for values that can be recomputed).
+        """
+        self._before_write('rating')
+        self.rating[indices] = values
+        self.version += 1
+        if journal and self.journal is not None:
+            self.journal.ratings(indices, self.rating[indices])
+
+    def add_flow(self, delta):
+        """
+        Add per-channel flow (e.g. a committed payment). Channels past
+        ``len(delta)`` are left alone. Flow is not part of any derived
+        structure, so the version is not bumped.
+        """
+        self.flow[:len(delta)] += delta
+        if self.journal is not None:
+            changed = np.flatnonzero(delta)
+            self.journal.flow(changed, np.asarray(delta)[changed])
+
+    def register_view(self, view):
+        self._views.add(view)
+
+    def _before_write(self, name):
+        for view in list(self._views):
+            view.preserve(name)
+
+    def find_edge(self, u, v):
+        if self._edge_index is None:
+            self._edge_index = {
+                (min(a, b), max(a, b)): e for e, (a, b) in
+                enumerate(zip(self.edge_u.tolist(), self.edge_v.tolist()))}
+        return self._edge_index.get((min(u, v), max(u, v)))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def csr(self):
+        """Return ``(indptr, indices, arc_edge)``, rebuilt only after mutation."""
+        if self._csr is not None and self._csr_version == self.structure_version:
+            return self._csr
+
+        n, m = self.num_nodes, self.num_edges
+        tails = np.concatenate([self.edge_u, self.edge_v])
+        heads = np.concatenate([self.edge_v, self.edge_u])
+        arc_edge = np.concatenate([np.arange(m), np.arange(m)])
+
+        # Group arcs by tail, keeping channel insertion order within a node so
+        # neighbour iteration matches networkx adjacency order
+        order = np.lexsort((arc_edge, tails))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=n), out=indptr[1:])
+
+        self._csr = (indptr, heads[order], arc_edge[order])
+        self._csr_version = self.structure_version
+        return self._csr
+
+    def degree(self):
+        indptr = self.csr()[0]
+        return np.diff(indptr)
+
+    def neighbors(self, node_id):
+        indptr, indices, _ = self.csr()
+        i = self.node_index[node_id]
+        return [self.node_ids[j] for j in indices[indptr[i]:indptr[i + 1]].tolist()]
+
+    def subgraph(self, node_mask, edge_mask=None):
+        """Compact copy keeping masked-in nodes and channels between them."""
+        node_mask = np.asarray(node_mask, dtype=bool)
+        keep_edges = node_mask[self.edge_u] & node_mask[self.edge_v]
+        if edge_mask is not None:
+            keep_edges &= np.asarray(edge_mask, dtype=bool)
+
+        remap = np.full(self.num_nodes, -1, dtype=np.int64)
+        kept_nodes = np.flatnonzero(node_mask)
+        remap[kept_nodes] = np.arange(len(kept_nodes))
+
+        g = CSRGraph()
+        g.node_ids = [self.node_ids[i] for i in kept_nodes.tolist()]
+        g.node_index = {node: i for i, node in enumerate(g.node_ids)}
+        g.rating = self.rating[kept_nodes]
+        g.node_attrs = {node: self.node_attrs[node] for node in g.node_ids
+                        if node in self.node_attrs}
+        g.edge_u = remap[self.edge_u[keep_edges]]
+        g.edge_v = remap[self.edge_v[keep_edges]]
+        g.capacity = self.capacity[keep_edges]
+        g.flow = self.flow[keep_edges]
+        return g
+
+    def copy(self):
+        return self.subgraph(np.ones(self.num_nodes, dtype=bool))
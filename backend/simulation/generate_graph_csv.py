@@ -1,5 +1,7 @@
 # generate_graph_csv.py
 
+import argparse
+
 import pandas as pd
 import random
 import networkx as nx
@@ -22,5 +24,114 @@ def generate_lightning_like_graph_csv(file_path, num_nodes, num_edges_per_node):
     # Save to CSV
     df.to_csv(file_path, index=False)
 
-# Example usage
-generate_lightning_like_graph_csv('lightning_like_graph_sm.csv', num_nodes=3, num_edges_per_node=2)
+
+# ----------------------------------------------------------------------
+# Streaming generator for large graphs
+# ----------------------------------------------------------------------
+
+def iter_lightning_like_edges(num_nodes, num_edges_per_node, seed=None, chunk_nodes=100_000):
+    """
+    Yield ``(source, target, capacity)`` NumPy chunks of a Barabási-Albert
+    style graph without ever building the whole graph.
+
+    Like nx.barabasi_albert_graph it starts from a star on
+    ``num_edges_per_node + 1`` nodes and every later node attaches to
+    ``num_edges_per_node`` distinct earlier nodes, chosen proportionally to
+    degree. Nodes are added in chunks that attach against the degrees as
+    they were at the start of the chunk. A chunk grows the graph by at most
+    1/8, which keeps the degree tail in line with the one-node-at-a-time
+    model.
+    Duplicate picks within one node are dropped rather than redrawn, so a
+    few nodes end up with slightly fewer channels.
+
+    Only the degree array (one int per node) is kept between chunks.
+    Capacities follow the original generator: exponential with scale 3,
+    clipped to [0.01, 100] and rounded to 4 decimals.
+    """
+    m = num_edges_per_node
+    if m < 1 or m >= num_nodes:
+        raise ValueError(f"need 1 <= num_edges_per_node < num_nodes, got {m} and {num_nodes}")
+    rng = np.random.default_rng(seed)
+
+    def capacities(count):
+        return np.clip(rng.exponential(scale=3, size=count), 0.01, 100).round(4)
+
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    source = np.zeros(m, dtype=np.int64)
+    target = np.arange(1, m + 1, dtype=np.int64)
+    degree[0], degree[1:m + 1] = m, 1
+    yield source, target, capacities(m)
+
+    start = m + 1
+    while start < num_nodes:
+        stop = min(num_nodes, start + min(chunk_nodes, max(1, start // 8)))
+        new = np.arange(start, stop, dtype=np.int64)
+
+        # Degree-proportional picks by inverse CDF over the existing nodes
+        cdf = np.cumsum(degree[:start])
+        picks = np.searchsorted(cdf, rng.random((len(new), m)) * cdf[-1], side="right")
+        picks.sort(axis=1)
+        keep = np.ones(picks.shape, dtype=bool)
+        keep[:, 1:] = picks[:, 1:] != picks[:, :-1]
+
+        source = np.repeat(new, keep.sum(axis=1))
+        target = picks[keep]
+        degree[:start] += np.bincount(target, minlength=start)
+        degree[start:stop] = keep.sum(axis=1)
+        yield source, target, capacities(len(source))
+        start = stop
+
+
+def generate_lightning_like_graph(file_path, num_nodes, num_edges_per_node, seed=None,
+                                  chunk_nodes=100_000, file_format=None):
+    """
+    Stream a lightning-like graph to `file_path` as CSV or Parquet
+    (`file_format`, by default from the extension), one chunk at a time.
+    Same columns as generate_lightning_like_graph_csv. Returns the number
+    of channels written.
+    """
+    file_format = file_format or ("parquet" if str(file_path).endswith(".parquet") else "csv")
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown file format {file_format!r}, expected 'csv' or 'parquet'")
+
+    writer = None
+    written = 0
+    try:
+        for source, target, capacity in iter_lightning_like_edges(
+                num_nodes, num_edges_per_node, seed=seed, chunk_nodes=chunk_nodes):
+            chunk = pd.DataFrame({
+                'source': "Node_" + pd.Series(source).astype(str),
+                'target': "Node_" + pd.Series(target).astype(str),
+                'capacity': capacity,
+            })
+            if file_format == "csv":
+                chunk.to_csv(file_path, mode="w" if written == 0 else "a",
+                             header=written == 0, index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(file_path, table.schema)
+                writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a lightning-like channel graph.")
+    parser.add_argument("file_path", nargs="?", default="lightning_like_graph_sm.csv")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--edges-per-node", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-nodes", type=int, default=100_000)
+    parser.add_argument("--format", choices=("csv", "parquet"), default=None)
+    args = parser.parse_args()
+
+    count = generate_lightning_like_graph(args.file_path, args.nodes, args.edges_per_node,
+                                          seed=args.seed, chunk_nodes=args.chunk_nodes,
+                                          file_format=args.format)
+    print(f"wrote {count} channels to {args.file_path}")
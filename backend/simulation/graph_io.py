@@ -0,0 +1,130 @@
+# backend/simulation/graph_io.py
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Binary snapshot written next to the CSV, e.g. graph.csv -> graph.csv.graph.npz
+SNAPSHOT_SUFFIX = ".graph.npz"
+SNAPSHOT_FORMAT = 1
+
+
+class EdgeTable:
+    """
+    Column view of a channel CSV: node ids interned in order of first
+    appearance (source before target, row by row), plus per-row arrays.
+    """
+
+    def __init__(self, node_ids, source, target, capacity, rating=None):
+        self.node_ids = node_ids
+        self.source = source
+        self.target = target
+        self.capacity = capacity
+        # Per-row rating column, None when the CSV has no 'rating' column
+        self.rating = rating
+
+    def __len__(self):
+        return len(self.source)
+
+    def endpoint_codes(self):
+        # Codes in the order the per-row importer touches nodes: s0, t0, s1, t1...
+        return np.column_stack([self.source, self.target]).ravel()
+
+
+def snapshot_path(file_path):
+    return str(file_path) + SNAPSHOT_SUFFIX
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_edge_csv(file_path):
+    # Whole-column parse; no per-row Python work
+    df = pd.read_csv(file_path)
+
+    endpoints = np.column_stack([df['source'].to_numpy(), df['target'].to_numpy()]).ravel()
+    codes, node_ids = pd.factorize(endpoints)
+    codes = codes.reshape(-1, 2)
+
+    if 'capacity' in df:
+        capacity = df['capacity'].to_numpy(dtype=np.float64)
+    else:
+        capacity = np.ones(len(df), dtype=np.float64)
+    rating = df['rating'].to_numpy(dtype=np.float64) if 'rating' in df else None
+
+    return EdgeTable(np.asarray(node_ids), codes[:, 0].copy(), codes[:, 1].copy(),
+                     capacity, rating)
+
+
+def _load_snapshot(path):
+    with np.load(path, allow_pickle=False) as data:
+        meta = {key: data[key].item() for key in ('format', 'mtime_ns', 'size', 'sha1')}
+        table = EdgeTable(data['node_ids'], data['source'], data['target'],
+                          data['capacity'], data['rating'] if 'rating' in data else None)
+    return meta, table
+
+
+def _write_snapshot(path, table, stat, sha1):
+    arrays = dict(
+        format=np.int64(SNAPSHOT_FORMAT),
+        mtime_ns=np.int64(stat.st_mtime_ns),
+        size=np.int64(stat.st_size),
+        sha1=np.str_(sha1),
+        node_ids=table.node_ids.astype(str) if table.node_ids.dtype == object else table.node_ids,
+        source=table.source,
+        target=table.target,
+        capacity=table.capacity,
+    )
+    if table.rating is not None:
+        arrays['rating'] = table.rating
+
+    # Write-then-rename so a concurrent reader never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Read-only checkout or similar: the cache is best effort
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_edge_table(file_path, use_cache=True):
+    """
+    Load a channel CSV as an EdgeTable. With `use_cache`, a sidecar snapshot
+    keyed on the CSV's mtime/size (and its SHA-1 when those change) is used
+    when valid and (re)written otherwise.
+    """
+    if not use_cache:
+        return parse_edge_csv(file_path)
+
+    stat = os.stat(file_path)
+    cache_path = snapshot_path(file_path)
+    sha1 = None
+
+    if os.path.exists(cache_path):
+        try:
+            meta, table = _load_snapshot(cache_path)
+        except (OSError, ValueError, KeyError):
+            meta, table = None, None
+
+        if meta is not None and meta['format'] == SNAPSHOT_FORMAT:
+            if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+                return table
+            # Touched but possibly unchanged (e.g. git checkout): compare content
+            sha1 = file_digest(file_path)
+            if sha1 == meta['sha1']:
+                _write_snapshot(cache_path, table, stat, sha1)
+                return table
+
+    table = parse_edge_csv(file_path)
+    _write_snapshot(cache_path, table, stat, sha1 or file_digest(file_path))
+    return table
@@ -1,8 +1,29 @@
 # backend/simulation/graph_simulator.py
 
-import networkx as nx
-import pandas as pd
+import logging
 import random
+import weakref
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from .batch import route_batches
+from .csr_graph import CSRGraph
+from .graph_io import read_edge_table
+from .graph_store import GraphStore
+from .graph_view import GraphView
+from .layout import Layout, layout_path, update_layout
+from .max_flow import EPS, dinic
+from .min_cost_flow import min_cost_flows
+from .path_search import (COST_STRATEGIES, STRATEGIES, CSRResidual, NxResidual, channel_cost,
+                          find_arc, find_path)
+from .preprocess import preprocess_masks
+from .ratings import RatingStore
+from .reachability import ReachabilityIndex
+from .route_cache import RouteCache
+from .stats import NULL_STATS, SolveStats, StatsRegistry
+from .sweep import run_sweep
 
 # from hedera import (
 #     AccountId,
@@ -12,21 +33,123 @@ import random
 #     Hbar
 # )
 
+BACKENDS = ("networkx", "csr")
+SOLVERS = ("greedy", "dinic", "min_cost")
+# Reachability indexes are kept for this many preprocessing limits
+REACHABILITY_LIMITS = 4
+
+logger = logging.getLogger(__name__)
+
+
+# Pyvis options per layout type, see get_pyvis_options
+PYVIS_OPTIONS = {
+    'force_atlas': """
+        {
+          "physics": {
+            "forceAtlas2Based": {
+              "gravitationalConstant": -50,
+              "centralGravity": 0.01,
+              "springLength": 100,
+              "springConstant": 0.08
+            },
+            "maxVelocity": 50,
+            "solver": "forceAtlas2Based",
+            "timestep": 0.35,
+            "stabilization": { "iterations": 150 }
+          }
+        }
+        """,
+    # Positions come from get_layout(), nothing left to simulate
+    'precomputed': """
+        {
+          "physics": { "enabled": false },
+          "edges": { "smooth": false }
+        }
+        """
+}
+
+
 class GraphSimulator:
-    def __init__(self, use_hedera=False):
-        self.graph = nx.Graph()
+    def __init__(self, use_hedera=False, backend="networkx", seed=123, route_cache_size=256,
+                 instrument=False, rating_half_life=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        if rating_half_life is not None and backend != "csr":
+            raise ValueError("Rating decay needs the csr backend")
+        self.backend = backend
+        # The "csr" backend keeps the graph in a compact array store and only
+        # builds a networkx graph when one is asked for (see `graph`)
+        self.csr = CSRGraph() if backend == "csr" else None
+        self._graph = nx.Graph() if backend == "networkx" else None
         self.use_hedera = use_hedera
-        random.seed(123)
+        random.seed(seed)
+        # Used by the batched csr preprocessing
+        self.rng = np.random.default_rng(seed)
+        # Paths of recently routed commodities, reused for repeated
+        # source/sink pairs (see route_cache.py); 0 turns caching off
+        self.route_cache = RouteCache(route_cache_size) if route_cache_size else None
+        # Bumped whenever ratings or channels change. Cached routes of the
+        # cost strategies are keyed on it: a reward anywhere can make some
+        # other path the cheapest one
+        self.cost_version = 0
         self.hedera_accounts = {}
+        # Seconds for a rating to fall halfway back to neutral (see
+        # ratings.py); None keeps ratings where rewards and penalties put them
+        self.rating_half_life = rating_half_life
+        self._ratings = None
+        # Per-phase timings and search counters of each routing call end up
+        # in self.last_stats and are totalled in self.metrics (see stats.py)
+        self.metrics = StatsRegistry() if instrument else None
+        self.last_stats = NULL_STATS
+        # limit -> ReachabilityIndex, and the index each preprocessed graph
+        # was made with, so routing can reject disconnected pairs up front
+        self._reachability = OrderedDict()
+        self._reachability_views = weakref.WeakKeyDictionary()
+        # networkx preprocessed view -> {node: rating} when it was made, so
+        # get_graph_data draws it as routed, like a csr GraphView does
+        self._routed_ratings = weakref.WeakKeyDictionary()
+        # Set by open_store: where changes to the csr graph are persisted
+        self.store = None
+        # CSV the graph came from; node positions are persisted next to it
+        self.source_path = None
+        self._layout = None
 
         # Initialize the Hedera client only if Hedera mode is enabled
         # if self.use_hedera:
         #     self.client = Client.forTestnet()
         #     self.client.setOperator(AccountId(0, 0, 1), PrivateKey.generate())
 
+    @property
+    def graph(self):
+        # With the csr backend this is a read-only networkx snapshot
+        if self.csr is not None:
+            return self.csr.to_networkx()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        if self.csr is not None:
+            self.csr = CSRGraph.from_networkx(graph)
+        else:
+            self._graph = graph
+        self._invalidate_routes()
+
+    @property
+    def ratings(self):
+        # RatingStore for the current csr graph, which may have been replaced
+        if self._ratings is None or self._ratings.graph is not self.csr:
+            self._ratings = RatingStore(self.csr, half_life=self.rating_half_life)
+        return self._ratings
+
     def add_node(self, node_id, **attrs):
         # Initialize transactions data for the node
-        self.graph.add_node(node_id, **attrs)
+        if self.csr is not None:
+            self.csr.add_node(node_id, **attrs)
+        else:
+            self.graph.add_node(node_id, **attrs)
+        self._invalidate_routes([node_id])
+        for index in self._reachability.values():
+            index.add_node(node_id)
         if self.use_hedera:
             hedera_account_id = attrs.get('hedera_account_id', None)
             if hedera_account_id:
@@ -59,43 +182,142 @@ class GraphSimulator:
             # status = receipt.status.toString()
         # else:
             # Regular network simulation logic
-        self.graph.add_edge(sender_id, receiver_id, weight=amount)
+        if self.csr is not None:
+            self.csr.add_edge(sender_id, receiver_id, amount)
+        else:
+            self.graph.add_edge(sender_id, receiver_id, weight=amount)
+        self._invalidate_routes([sender_id, receiver_id])
+        for index in self._reachability.values():
+            index.add_channel(sender_id, receiver_id)
         status = "SUCCESS"
 
         return status
 
-    def get_graph_data(self):
+    def get_graph_data(self, graph=None):
         # Converts the graph to a format suitable for visualization
-        # including the edge weights (capacities)
-        return nx.node_link_data(self.graph)
-
-    def import_graph_from_csv(self, file_path):
-        # Read CSV file
-        df = pd.read_csv(file_path)
-
-        # Add nodes and edges from CSV
-        for _, row in df.iterrows():
-            self.graph.add_node(row['source'], rating=row.get(
-                'rating', random.uniform(0, 1)))
-            self.graph.add_node(row['target'], rating=row.get(
-                'rating', random.uniform(0, 1)))
-            # Assuming the CSV contains a 'capacity' column for edge weights
-            self.graph.add_edge(row['source'], row['target'], weight=row.get(
-                'capacity', 1))  # Default capacity to 1 if not specified
+        # including the edge weights (capacities). Pass the graph returned by
+        # multi_commodity_flow_paths to render a routing result instead; it
+        # shows the ratings it was routed with, before that call's rewards,
+        # on either backend.
+        if graph is None and self.csr is not None:
+            self._refresh_ratings()
+        graph = self.graph if graph is None else graph
+        if isinstance(graph, (CSRGraph, GraphView)):
+            return graph.node_link_data()
+        data = nx.node_link_data(graph)
+        ratings = self._routed_ratings.get(graph)
+        if ratings is not None:
+            # The networkx view reads ratings live; put back the routed ones
+            for node in data['nodes']:
+                node['rating'] = ratings.get(node['id'], node.get('rating'))
+        return data
+
+    def import_graph_from_csv(self, file_path, use_cache=True):
+        # Parse whole columns (or reuse the binary sidecar snapshot) instead
+        # of walking the CSV row by row
+        table = read_edge_table(file_path, use_cache=use_cache)
+        node_ids = table.node_ids.tolist()
+        ratings = self._table_ratings(table)
+        self._invalidate_routes()
+        self.source_path = file_path
+
+        if self.csr is not None:
+            self._import_csr_table(table, node_ids, ratings)
+            return
+
+        self.graph.add_nodes_from(
+            (node, {'rating': rating}) for node, rating in zip(node_ids, ratings))
+        # Assuming the CSV contains a 'capacity' column for edge weights
+        # (defaults to 1 if not specified)
+        self.graph.add_weighted_edges_from(zip(
+            (node_ids[i] for i in table.source.tolist()),
+            (node_ids[i] for i in table.target.tolist()),
+            table.capacity.tolist()))
+
+    def open_store(self, directory, csv_path=None, compact_every=10_000):
+        """
+        Keep the csr graph in the GraphStore at `directory` (see
+        graph_store.py). An existing store is loaded, otherwise one is
+        created from `csv_path` (or the graph already loaded). Added nodes
+        and channels, rating changes and committed flow are logged to it
+        from then on.
+        """
+        if self.csr is None:
+            raise ValueError("A graph store needs the csr backend")
+        if self.store is not None:
+            self.store.close()
+        store = GraphStore(directory, compact_every=compact_every)
+        if store.exists():
+            self.csr = store.load()
+            self._invalidate_routes()
+        else:
+            if csv_path is not None:
+                self.import_graph_from_csv(csv_path)
+            store.create(self.csr)
+        if csv_path is not None:
+            self.source_path = csv_path
+        self.store = store
+        return store
+
+    def _table_ratings(self, table):
+        # The row-by-row importer evaluated random.uniform(0, 1) for both
+        # endpoints of every row (even with a 'rating' column) and kept the
+        # last value written per node. Draw the same sequence so seeded runs
+        # see identical ratings; uniform(0, 1) is exactly random().
+        draws = np.array([random.random() for _ in range(2 * len(table))])
+        values = draws if table.rating is None else np.repeat(table.rating, 2)
+
+        codes = table.endpoint_codes()
+        nodes, last = np.unique(codes[::-1], return_index=True)
+        ratings = np.zeros(len(table.node_ids))
+        ratings[nodes] = values[len(codes) - 1 - last]
+        return ratings.tolist()
+
+    def _import_csr_table(self, table, node_ids, ratings):
+        base = self.csr
+        if base.num_nodes == 0 and base.num_edges == 0:
+            self.csr = CSRGraph.from_edges(
+                node_ids, table.source, table.target, table.capacity, ratings)
+            return
+
+        # Merge into whatever was already loaded
+        for node, rating in zip(node_ids, ratings):
+            base.add_node(node, rating=rating)
+        for u, v, w in zip(table.source.tolist(), table.target.tolist(), table.capacity.tolist()):
+            base.add_edge(node_ids[u], node_ids[v], w)
 
     def mcfp_preprocess(self, threshold=.45, limit=.2, aggressiveness=0):
         """
         Solve the Multi-Commodity Flow Problem (MCFP) with ratings.
         Returns a dict of paths and the amount to be sent through each path.
         """
-        h = self.graph.copy()
+        if self.csr is not None:
+            view = self._csr_preprocess(threshold, limit, aggressiveness)
+            self._reachability_views[view] = self.reachability(limit)
+            return view
+
+        # Filtered view instead of a copy: removals only go into these sets.
+        # The view is read-only and reads attributes from self.graph. Its
+        # members are fixed to the nodes and channels there are now, so
+        # ones added later stay out of it, as with a csr GraphView
+        nodes = set(self.graph)
+        channels = set(self.graph.edges())
+        removed_nodes = set()
+        removed_edges = set()
+        h = nx.subgraph_view(
+            self.graph,
+            filter_node=lambda n: n in nodes and n not in removed_nodes,
+            filter_edge=lambda u, v: (u, v) not in removed_edges and (
+                (u, v) in channels or (v, u) in channels))
 
         # List of nodes and edges to be removed
         nodes_to_remove = []
+        ratings = {}
 
         # Loop through each node
         for node in h.nodes():
             rating = h.nodes[node]['rating']
+            ratings[node] = rating
             # If the rating of the node is below the limit, remove it
             if rating < limit:
                 # Mark node for removal
@@ -115,56 +337,158 @@ class GraphSimulator:
                     # Remove a random half of the edges
                     to_remove = random.sample(edges, len(edges)//2)
 
-                    for e in to_remove:
-                        h.remove_edge(*e)
+                    for u, v in to_remove:
+                        removed_edges.add((u, v))
+                        removed_edges.add((v, u))
 
         # Remove all marked nodes
-        for node in nodes_to_remove:
-            h.remove_node(node)
+        removed_nodes.update(nodes_to_remove)
 
+        self._reachability_views[h] = self.reachability(limit)
+        self._routed_ratings[h] = ratings
         return h
 
-    def multi_commodity_flow_paths(self, commodities, threshold=.45, limit=.2, aggressiveness=0):
-        graph = self.mcfp_preprocess(
-            threshold=threshold, limit=limit, aggressiveness=aggressiveness)
+    def _csr_preprocess(self, threshold, limit, aggressiveness):
+        # Batched version of the loop above (see preprocess.py), drawing the
+        # random edge deletions from the simulator's seeded generator
+        self._refresh_ratings()
+        node_mask, edge_mask = preprocess_masks(
+            self.csr, threshold, limit, aggressiveness, rng=self.rng)
+        return GraphView(self.csr, node_mask, edge_mask)
+
+    def multi_commodity_flow_paths(self, commodities, threshold=.45, limit=.2, aggressiveness=0,
+                                   strategy="bfs", solver="greedy"):
+        # `solver` is "greedy" (augment one searched path at a time),
+        # "dinic" (true max-flow per commodity, see max_flow.py) or
+        # "min_cost" (all commodities routed together along the cheapest
+        # paths by rating and capacity, see min_cost_flow.py).
+        # `strategy` picks the greedy augmenting-path search, see
+        # path_search.STRATEGIES. Per-query hop counts and node expansions
+        # end up in self.last_queries, Dinic / min-cost results in
+        # self.last_flows, and with instrument=True phase timings in
+        # self.last_stats.
+        stats = self.new_stats()
+        with stats.phase("preprocess"):
+            graph = self.mcfp_preprocess(
+                threshold=threshold, limit=limit, aggressiveness=aggressiveness)
+
+        routed = self._route(graph, commodities, strategy=strategy, solver=solver,
+                             cache_params=(threshold, limit, aggressiveness, strategy, solver),
+                             stats=stats)
 
-        ref = graph.copy()
+        # This will store the paths for all commodities
+        all_paths = []
+        with stats.phase("ratings"):
+            for commodity_paths in routed:
+                # Stop at a commodity we could not satisfy
+                if commodity_paths is None:
+                    break
+
+                self.update_graph_with_paths(commodity_paths)
+
+                all_paths.append(commodity_paths)
+        self.record_stats(stats)
+
+        if len(all_paths) < len(routed):
+            return False, "Not all commodities can be satisfied.", []
+
+        # If we reach this point, all commodities have been satisfied.
+        # The preprocessed graph is a view, so handing it back costs nothing;
+        # it is only turned into a real graph if the caller renders it.
+        return True, graph, all_paths
+
+    def _residual_network(self, graph, with_cost=False):
+        if self.csr is not None:
+            return CSRResidual(graph, with_cost=with_cost)
 
         residual_graph = nx.Graph()
         for u, v, data in graph.edges(data=True):
             # Add edge with the capacity as the initial residual
             residual_graph.add_edge(u, v, capacity=data['weight'], flow=0)
-
-        # This will store the paths for all commodities
-        all_paths = []
-
-        # Path searching function using BFS for shortest path
-        def find_path(residual, source, sink):
-            if source not in residual or sink not in residual:
-                # If either the source or sink is not in the graph, no path exists.
-                return None
-
-            visited = {source}
-            queue = [(source, [])]
-            while queue:
-                current, path = queue.pop(0)
-                if current == sink:
-                    return path
-                for neighbor in residual.neighbors(current):
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        edge_data = residual[current][neighbor]
-                        residual_capacity = edge_data['capacity'] - \
-                            edge_data['flow']
-                        if residual_capacity > 0:
-                            queue.append(
-                                (neighbor, path + [(current, neighbor)]))
-            return None
-
-        # Function to update the residual graph with the given path and flow amount
-        def update_residual_graph(residual, path, flow_amount):
-            for u, v in path:
-                residual[u][v]['flow'] += flow_amount
+            if with_cost:
+                residual_graph[u][v]['cost'] = float(channel_cost(
+                    data['weight'], graph.nodes[u]['rating'], graph.nodes[v]['rating']))
+        return NxResidual(residual_graph)
+
+    def _refresh_ratings(self):
+        # Apply pending decay before anyone reads all ratings at once
+        if self.ratings.refresh():
+            self.cost_version += 1
+            for index in self._reachability.values():
+                index.sync()
+
+    def reachability(self, limit):
+        """The ReachabilityIndex for graphs preprocessed with `limit`."""
+        index = self._reachability.get(limit)
+        if index is None:
+            graph = self.csr if self.csr is not None else self.graph
+            index = self._reachability[limit] = ReachabilityIndex(graph, limit)
+            while len(self._reachability) > REACHABILITY_LIMITS:
+                self._reachability.popitem(last=False)
+        self._reachability.move_to_end(limit)
+        return index
+
+    def reachability_stats(self):
+        return [index.stats() for index in self._reachability.values()]
+
+    def new_stats(self):
+        """A SolveStats when instrumented, else the do-nothing NULL_STATS."""
+        return SolveStats() if self.metrics is not None else NULL_STATS
+
+    def record_stats(self, stats):
+        if self.metrics is not None:
+            self.metrics.record(stats)
+
+    def _route(self, graph, commodities, strategy="bfs", solver="greedy", stop_on_failure=True,
+               cache_params=None, stats=None):
+        """
+        Route `commodities` over a preprocessed graph without rewarding any
+        ratings. Returns one list of paths per commodity, or None for a
+        commodity that could not be satisfied. With `stop_on_failure` the
+        list ends at the first None. Otherwise the failed commodity's partial
+        flow is given back and routing carries on with the next one.
+
+        With `cache_params` (anything hashable describing preprocessing and
+        search settings) greedy and Dinic commodities first try the route
+        cache, and successfully routed ones are stored in it.
+
+        Timings and counters go into `stats` (see stats.py). Without one a
+        fresh one is made and recorded here; callers that pass their own
+        record it themselves, once their other phases are done.
+        """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r}, expected one of {SOLVERS}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown path search strategy {strategy!r}, expected one of {STRATEGIES}")
+        owned = stats is None
+        if owned:
+            stats = self.new_stats()
+        self.last_stats = stats
+
+        with stats.phase("residual"):
+            net = self._residual_network(
+                graph, with_cost=strategy in COST_STRATEGIES or solver == "min_cost")
+
+        routed = []
+        self.last_queries = []
+        self.last_flows = []
+        # Kept so callers can read back how much each channel carried
+        self.last_residual = net
+
+        if solver == "min_cost":
+            # Solved jointly up front; the loop below only collects results
+            with stats.phase("search"):
+                joint = iter(min_cost_flows(net, [
+                    (net.index(c['source']), net.index(c['sink']), c['amount'])
+                    for c in commodities]))
+
+        # min_cost solves all commodities jointly, so its paths are not cached
+        cache = self.route_cache if cache_params is not None and solver != "min_cost" else None
+        if cache is not None and strategy in COST_STRATEGIES:
+            cache_params = cache_params + (self.cost_version,)
+        # Set when `graph` came from mcfp_preprocess; min_cost has already
+        # searched everything by now, so there is nothing left to save
+        reach = self._reachability_views.get(graph) if solver != "min_cost" else None
 
         # Main loop for each commodity
         for commodity in commodities:
@@ -172,71 +496,272 @@ class GraphSimulator:
             sink = commodity['sink']
             amount = commodity['amount']
             commodity_paths = []
-
-            # While there is a path with flow to send and the required amount has not been met
-            while amount > 0:
-                try:
-                    path = find_path(residual_graph, source, sink)
+            pushed = []
+            stats.commodity()
+
+            if reach is not None and not reach.connected(source, sink):
+                # Different components: no search can succeed
+                stats.rejected()
+                stats.failed()
+                routed.append(None)
+                if stop_on_failure:
+                    break
+                continue
+
+            cache_key = None
+            if cache is not None:
+                cache_key = cache.key(source, sink, amount, cache_params)
+                with stats.phase("augment"):
+                    cached = cache.lookup(
+                        cache_key, lambda paths: self._replay_paths(net, paths, amount))
+                if cached is not None:
+                    stats.cache_hit()
+                    stats.augmented(len(cached))
+                    routed.append(cached)
+                    continue
+
+            if solver == "min_cost":
+                result = next(joint)
+                self.last_flows.append(result)
+                stats.searched(result.expansions)
+                if result.value >= amount - EPS:
+                    commodity_paths = [[(net.node_id(u), net.node_id(v)) for u, v, _ in path]
+                                       for path, _ in result.paths]
+                    stats.augmented(len(commodity_paths))
+                    amount = 0
+
+            elif solver == "dinic":
+                s, t = net.index(source), net.index(sink)
+                result = None
+                if s is not None and t is not None and s != t:
+                    with stats.phase("search"):
+                        result = dinic(net, s, t, amount)
+                    self.last_flows.append(result)
+                    stats.searched(result.expansions)
+                if result is not None and result.value >= amount - EPS:
+                    with stats.phase("augment"):
+                        for path, flow_amount in result.paths:
+                            for _, _, e in path:
+                                net.push(e, flow_amount)
+                            commodity_paths.append(
+                                [(net.node_id(u), net.node_id(v)) for u, v, _ in path])
+                    stats.augmented(len(commodity_paths))
+                    amount = 0
+
+            else:
+                # While there is a path with flow to send and the required amount has not been met
+                while amount > 0:
+                    try:
+                        with stats.phase("search"):
+                            query = find_path(net, source, sink, strategy)
+                    except Exception:
+                        # A broken search must not pass for an unroutable
+                        # commodity unnoticed: log it, then penalise the
+                        # source and give up on this commodity as before
+                        logger.exception("Path search from %r to %r failed", source, sink)
+                        stats.error()
+                        self._scale_rating(source, 0.95)
+                        break
+                    self.last_queries.append(query)
+                    stats.searched(query.expansions)
+                    path = query.path
                     if not path:
                         # No more paths available, return with the paths found so far
                         break
 
-                    # Calculate the minimum residual capacity along the path
-                    flow_amount = min(amount, min(
-                        residual_graph[u][v]['capacity'] - residual_graph[u][v]['flow'] for u, v in path))
-                    if flow_amount == 0:
-                        # No more flow can be sent along this path
-                        break
+                    with stats.phase("augment"):
+                        # Calculate the minimum residual capacity along the path
+                        flow_amount = min(amount, min(net.residual(e) for _, _, e in path))
+                        if flow_amount == 0:
+                            # No more flow can be sent along this path
+                            break
 
-                    update_residual_graph(residual_graph, path, flow_amount)
+                        for _, _, e in path:
+                            net.push(e, flow_amount)
+                    pushed.append((path, flow_amount))
+                    stats.augmented()
 
                     # Record the path and reduce the amount by the flow amount
-                except Exception as e:
-                    u, v = path
-                    self.graph.nodes[u]['rating'] *= 0.95
-                    break
-                commodity_paths.append(path)
-                amount -= flow_amount
+                    commodity_paths.append([(net.node_id(u), net.node_id(v)) for u, v, _ in path])
+                    amount -= flow_amount
 
-            # If we could not satisfy the commodity, return failure
             if amount > 0:
-                return False, "Not all commodities can be satisfied.", []
-
-            self.update_graph_with_paths(commodity_paths)
-
-            all_paths.append(commodity_paths)
-
-        # If we reach this point, all commodities have been satisfied
-        return True, ref, all_paths
+                stats.failed()
+                routed.append(None)
+                if stop_on_failure:
+                    break
+                # Give back whatever the failed commodity had already taken
+                for path, flow_amount in pushed:
+                    for _, _, e in path:
+                        net.push(e, -flow_amount)
+                continue
+
+            if cache_key is not None:
+                cache.put(cache_key, commodity_paths)
+            routed.append(commodity_paths)
+
+        if owned:
+            self.record_stats(stats)
+        return routed
+
+    def _replay_paths(self, net, paths, amount):
+        # Push `amount` along cached node-id paths, in order, as far as the
+        # current residual allows. Returns the paths that carried flow, or
+        # rolls everything back and returns None if some hop is gone or
+        # the paths cannot carry the whole amount any more.
+        pushed = []
+        for path in paths:
+            if amount <= 0:
+                break
+            arcs = []
+            for u, v in path:
+                a, b = net.index(u), net.index(v)
+                e = find_arc(net, a, b) if a is not None and b is not None else None
+                if e is None:
+                    arcs = None
+                    break
+                arcs.append(e)
+            if arcs is None:
+                break
+            flow_amount = min(amount, min(net.residual(e) for e in arcs))
+            if flow_amount <= 0:
+                continue
+            for e in arcs:
+                net.push(e, flow_amount)
+            pushed.append((path, arcs, flow_amount))
+            amount -= flow_amount
+
+        if amount > 0:
+            for _, arcs, flow_amount in pushed:
+                for e in arcs:
+                    net.push(e, -flow_amount)
+            return None
+        return [path for path, _, _ in pushed]
+
+    def _invalidate_routes(self, nodes=None):
+        # Drop cached routes through `nodes`, or all of them (and the
+        # reachability indexes) when the graph as a whole was replaced
+        self.cost_version += 1
+        if nodes is None:
+            self._reachability.clear()
+        if self.route_cache is None:
+            return
+        if nodes is None:
+            self.route_cache.clear()
+        else:
+            self.route_cache.invalidate(nodes)
+
+    def route_batches(self, commodity_sets, threshold=.45, limit=.2, aggressiveness=0,
+                      strategy="bfs", solver="greedy", processes=None):
+        """
+        Route several independent commodity sets concurrently. The graph is
+        preprocessed once and published to a process pool through shared
+        memory (see batch.py). Each set is routed from full capacity, as
+        if passed to multi_commodity_flow_paths alone.
+
+        Returns one dict per set in submission order with 'success',
+        'paths' (a list per commodity, empty on failure), 'solve_time' and
+        'stats' (see new_stats).
+        Ratings are updated afterwards, in submission order, just like
+        calling multi_commodity_flow_paths once per set. The one shared
+        preprocessing pass is timed too, each set's stats getting an equal
+        part of it.
+        """
+        shared = self.new_stats()
+        with shared.phase("preprocess"):
+            if self.csr is not None:
+                graph = self._csr_preprocess(threshold, limit, aggressiveness)
+            else:
+                # Workers route over arrays, so the networkx graph is converted once
+                base = CSRGraph.from_networkx(self.graph)
+                graph = GraphView(base, *preprocess_masks(
+                    base, threshold, limit, aggressiveness, rng=self.rng))
+
+        results = route_batches(graph, commodity_sets, processes=processes,
+                                strategy=strategy, solver=solver,
+                                instrument=self.metrics is not None)
+        for result in results:
+            stats = result['stats']
+            if stats.enabled:
+                stats.timings['preprocess'] += shared.timings['preprocess'] / len(results)
+            with stats.phase("ratings"):
+                for node, factor in result.pop('penalties'):
+                    self._scale_rating(node, factor)
+                for commodity_paths in result['paths']:
+                    self.update_graph_with_paths(commodity_paths)
+            self.record_stats(stats)
+        return results
+
+    def sweep(self, grid, commodities, processes=None, strategy="bfs", solver="greedy"):
+        """
+        Try every threshold / limit / aggressiveness setting in `grid` on the
+        same commodities. Returns a DataFrame with success rate, total hops
+        and solve time per setting. Uses the batched preprocessing
+        (preprocess.py) for either backend; see sweep.run_sweep.
+        """
+        return run_sweep(self, grid, commodities, processes=processes,
+                         strategy=strategy, solver=solver)
+
+    def _scale_rating(self, node, factor):
+        # Rewards only make a node more attractive; a penalty can push it
+        # under the preprocessing limits, so routes through it are dropped
+        if factor < 1:
+            self._invalidate_routes([node])
+        else:
+            self.cost_version += 1
+        if self.csr is not None:
+            idx = self.csr.node_index.get(node)
+            if idx is not None:
+                self.ratings.scale([idx], factor)
+        elif node in self.graph:
+            self.graph.nodes[node]['rating'] = min(1.0, self.graph.nodes[node]['rating'] * factor)
+        for index in self._reachability.values():
+            index.update_nodes([node])
 
     # Given a list of paths, update the graph with the transactions
     def update_graph_with_paths(self, paths):
-        for path in paths:
-            for u, v in path:
-                self.graph.nodes[u]['rating'] *= 1.05
+        # Ratings are capped at 1, the top of the Visualizer's colour scale
+        self.cost_version += 1
+        if self.csr is not None:
+            # One batched update for every hop (see ratings.py)
+            self.ratings.reward_paths(paths, 1.05)
+        else:
+            for path in paths:
+                for u, v in path:
+                    self.graph.nodes[u]['rating'] = min(1.0, self.graph.nodes[u]['rating'] * 1.05)
+
+        # A reward can lift a node back over a preprocessing limit
+        for reach in self._reachability.values():
+            reach.update_nodes({u for path in paths for u, v in path})
+
+    def get_layout(self, persist=True):
+        """
+        Node positions for the current graph (see layout.py). Computed once
+        per graph structure, reused from `<csv>.layout.npz` when present and
+        extended incrementally after nodes or channels are added.
+        """
+        graph = self.csr if self.csr is not None else CSRGraph.from_networkx(self.graph)
+        key = (graph.num_nodes, graph.num_edges)
+        if self._layout is not None and self._layout.key == key:
+            return self._layout
+
+        previous = self._layout
+        path = layout_path(self.source_path) if self.source_path else None
+        if previous is None and path:
+            previous = Layout.load(path)
+        if previous is not None and previous.key == key and previous.node_ids == graph.node_ids:
+            layout = previous
+        else:
+            layout = update_layout(graph.node_ids, graph.edge_u, graph.edge_v, previous)
+            if persist and path:
+                layout.save(path)
+        self._layout = layout
+        return layout
 
     def get_pyvis_options(self, layout_type):
         # Return different Pyvis options based on the layout_type
-        options = {
-            'force_atlas': """
-                {
-                  "physics": {
-                    "forceAtlas2Based": {
-                      "gravitationalConstant": -50,
-                      "centralGravity": 0.01,
-                      "springLength": 100,
-                      "springConstant": 0.08
-                    },
-                    "maxVelocity": 50,
-                    "solver": "forceAtlas2Based",
-                    "timestep": 0.35,
-                    "stabilization": { "iterations": 150 }
-                  }
-                }
-                """
-        }
-        # Return empty options as default
-        return options.get(layout_type, "{}")
+        # (empty options as default)
+        return PYVIS_OPTIONS.get(layout_type, "{}")
 
 
 # graph_sim = GraphSimulator(use_hedera=True)
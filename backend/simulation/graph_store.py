@@ -0,0 +1,252 @@
+# backend/simulation/graph_store.py
+#
+# Durable home for a CSRGraph that changes at runtime. A store directory
+# holds one generation of
+#   snapshot-<seq>/   the graph's arrays as .npy files (node ids, ratings,
+#                     channels, capacities, flows and the CSR adjacency).
+#                     The numeric arrays are opened with
+#                     np.load(mmap_mode='c'): pages are read on demand and
+#                     writes stay private to the process. Node ids are not:
+#                     they are read in full and indexed into a dict on every
+#                     open, so opening costs O(nodes) however small the log
+#   log-<seq>.jsonl   every change made after the snapshot, one JSON
+#                     record per line, appended as it happens
+# plus CURRENT, naming the live generation. The graph's journal hook
+# (CSRGraph.journal) feeds the log, so add_node, add_channel, rating
+# rewards/penalties and committed flow all survive a restart. Opening
+# maps the snapshot and replays only the log; compaction folds the log
+# into a new snapshot once it grows past `compact_every` records.
+#
+# Rating decay (ratings.py) is not logged, and the decay stamps are not
+# stored: after a restart ratings resume from their last logged or
+# compacted values and every node's decay clock starts over, so decay
+# since the last logged change and the downtime itself are lost. Node ids
+# are stored as strings, like the ids read from a channel CSV.
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+
+STORE_FORMAT = 1
+# Default store next to the CSV, e.g. graph.csv -> graph.csv.store/
+STORE_SUFFIX = ".store"
+ARRAYS = ("node_ids", "rating", "edge_u", "edge_v", "capacity", "flow",
+          "indptr", "indices", "arc_edge")
+
+
+def store_path(file_path):
+    return str(file_path) + STORE_SUFFIX
+
+
+class GraphJournal:
+    """Append-only change log of one store generation."""
+
+    def __init__(self, path, seq, fsync=False):
+        self.path = path
+        self.seq = seq
+        self.records = 0
+        self.fsync = fsync
+        self.on_record = None
+        self._file = open(path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, record):
+        self.seq += 1
+        record['seq'] = self.seq
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += 1
+        if self.on_record is not None:
+            self.on_record()
+
+    # Called by CSRGraph after each mutation
+    def add_node(self, node_id, rating, attrs):
+        self._write({'op': 'add_node', 'node': node_id, 'rating': rating, 'attrs': attrs})
+
+    def add_edge(self, u_id, v_id, capacity):
+        self._write({'op': 'add_edge', 'u': u_id, 'v': v_id, 'capacity': float(capacity)})
+
+    def ratings(self, indices, values):
+        self._write({'op': 'ratings', 'index': np.asarray(indices).tolist(),
+                     'value': np.asarray(values, dtype=np.float64).tolist()})
+
+    def flow(self, indices, delta):
+        if len(indices):
+            self._write({'op': 'flow', 'index': np.asarray(indices).tolist(),
+                         'delta': np.asarray(delta, dtype=np.float64).tolist()})
+
+
+def _replay(graph, path, after):
+    # Apply the records of `path` newer than `after`. A torn last line (a
+    # crash mid-write) is cut off, so new records start on a clean line.
+    # Returns the last sequence number seen.
+    seq = after
+    if not os.path.exists(path):
+        return seq
+    good = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn record")
+                record = json.loads(line)
+            except ValueError:
+                break
+            good += len(line)
+            if record['seq'] <= seq:
+                continue
+            op = record['op']
+            if op == 'add_node':
+                graph.add_node(record['node'], rating=record['rating'], **record['attrs'])
+            elif op == 'add_edge':
+                graph.add_edge(record['u'], record['v'], record['capacity'])
+            elif op == 'ratings':
+                graph.write_ratings(np.asarray(record['index'], dtype=np.int64), record['value'])
+            elif op == 'flow':
+                delta = np.zeros(graph.num_edges)
+                np.add.at(delta, np.asarray(record['index'], dtype=np.int64), record['delta'])
+                graph.add_flow(delta)
+            seq = record['seq']
+    if good < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    return seq
+
+
+class GraphStore:
+    """
+    Snapshot + log persistence for a CSRGraph in `directory`.
+
+        store = GraphStore(directory)
+        graph = store.load() if store.exists() else store.create(graph)
+
+    From then on changes to `graph` are logged; `compact()` (automatic
+    every `compact_every` records) writes a fresh snapshot.
+    """
+
+    def __init__(self, directory, compact_every=10_000, fsync=False):
+        self.directory = str(directory)
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.graph = None
+        self.journal = None
+        self.generation = None
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, "CURRENT"))
+
+    def _snapshot_dir(self, generation):
+        return os.path.join(self.directory, f"snapshot-{generation}")
+
+    def _log_path(self, generation):
+        return os.path.join(self.directory, f"log-{generation}.jsonl")
+
+    def create(self, graph):
+        """Start a store from `graph` (replacing any existing one) and attach to it."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.graph = graph
+        self._write_generation(0)
+        if os.path.exists(self._log_path(0)):
+            os.remove(self._log_path(0))
+        self._attach(0)
+        return graph
+
+    def load(self):
+        """Map the current snapshot, replay its log and attach to the result."""
+        with open(os.path.join(self.directory, "CURRENT"), encoding="utf-8") as f:
+            generation = int(f.read().strip())
+        snapshot = self._snapshot_dir(generation)
+        with open(os.path.join(snapshot, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta['format'] != STORE_FORMAT:
+            raise ValueError(f"Unsupported graph store format {meta['format']} in {snapshot}")
+
+        arrays = {name: np.load(os.path.join(snapshot, f"{name}.npy"), mmap_mode='c')
+                  for name in ARRAYS}
+        graph = CSRGraph()
+        # The one O(nodes) step: lookups by node id need the whole index
+        graph.node_ids = arrays['node_ids'].tolist()
+        graph.node_index = {node: i for i, node in enumerate(graph.node_ids)}
+        graph.rating = arrays['rating']
+        graph.edge_u, graph.edge_v = arrays['edge_u'], arrays['edge_v']
+        graph.capacity, graph.flow = arrays['capacity'], arrays['flow']
+        graph.node_attrs = meta['node_attrs']
+        # The adjacency was saved with the snapshot, so nothing is re-sorted
+        graph._csr = (arrays['indptr'], arrays['indices'], arrays['arc_edge'])
+        graph._csr_version = graph.structure_version
+
+        seq = _replay(graph, self._log_path(generation), generation)
+        self.graph = graph
+        self._attach(generation, seq)
+        return graph
+
+    def _attach(self, generation, seq=None):
+        if self.journal is not None:
+            self.journal.close()
+        self.generation = generation
+        self.journal = GraphJournal(self._log_path(generation),
+                                    generation if seq is None else seq, fsync=self.fsync)
+        self.journal.records = self.journal.seq - generation
+        self.journal.on_record = self._maybe_compact
+        self.graph.journal = self.journal
+
+    def _write_generation(self, generation):
+        # Everything goes into a temporary directory first, and CURRENT is
+        # switched with a rename, so a crash leaves the old generation intact
+        graph = self.graph
+        final = self._snapshot_dir(generation)
+        tmp = f"{final}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        indptr, indices, arc_edge = graph.csr()
+        arrays = {
+            'node_ids': np.asarray(graph.node_ids, dtype=str),
+            'rating': graph.rating, 'edge_u': graph.edge_u, 'edge_v': graph.edge_v,
+            'capacity': graph.capacity, 'flow': graph.flow,
+            'indptr': indptr, 'indices': indices, 'arc_edge': arc_edge,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({'format': STORE_FORMAT, 'seq': generation,
+                       'node_attrs': graph.node_attrs}, f)
+
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        current = os.path.join(self.directory, "CURRENT")
+        with open(current + ".tmp", "w", encoding="utf-8") as f:
+            f.write(str(generation))
+        os.replace(current + ".tmp", current)
+
+    def _maybe_compact(self):
+        if self.compact_every and self.journal.records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Fold the log into a new snapshot and start an empty log."""
+        old = self.generation
+        seq = self.journal.seq
+        if seq == old:
+            return
+        self._write_generation(seq)
+        self._attach(seq)
+        # The old files may still be mapped; unlinking them is fine on POSIX
+        shutil.rmtree(self._snapshot_dir(old), ignore_errors=True)
+        if os.path.exists(self._log_path(old)):
+            os.remove(self._log_path(old))
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.graph is not None:
+            self.graph.journal = None
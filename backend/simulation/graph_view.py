@@ -0,0 +1,182 @@
+# backend/simulation/graph_view.py
+
+import itertools
+
+import networkx as nx
+import numpy as np
+
+# Views are short-lived and never compared across processes, so a process-wide
+# counter is enough to give each view state its own version
+_versions = itertools.count(1)
+
+
+class _MaskedIndex:
+    # node_id -> index lookup that hides masked-out nodes
+    __slots__ = ("_index", "_mask")
+
+    def __init__(self, index, mask):
+        self._index = index
+        self._mask = mask
+
+    def get(self, node_id, default=None):
+        i = self._index.get(node_id)
+        if i is None or i >= len(self._mask) or not self._mask[i]:
+            return default
+        return i
+
+    def __contains__(self, node_id):
+        return self.get(node_id) is not None
+
+    def __getitem__(self, node_id):
+        i = self.get(node_id)
+        if i is None:
+            raise KeyError(node_id)
+        return i
+
+
+class GraphView:
+    """
+    Filtered overlay on a CSRGraph, returned by preprocessing instead of a
+    copy. Removed nodes and channels are boolean masks over the base arrays,
+    and indices are the base graph's, so nothing is renumbered or copied.
+
+    Ratings and capacities are read straight from the base until the base is
+    about to overwrite them (a rating reward after routing, a channel being
+    re-added). At that point the view keeps its own copy of that one array
+    (copy-on-write), so it keeps showing the graph as it was preprocessed.
+    Writes through `set_rating` / `set_capacity` never touch the base.
+    Channels and nodes added to the base later are not part of the view.
+    """
+
+    def __init__(self, base, node_mask, edge_mask=None):
+        self.base = base
+        self.node_mask = np.asarray(node_mask, dtype=bool)
+        m = len(base.edge_u)
+        edge_alive = self.node_mask[base.edge_u] & self.node_mask[base.edge_v]
+        if edge_mask is not None:
+            edge_alive &= np.asarray(edge_mask, dtype=bool)
+        self.edge_mask = edge_alive
+        self._m = m
+        self._n = len(self.node_mask)
+        self._own = {}
+        self._csr = None
+        self._nx = None
+        # Unique per view, bumped when the view's own arrays are written
+        self.version = next(_versions)
+        base.register_view(self)
+
+    # Arrays, sized to the base as it was when the view was taken
+    @property
+    def rating(self):
+        own = self._own.get('rating')
+        return own if own is not None else self.base.rating[:self._n]
+
+    @property
+    def capacity(self):
+        own = self._own.get('capacity')
+        return own if own is not None else self.base.capacity[:self._m]
+
+    @property
+    def flow(self):
+        return self.base.flow[:self._m]
+
+    @property
+    def edge_u(self):
+        return self.base.edge_u[:self._m]
+
+    @property
+    def edge_v(self):
+        return self.base.edge_v[:self._m]
+
+    @property
+    def node_ids(self):
+        return self.base.node_ids
+
+    @property
+    def node_index(self):
+        return _MaskedIndex(self.base.node_index, self.node_mask)
+
+    @property
+    def num_nodes(self):
+        return int(self.node_mask.sum())
+
+    @property
+    def num_edges(self):
+        return int(self.edge_mask.sum())
+
+    def __contains__(self, node_id):
+        return node_id in self.node_index
+
+    # Copy-on-write
+    def preserve(self, name):
+        """Called by the base right before it overwrites array `name`."""
+        if name in ('rating', 'capacity') and name not in self._own:
+            self._own[name] = getattr(self.base, name)[:self._n if name == 'rating' else self._m].copy()
+            self._nx = None
+
+    def set_rating(self, node_id, value):
+        self.preserve('rating')
+        self._own['rating'][self.node_index[node_id]] = value
+        self.version = next(_versions)
+        self._nx = None
+
+    def set_capacity(self, edge, value):
+        self.preserve('capacity')
+        self._own['capacity'][edge] = value
+        self.version = next(_versions)
+        self._nx = None
+
+    def restrict(self, node_mask):
+        """
+        Narrower view keeping only the nodes in `node_mask` (sized like this
+        view's node mask). It sees the same ratings and capacities as this
+        view, including any copies already taken.
+        """
+        node_mask = self.node_mask & np.asarray(node_mask, dtype=bool)[:self._n]
+        edge_u, edge_v = self.edge_u, self.edge_v
+        # Built field by field: the base may have grown past this view's sizes
+        view = GraphView.__new__(GraphView)
+        view.base = self.base
+        view.node_mask = node_mask
+        view.edge_mask = self.edge_mask & node_mask[edge_u] & node_mask[edge_v]
+        view._m, view._n = self._m, self._n
+        view._own = {name: array.copy() for name, array in self._own.items()}
+        view._csr = None
+        view._nx = None
+        view.version = next(_versions)
+        self.base.register_view(view)
+        return view
+
+    def csr(self):
+        """Base CSR with masked arcs dropped; arc_edge keeps base channel ids."""
+        if self._csr is None:
+            indptr, indices, arc_edge = self.base.csr()
+            # Arcs for base nodes/channels added after the view are skipped too
+            n = self._n
+            indptr = indptr[:n + 1]
+            indices, arc_edge = indices[:indptr[-1]], arc_edge[:indptr[-1]]
+            keep = arc_edge < self._m
+            keep[keep] = self.edge_mask[arc_edge[keep]]
+            tails = np.repeat(np.arange(n), np.diff(indptr))
+            new_indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(tails[keep], minlength=n), out=new_indptr[1:])
+            self._csr = (new_indptr, indices[keep], arc_edge[keep])
+        return self._csr
+
+    # Materialization, only when someone actually needs a real graph
+    def materialize(self):
+        """Compact CSRGraph copy of the view."""
+        g = self.base.subgraph(np.pad(self.node_mask, (0, self.base.num_nodes - self._n)),
+                               np.pad(self.edge_mask, (0, self.base.num_edges - self._m)))
+        keep = np.flatnonzero(self.node_mask)
+        g.rating = self.rating[keep].copy()
+        g.capacity = self.capacity[self.edge_mask].copy()
+        return g
+
+    def to_networkx(self):
+        if self._nx is None:
+            self._nx = self.materialize().to_networkx()
+        return self._nx
+
+    def node_link_data(self):
+        return nx.node_link_data(self.to_networkx())
@@ -0,0 +1,194 @@
+# backend/simulation/layout.py
+#
+# Server-side node layout, so the browser can draw with physics turned off
+# instead of running a force simulation on every render. Positions come
+# from a NumPy Fruchterman-Reingold pass over the channel list, are kept
+# per graph structure (nodes x channels) and persisted next to the CSV,
+# e.g. graph.csv -> graph.csv.layout.npz. Nodes are matched by id, so a
+# layout survives restarts and can be extended when a few nodes or
+# channels are added instead of being recomputed.
+
+import os
+
+import numpy as np
+
+LAYOUT_SUFFIX = ".layout.npz"
+# Above this many nodes repulsion is estimated from a random sample
+EXACT_REPULSION_NODES = 3000
+REPULSION_SAMPLE = 256
+# Recompute from scratch when more than this share of nodes is new
+INCREMENTAL_LIMIT = 0.25
+
+
+def layout_path(file_path):
+    return str(file_path) + LAYOUT_SUFFIX
+
+
+class Layout:
+    """Unit-box positions for `node_ids`, computed for `num_edges` channels."""
+
+    def __init__(self, node_ids, pos, num_edges):
+        self.node_ids = list(node_ids)
+        self.pos = pos
+        self.num_edges = num_edges
+        self.index = {node: i for i, node in enumerate(self.node_ids)}
+
+    @property
+    def key(self):
+        return len(self.node_ids), self.num_edges
+
+    def positions(self, node_ids, scale=1.0):
+        """{node_id: (x, y)} for the nodes that have a position."""
+        return {node: (float(self.pos[i, 0]) * scale, float(self.pos[i, 1]) * scale)
+                for node, i in ((node, self.index.get(node)) for node in node_ids)
+                if i is not None}
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        try:
+            np.savez(tmp, node_ids=np.asarray(self.node_ids, dtype=str), pos=self.pos,
+                     num_edges=np.int64(self.num_edges))
+            os.replace(tmp, path)
+        except OSError:
+            # Persisting is an optimisation; a read-only checkout still renders
+            pass
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                return cls(data['node_ids'].tolist(), data['pos'], int(data['num_edges']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def _repulsion(pos, rows, k, rng):
+    # Displacement pushing `rows` away from every node (or a sample of them)
+    n = len(pos)
+    if n <= EXACT_REPULSION_NODES:
+        others, scale = pos, 1.0
+    else:
+        others = pos[rng.choice(n, REPULSION_SAMPLE, replace=False)]
+        scale = (n - 1) / REPULSION_SAMPLE
+
+    disp = np.zeros((len(rows), 2))
+    # Blocks keep the pairwise arrays small; the weighted sums over the other
+    # nodes are matrix products: sum_j w_ij (p_i - p_j) = p_i sum_j w_ij - W p
+    block = max(1, (1 << 20) // max(len(others), 1))
+    for lo in range(0, len(rows), block):
+        mine = pos[rows[lo:lo + block]]
+        dx = mine[:, 0, None] - others[None, :, 0]
+        dy = mine[:, 1, None] - others[None, :, 1]
+        weight = (k * k) / np.maximum(dx * dx + dy * dy, 1e-6)
+        disp[lo:lo + block] = (mine * weight.sum(axis=1)[:, None] - weight @ others) * scale
+    return disp
+
+
+def fruchterman_reingold(n, edge_u, edge_v, pos=None, movable=None, iterations=50,
+                         temperature=0.1, seed=None):
+    """
+    Spring layout over `n` nodes and the channels `edge_u`/`edge_v`.
+    `pos` seeds the positions (random when None); only nodes in the index
+    array `movable` are moved (all when None). Returns positions scaled
+    into [-1, 1].
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2)) if pos is None else np.array(pos, dtype=np.float64)
+    if n <= 1:
+        return np.zeros((n, 2))
+    rows = np.arange(n) if movable is None else np.asarray(movable, dtype=np.int64)
+    if len(rows) == 0:
+        return pos
+
+    k = np.sqrt(1.0 / n)
+    is_row = np.full(n, -1, dtype=np.int64)
+    is_row[rows] = np.arange(len(rows))
+    # Only channels touching a movable node pull on anything that moves
+    touching = (is_row[edge_u] >= 0) | (is_row[edge_v] >= 0)
+    eu, ev = edge_u[touching], edge_v[touching]
+
+    # Keep the cooling step in the units of the current layout
+    span = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1]), 1e-9)
+    t = temperature * span
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        disp = _repulsion(pos, rows, k * span, rng)
+
+        delta = pos[eu] - pos[ev]
+        pull = delta * (np.sqrt((delta ** 2).sum(axis=1)) / (k * span))[:, None]
+        full = np.zeros((n, 2))
+        np.add.at(full, eu, -pull)
+        np.add.at(full, ev, pull)
+        disp += full[rows]
+
+        length = np.maximum(np.sqrt((disp ** 2).sum(axis=1)), 1e-9)
+        pos[rows] += disp * (np.minimum(length, t) / length)[:, None]
+        t -= dt
+
+    if movable is None:
+        pos = pos - pos.mean(axis=0)
+        pos /= max(np.abs(pos).max(), 1e-9)
+    return pos
+
+
+def update_layout(node_ids, edge_u, edge_v, previous=None, iterations=50, seed=123):
+    """
+    Layout for the graph given by `node_ids` and its channels. Nodes already
+    placed in `previous` keep their position; new nodes start at the centre
+    of their placed neighbours and, together with the endpoints of new
+    channels, are relaxed while everything else stays put. Falls back to a
+    full layout (seeded from `previous`) when too much of the graph is new.
+    """
+    n = len(node_ids)
+    edge_u = np.asarray(edge_u, dtype=np.int64)
+    edge_v = np.asarray(edge_v, dtype=np.int64)
+
+    known = np.zeros(n, dtype=bool)
+    pos = np.zeros((n, 2))
+    if previous is not None:
+        for i, node in enumerate(node_ids):
+            j = previous.index.get(node)
+            if j is not None:
+                known[i] = True
+                pos[i] = previous.pos[j]
+
+    if not known.any() or (~known).sum() > INCREMENTAL_LIMIT * n:
+        init = None
+        if known.any():
+            init = _place_new(pos, known, edge_u, edge_v, seed)
+        return Layout(node_ids, fruchterman_reingold(n, edge_u, edge_v, pos=init,
+                                                     iterations=iterations, seed=seed),
+                      len(edge_u))
+
+    pos = _place_new(pos, known, edge_u, edge_v, seed)
+    moved = ~known
+    if previous is not None and len(edge_u) > previous.num_edges:
+        # Channels are append-only, so the new ones are at the end
+        moved[edge_u[previous.num_edges:]] = True
+        moved[edge_v[previous.num_edges:]] = True
+    if moved.any():
+        pos = fruchterman_reingold(n, edge_u, edge_v, pos=pos, movable=np.flatnonzero(moved),
+                                   iterations=max(10, iterations // 3), temperature=0.02,
+                                   seed=seed)
+    return Layout(node_ids, pos, len(edge_u))
+
+
+def _place_new(pos, known, edge_u, edge_v, seed):
+    # New nodes go to the mean position of their placed neighbours, nudged
+    # apart; nodes without any go somewhere random inside the layout
+    pos = pos.copy()
+    n = len(pos)
+    rng = np.random.default_rng(seed)
+    sums = np.zeros((n, 2))
+    counts = np.zeros(n)
+    for a, b in ((edge_u, edge_v), (edge_v, edge_u)):
+        use = known[b] & ~known[a]
+        np.add.at(sums, a[use], pos[b[use]])
+        counts += np.bincount(a[use], minlength=n)
+
+    new = np.flatnonzero(~known)
+    near = new[counts[new] > 0]
+    pos[near] = sums[near] / counts[near, None] + rng.normal(scale=0.02, size=(len(near), 2))
+    lost = new[counts[new] == 0]
+    pos[lost] = rng.uniform(-1, 1, size=(len(lost), 2))
+    return pos
@@ -0,0 +1,162 @@
+# backend/simulation/max_flow.py
+#
+# Dinic max-flow for one commodity on top of the residual network used by
+# multi_commodity_flow_paths (see path_search for the net.* interface).
+#
+# Channels are undirected. What earlier commodities used is already gone from
+# net.residual(edge) = R. The commodity's own net flow x(u, v) = -x(v, u) then
+# gives residual arcs u->v = R - x(u, v) and v->u = R + x(u, v). Those reverse
+# arcs are what let the solver undo an earlier bad choice, which the greedy
+# augmenting loop cannot do. Nothing is written to `net` until the flow has
+# been decomposed into paths and handed back to the caller.
+
+from collections import defaultdict, deque
+
+EPS = 1e-9
+
+
+class MaxFlowResult:
+    """Flow found for one commodity, decomposed into (path, amount) pairs."""
+
+    __slots__ = ("value", "paths", "phases", "augmentations", "expansions")
+
+    def __init__(self, value, paths, phases, augmentations, expansions):
+        self.value = value
+        # Each path is a list of (u, v, edge) arcs, like PathQuery.path
+        self.paths = paths
+        self.phases = phases
+        self.augmentations = augmentations
+        self.expansions = expansions
+
+    def __repr__(self):
+        return (f"MaxFlowResult(value={self.value:.6g}, paths={len(self.paths)}, "
+                f"phases={self.phases}, augmentations={self.augmentations})")
+
+
+class CommodityFlow:
+    """Per-commodity overlay of signed own flow on top of the shared residual."""
+
+    def __init__(self, net):
+        self.net = net
+        self.flow = defaultdict(float)
+        self.edge = {}
+        self._arcs = {}
+
+    def arcs(self, u):
+        arcs = self._arcs.get(u)
+        if arcs is None:
+            arcs = self._arcs[u] = list(self.net.arcs(u))
+            for v, edge in arcs:
+                self.edge[(u, v)] = edge
+        return arcs
+
+    def capacity(self, u, v, edge):
+        return self.net.residual(edge) - self.flow[(u, v)]
+
+    def push(self, u, v, amount):
+        self.flow[(u, v)] += amount
+        self.flow[(v, u)] -= amount
+
+
+def dinic(net, s, t, demand):
+    """Push up to `demand` units from s to t (internal node keys)."""
+    overlay = CommodityFlow(net)
+    value = 0.0
+    phases = augmentations = expansions = 0
+
+    while value < demand - EPS:
+        # Level graph over arcs with residual capacity
+        level = {s: 0}
+        queue = deque([s])
+        while queue and t not in level:
+            u = queue.popleft()
+            expansions += 1
+            for v, edge in overlay.arcs(u):
+                if v not in level and overlay.capacity(u, v, edge) > EPS:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        if t not in level:
+            break
+        phases += 1
+
+        # Blocking flow: iterative DFS with per-node current-arc pointers
+        pointer = defaultdict(int)
+        stack = [s]
+        while stack and value < demand - EPS:
+            u = stack[-1]
+            if u == t:
+                pairs = list(zip(stack, stack[1:]))
+                pushed = min(demand - value,
+                             min(overlay.capacity(a, b, overlay.edge[(a, b)]) for a, b in pairs))
+                for a, b in pairs:
+                    overlay.push(a, b, pushed)
+                value += pushed
+                augmentations += 1
+                # Retreat to the tail of the first saturated arc
+                for i, (a, b) in enumerate(pairs):
+                    if overlay.capacity(a, b, overlay.edge[(a, b)]) <= EPS:
+                        del stack[i + 1:]
+                        break
+                continue
+
+            arcs = overlay.arcs(u)
+            i = pointer[u]
+            while i < len(arcs):
+                v, edge = arcs[i]
+                if level.get(v) == level[u] + 1 and overlay.capacity(u, v, edge) > EPS:
+                    break
+                i += 1
+            pointer[u] = i
+            if i < len(arcs):
+                stack.append(arcs[i][0])
+            else:
+                # Dead end: drop u from the level graph and advance the parent
+                level[u] = -1
+                stack.pop()
+                if stack:
+                    pointer[stack[-1]] += 1
+
+    return MaxFlowResult(value, decompose(overlay, s, t), phases, augmentations, expansions)
+
+
+def decompose(overlay, s, t):
+    """Split a CommodityFlow into (path, amount) s-t paths, cancelling cycles."""
+    flow = overlay.flow
+    out = defaultdict(list)
+    for (u, v), f in flow.items():
+        if f > EPS:
+            out[u].append(v)
+
+    def next_hop(u):
+        hops = out[u]
+        while hops and flow[(u, hops[-1])] <= EPS:
+            hops.pop()
+        return hops[-1] if hops else None
+
+    paths = []
+    while True:
+        nodes, position = [s], {s: 0}
+        while nodes[-1] != t:
+            v = next_hop(nodes[-1])
+            if v is None:
+                return paths
+            if v in position:
+                # Cycle: cancel it and keep walking from v
+                cycle = nodes[position[v]:] + [v]
+                amount = min(flow[(a, b)] for a, b in zip(cycle, cycle[1:]))
+                for a, b in zip(cycle, cycle[1:]):
+                    flow[(a, b)] -= amount
+                    flow[(b, a)] += amount
+                for node in nodes[position[v] + 1:]:
+                    del position[node]
+                del nodes[position[v] + 1:]
+                continue
+            position[v] = len(nodes)
+            nodes.append(v)
+
+        pairs = list(zip(nodes, nodes[1:]))
+        amount = min(flow[pair] for pair in pairs)
+        for a, b in pairs:
+            flow[(a, b)] -= amount
+            flow[(b, a)] += amount
+        paths.append(([(a, b, overlay.edge[(a, b)]) for a, b in pairs], amount))
@@ -0,0 +1,166 @@
+# backend/simulation/min_cost_flow.py
+#
+# Successive-shortest-path min-cost routing for all commodities of a request
+# at once. Channel costs come from path_search.channel_cost (rating and
+# capacity), so flow prefers reliable, well-funded channels over merely
+# short routes.
+#
+# Commodities take turns: each round, every unfinished commodity runs one
+# Dijkstra on its own residual graph and augments along the cheapest path.
+# Its flow is charged to the shared residual straight away, so the other
+# commodities compete for what is left in the same round instead of queueing
+# behind it. Each commodity keeps Johnson potentials, which keep reduced costs
+# non-negative so every Dijkstra stays a plain heap search even once reverse
+# (cancel) arcs show up.
+
+import heapq
+
+from .max_flow import EPS, CommodityFlow, decompose
+
+
+class MinCostFlowResult:
+    """Outcome for one commodity: flow value, total cost and (path, amount) pairs."""
+
+    __slots__ = ("value", "cost", "paths", "augmentations", "expansions")
+
+    def __init__(self, value, cost, paths, augmentations, expansions):
+        self.value = value
+        self.cost = cost
+        self.paths = paths
+        self.augmentations = augmentations
+        self.expansions = expansions
+
+    def __repr__(self):
+        return (f"MinCostFlowResult(value={self.value:.6g}, cost={self.cost:.6g}, "
+                f"paths={len(self.paths)}, augmentations={self.augmentations})")
+
+
+class _SharedFlow(CommodityFlow):
+    # Unlike Dinic, own flow is charged to the shared residual as it is
+    # pushed, so net.residual(edge) already excludes |x|. Where the
+    # commodity already sends flow v->u (x(u, v) < 0), the u->v arc only
+    # offers the cancellation, priced at -cost. The forward capacity beyond
+    # it opens up on the next search, after the cancellation is used up.
+
+    def capacity(self, u, v, edge):
+        x = self.flow[(u, v)]
+        return -x if x < -EPS else self.net.residual(edge)
+
+    def cost(self, u, v, edge):
+        c = self.net.cost(edge)
+        return -c if self.flow[(u, v)] < -EPS else c
+
+    def push(self, u, v, amount):
+        before = abs(self.flow[(u, v)])
+        super().push(u, v, amount)
+        self.net.push(self.edge[(u, v)], abs(self.flow[(u, v)]) - before)
+
+    def release(self):
+        # Hand everything this commodity holds back to the shared residual
+        for (u, v), x in self.flow.items():
+            if x > EPS:
+                self.net.push(self.edge[(u, v)], -x)
+        self.flow.clear()
+
+
+class _Commodity:
+    def __init__(self, net, s, t, amount):
+        self.s = s
+        self.t = t
+        self.amount = amount
+        self.remaining = amount
+        self.flow = _SharedFlow(net)
+        self.potential = {}
+        self.cost = 0.0
+        self.augmentations = 0
+        self.expansions = 0
+        self.failed = s is None or t is None or s == t
+
+
+def _cheapest_path(c):
+    flow, potential, s, t = c.flow, c.potential, c.s, c.t
+    dist = {s: 0.0}
+    parent = {s: None}
+    done = set()
+    heap = [(0.0, 0, s)]
+    counter = 1
+
+    while heap:
+        d, _, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        c.expansions += 1
+        if u == t:
+            break
+        pu = potential.get(u, 0.0)
+        for v, edge in flow.arcs(u):
+            if v in done or flow.capacity(u, v, edge) <= EPS:
+                continue
+            # Reduced costs are >= 0 while the potentials are valid. Capacity
+            # another commodity frees mid-request can re-open an arc the
+            # potentials never saw, so clamp rather than let Dijkstra go wrong.
+            reduced = flow.cost(u, v, edge) + pu - potential.get(v, 0.0)
+            nd = d + (reduced if reduced > 0 else 0.0)
+            if nd < dist.get(v, float('inf')):
+                dist[v] = nd
+                parent[v] = (u, edge)
+                heapq.heappush(heap, (nd, counter, v))
+                counter += 1
+
+    if t not in done:
+        return None
+
+    # Johnson update; nodes never settled implicitly move by dist[t] with
+    # everything else, which doesn't change any reduced cost
+    dt = dist[t]
+    for v in done:
+        potential[v] = potential.get(v, 0.0) + dist[v] - dt
+
+    path, node = [], t
+    while node != s:
+        u, edge = parent[node]
+        path.append((u, node, edge))
+        node = u
+    path.reverse()
+    return path
+
+
+def min_cost_flows(net, demands):
+    """
+    Route every (s, t, amount) in `demands` (internal node keys, None when
+    the node is missing) over `net`, which must be built with costs.
+    Returns one MinCostFlowResult per demand, in order. Commodities that
+    cannot be fully routed give their capacity back to the others.
+    """
+    commodities = [_Commodity(net, s, t, amount) for s, t, amount in demands]
+    active = [c for c in commodities if not c.failed and c.remaining > EPS]
+
+    while active:
+        still_active = []
+        for c in active:
+            path = _cheapest_path(c)
+            if path is None:
+                c.failed = True
+                c.flow.release()
+                continue
+
+            flow = c.flow
+            amount = min(c.remaining, min(flow.capacity(u, v, edge) for u, v, edge in path))
+            unit_cost = sum(flow.cost(u, v, edge) for u, v, edge in path)
+            for u, v, _ in path:
+                flow.push(u, v, amount)
+            c.remaining -= amount
+            c.cost += amount * unit_cost
+            c.augmentations += 1
+            if c.remaining > EPS:
+                still_active.append(c)
+        active = still_active
+
+    results = []
+    for c in commodities:
+        value = 0.0 if c.failed else c.amount - c.remaining
+        paths = [] if c.failed else decompose(c.flow, c.s, c.t)
+        results.append(MinCostFlowResult(value, c.cost if not c.failed else 0.0, paths,
+                                         c.augmentations, c.expansions))
+    return results
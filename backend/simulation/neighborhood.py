@@ -0,0 +1,97 @@
+# backend/simulation/neighborhood.py
+#
+# Level-of-detail extraction for rendering: the nodes on the routed paths
+# plus their k-hop neighbourhood, capped at a node budget. When a hop ring
+# does not fit in the remaining budget, the ring nodes with the most
+# channels into the previous ring are kept first.
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .graph_view import GraphView
+
+
+def path_nodes(transaction_paths):
+    """Node ids on `transaction_paths` (one list of paths per commodity), in order."""
+    seen = {}
+    for commodity_paths in transaction_paths or []:
+        for path in commodity_paths:
+            for u, v in path:
+                seen.setdefault(u)
+                seen.setdefault(v)
+    return list(seen)
+
+
+def neighborhood_mask(graph, seeds, hops=1, max_nodes=250):
+    """
+    Boolean node mask over a CSRGraph or GraphView: node indices `seeds`
+    (always kept, even past the budget) plus up to `hops` rings of
+    neighbours while fewer than `max_nodes` nodes are selected.
+    """
+    indptr, indices, _ = graph.csr()
+    n = len(indptr) - 1
+    selected = np.zeros(n, dtype=bool)
+    frontier = np.unique(np.asarray(seeds, dtype=np.int64))
+    selected[frontier] = True
+
+    for _ in range(hops):
+        room = max_nodes - int(selected.sum())
+        if room <= 0 or len(frontier) == 0:
+            break
+        # Every arc leaving the frontier, gathered without a Python loop
+        starts = indptr[frontier]
+        lengths = indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        heads = indices[offsets + np.arange(lengths.sum())]
+        heads = heads[~selected[heads]]
+        if len(heads) == 0:
+            break
+
+        counts = np.bincount(heads, minlength=n)
+        ring = np.flatnonzero(counts)
+        if len(ring) > room:
+            ring = ring[np.argsort(-counts[ring], kind="stable")[:room]]
+        selected[ring] = True
+        frontier = ring
+    return selected
+
+
+def focus_subgraph(graph, transaction_paths, hops=1, max_nodes=250):
+    """
+    The part of `graph` worth drawing for `transaction_paths`: path nodes
+    plus their `hops`-hop neighbourhood within `max_nodes`. Without paths,
+    the `max_nodes` best connected nodes are kept. Returns a GraphView for
+    the csr types and a subgraph view for networkx graphs.
+    """
+    seeds = path_nodes(transaction_paths)
+
+    if isinstance(graph, (CSRGraph, GraphView)):
+        index = graph.node_index
+        seed_idx = [index[node] for node in seeds if node in index]
+        if not seed_idx:
+            degree = np.diff(graph.csr()[0])
+            seed_idx = np.argsort(-degree, kind="stable")[:max_nodes]
+        mask = neighborhood_mask(graph, seed_idx, hops, max_nodes)
+        if isinstance(graph, GraphView):
+            return graph.restrict(mask)
+        return GraphView(graph, mask)
+
+    # networkx: same selection, walking adjacency dicts
+    selected = {node for node in seeds if node in graph}
+    if not selected:
+        by_degree = sorted(graph.degree, key=lambda item: -item[1])
+        selected = {node for node, _ in by_degree[:max_nodes]}
+    frontier = list(selected)
+    for _ in range(hops):
+        room = max_nodes - len(selected)
+        if room <= 0 or not frontier:
+            break
+        counts = {}
+        for node in frontier:
+            for neighbor in graph[node]:
+                if neighbor not in selected:
+                    counts[neighbor] = counts.get(neighbor, 0) + 1
+        ring = sorted(counts, key=lambda node: -counts[node])[:room]
+        selected.update(ring)
+        frontier = ring
+    return graph.subgraph(selected)
@@ -0,0 +1,274 @@
+# backend/simulation/path_search.py
+#
+# Augmenting-path search over a residual network. Every strategy keeps only
+# parent pointers while searching and rebuilds the path once the sink has
+# been reached. A node is only marked as reached through an arc that still
+# has residual capacity, so a saturated channel never hides a node from a
+# path that could have used it.
+#
+# Strategies work against a small residual-network interface:
+#   net.index(node_id)   -> internal node key, or None if absent
+#   net.node_id(key)     -> original node id
+#   net.arcs(u)          -> iterable of (v, edge) pairs leaving u
+#   net.residual(edge)   -> remaining capacity on edge
+#   net.cost(edge)       -> non-negative traversal cost (dijkstra / astar)
+# NxResidual and CSRResidual below adapt the two GraphSimulator backends.
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+STRATEGIES = ("bfs", "bidirectional", "dijkstra", "astar")
+# Strategies that need net.cost()
+COST_STRATEGIES = ("dijkstra", "astar")
+
+
+class PathQuery:
+    """Outcome of one search: the path as (u, v, edge) arcs plus counters."""
+
+    __slots__ = ("strategy", "path", "hops", "expansions")
+
+    def __init__(self, strategy, path, expansions):
+        self.strategy = strategy
+        self.path = path
+        self.hops = len(path) if path else 0
+        self.expansions = expansions
+
+    def __repr__(self):
+        return (f"PathQuery(strategy={self.strategy!r}, hops={self.hops}, "
+                f"expansions={self.expansions}, found={self.path is not None})")
+
+
+def channel_cost(capacity, rating_u, rating_v):
+    """
+    Cost of routing over a channel: one per hop, plus up to one for the less
+    reliable endpoint (ratings are clamped to 0..1) and up to one for thin
+    channels. Works on scalars and NumPy arrays alike. Always >= 1, which the
+    A* heuristic relies on.
+    """
+    reliability = np.clip(np.minimum(rating_u, rating_v), 0.0, 1.0)
+    return 1.0 + (1.0 - reliability) + 1.0 / (1.0 + np.maximum(capacity, 0.0))
+
+
+# ----------------------------------------------------------------------
+# Residual network adapters
+# ----------------------------------------------------------------------
+
+class NxResidual:
+    """Residual view over the networkx graph built by multi_commodity_flow_paths."""
+
+    def __init__(self, residual_graph):
+        self.graph = residual_graph
+        self._adj = residual_graph._adj
+        self._hops = {}
+
+    def index(self, node_id):
+        return node_id if node_id in self._adj else None
+
+    def node_id(self, key):
+        return key
+
+    def arcs(self, u):
+        return self._adj[u].items()
+
+    def residual(self, edge):
+        return edge['capacity'] - edge['flow']
+
+    def cost(self, edge):
+        return edge['cost']
+
+    def push(self, edge, amount):
+        edge['flow'] += amount
+
+
+class CSRResidual:
+    """
+    Residual view over a CSRGraph. Arrays are mirrored into Python lists once
+    so the per-arc work in the search loops stays on plain lists.
+    """
+
+    def __init__(self, graph, with_cost=False):
+        self.graph = graph
+        indptr, indices, arc_edge = graph.csr()
+        self.indptr = indptr.tolist()
+        self.indices = indices.tolist()
+        self.arc_edge = arc_edge.tolist()
+        self.remaining = (graph.capacity - graph.flow).tolist()
+        self.costs = None
+        if with_cost:
+            self.costs = channel_cost(graph.capacity, graph.rating[graph.edge_u],
+                                      graph.rating[graph.edge_v]).tolist()
+        self._hops = {}
+
+    def index(self, node_id):
+        return self.graph.node_index.get(node_id)
+
+    def node_id(self, key):
+        return self.graph.node_ids[key]
+
+    def arcs(self, u):
+        lo, hi = self.indptr[u], self.indptr[u + 1]
+        return zip(self.indices[lo:hi], self.arc_edge[lo:hi])
+
+    def residual(self, edge):
+        return self.remaining[edge]
+
+    def cost(self, edge):
+        return self.costs[edge]
+
+    def push(self, edge, amount):
+        self.remaining[edge] -= amount
+
+
+def find_arc(net, u, v):
+    """Edge handle of the arc u -> v in `net`, or None if it is not there."""
+    for w, edge in net.arcs(u):
+        if w == v:
+            return edge
+    return None
+
+
+# ----------------------------------------------------------------------
+# Strategies
+# ----------------------------------------------------------------------
+
+def _rebuild(parent, s, t):
+    path = []
+    node = t
+    while node != s:
+        u, edge = parent[node]
+        path.append((u, node, edge))
+        node = u
+    path.reverse()
+    return path
+
+
+def bfs(net, s, t):
+    parent = {s: None}
+    queue = deque([s])
+    expansions = 0
+    while queue:
+        u = queue.popleft()
+        expansions += 1
+        for v, edge in net.arcs(u):
+            if v not in parent and net.residual(edge) > 0:
+                parent[v] = (u, edge)
+                if v == t:
+                    return _rebuild(parent, s, t), expansions
+                queue.append(v)
+    return None, expansions
+
+
+def bidirectional_bfs(net, s, t):
+    # Channels are undirected and the residual is shared by both directions,
+    # so the backward search walks the same arcs as the forward one
+    if s == t:
+        return [], 0
+    forward, backward = {s: None}, {t: None}
+    f_frontier, b_frontier = [s], [t]
+    expansions = 0
+
+    while f_frontier and b_frontier:
+        # Grow the smaller side by one full level
+        grow_forward = len(f_frontier) <= len(b_frontier)
+        frontier = f_frontier if grow_forward else b_frontier
+        seen, other = (forward, backward) if grow_forward else (backward, forward)
+        next_frontier = []
+        for u in frontier:
+            expansions += 1
+            for v, edge in net.arcs(u):
+                if v in seen or net.residual(edge) <= 0:
+                    continue
+                seen[v] = (u, edge)
+                if v in other:
+                    return _join(forward, backward, s, t, v), expansions
+                next_frontier.append(v)
+        if grow_forward:
+            f_frontier = next_frontier
+        else:
+            b_frontier = next_frontier
+    return None, expansions
+
+
+def _join(forward, backward, s, t, meet):
+    path = _rebuild(forward, s, meet)
+    node = meet
+    while node != t:
+        v, edge = backward[node]
+        path.append((node, v, edge))
+        node = v
+    return path
+
+
+def dijkstra(net, s, t, heuristic=None):
+    dist = {s: 0.0}
+    parent = {s: None}
+    done = set()
+    heap = [(heuristic(s) if heuristic else 0.0, 0.0, 0, s)]
+    counter = 1  # tie-breaker so node keys are never compared
+    expansions = 0
+
+    while heap:
+        _, d, _, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        if u == t:
+            return _rebuild(parent, s, t), expansions
+        done.add(u)
+        expansions += 1
+        for v, edge in net.arcs(u):
+            if v in done or net.residual(edge) <= 0:
+                continue
+            nd = d + net.cost(edge)
+            if nd < dist.get(v, float('inf')):
+                dist[v] = nd
+                parent[v] = (u, edge)
+                priority = nd + heuristic(v) if heuristic else nd
+                heapq.heappush(heap, (priority, nd, counter, v))
+                counter += 1
+    return None, expansions
+
+
+def astar(net, s, t):
+    # Hop distance to the sink on the unsaturated structure is a lower bound
+    # on the residual hop count, and every channel costs at least 1
+    hops = net._hops.get(t)
+    if hops is None:
+        hops = {t: 0}
+        queue = deque([t])
+        while queue:
+            u = queue.popleft()
+            for v, _ in net.arcs(u):
+                if v not in hops:
+                    hops[v] = hops[u] + 1
+                    queue.append(v)
+        net._hops[t] = hops
+    if s not in hops:
+        return None, 0
+    unreachable = float('inf')
+    return dijkstra(net, s, t, heuristic=lambda v: hops.get(v, unreachable))
+
+
+_SEARCHES = {
+    "bfs": bfs,
+    "bidirectional": bidirectional_bfs,
+    "dijkstra": dijkstra,
+    "astar": astar,
+}
+
+
+def find_path(net, source, sink, strategy="bfs"):
+    """Search `net` for an augmenting path from `source` to `sink` (node ids)."""
+    try:
+        search = _SEARCHES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown path search strategy {strategy!r}, expected one of {STRATEGIES}")
+
+    s, t = net.index(source), net.index(sink)
+    if s is None or t is None:
+        # If either the source or sink is not in the graph, no path exists.
+        return PathQuery(strategy, None, 0)
+
+    path, expansions = search(net, s, t)
+    return PathQuery(strategy, path or None, expansions)
@@ -0,0 +1,122 @@
+# backend/simulation/preprocess.py
+
+import numpy as np
+
+
+def preprocess_masks(graph, threshold=.45, limit=.2, aggressiveness=0, rng=None, keys=None):
+    """
+    Batched mcfp_preprocess over a CSRGraph's rating and capacity arrays.
+
+    Returns ``(node_mask, edge_mask)``: nodes rated below `limit` are dropped
+    and every node rated below `threshold` with more than one channel loses
+    a random half of its channels cheaper than `aggressiveness`. The random
+    halves come from `rng` (a numpy.random.Generator), so a seeded generator
+    gives reproducible results.
+
+    `keys` optionally fixes the random draw: one float per CSR arc, reused
+    across calls (parameter sweeps do this so neighbouring settings differ
+    only where the parameters do).
+
+    Unlike the per-node loop, all nodes draw from their full channel lists
+    at once. A channel already dropped by one endpoint can still be counted
+    by the other, instead of shrinking its list first.
+    """
+    if rng is None and keys is None:
+        rng = np.random.default_rng()
+
+    rating = graph.rating
+    indptr, _, arc_edge = graph.csr()
+    n = len(rating)
+
+    node_mask = rating >= limit
+    edge_mask = np.ones(len(graph.capacity), dtype=bool)
+    tails = np.repeat(np.arange(n), np.diff(indptr))
+    chosen = _dropped_arcs(graph, np.arange(len(arc_edge)), tails, threshold,
+                           aggressiveness, rng, keys)
+    edge_mask[arc_edge[chosen]] = False
+    return node_mask, edge_mask
+
+
+def _dropped_arcs(graph, arcs, tails, threshold, aggressiveness, rng=None, keys=None):
+    """The arcs among `arcs` (with tail nodes `tails`) whose tail drops them."""
+    rating = graph.rating
+    capacity = graph.capacity
+    indptr, _, arc_edge = graph.csr()
+    n = len(rating)
+    degree = np.diff(indptr)
+
+    # Candidate arcs: low-rated tail with >1 channel, channel below aggressiveness
+    low = (rating < threshold) & (degree > 1)
+    keep = low[tails] & (capacity[arc_edge[arcs]] < aggressiveness)
+    candidates = arcs[keep]
+    if len(candidates) == 0:
+        return candidates
+
+    # Shuffle candidates within each node, then keep the first half of each group
+    owner = tails[keep]
+    draw = keys[candidates] if keys is not None else rng.random(len(candidates))
+    order = np.lexsort((draw, owner))
+    owner = owner[order]
+    per_node = np.bincount(owner, minlength=n)
+    group_start = np.concatenate([[0], np.cumsum(per_node)[:-1]])
+    rank = np.arange(len(order)) - group_start[owner]
+    return candidates[order[rank < per_node[owner] // 2]]
+
+
+class PreprocessedMasks:
+    """
+    preprocess_masks for one (threshold, limit, aggressiveness), kept up to
+    date across rating changes instead of recomputed. The random halves are
+    drawn once per arc (like the fixed `keys` of a parameter sweep) and only
+    redrawn with a new instance.
+
+    `update(nodes)` redoes the decisions of the given node indices after
+    their ratings changed; `current()` says whether the masks still match
+    the graph, i.e. nothing else changed since they were made or updated.
+    Flow is not an input, so committed payments never stale the masks.
+    """
+
+    def __init__(self, graph, threshold=.45, limit=.2, aggressiveness=0, rng=None):
+        if rng is None:
+            rng = np.random.default_rng()
+        self.graph = graph
+        self.threshold = threshold
+        self.limit = limit
+        self.aggressiveness = aggressiveness
+        indptr, _, arc_edge = graph.csr()
+        self.keys = rng.random(len(arc_edge))
+        self.tails = np.repeat(np.arange(len(graph.rating)), np.diff(indptr))
+
+        self.node_mask = graph.rating >= limit
+        self.dropped = np.zeros(len(arc_edge), dtype=bool)
+        self.dropped[_dropped_arcs(graph, np.arange(len(arc_edge)), self.tails, threshold,
+                                   aggressiveness, keys=self.keys)] = True
+        # Endpoints dropping each channel; it is kept while nobody does
+        self.drops = np.bincount(arc_edge[self.dropped], minlength=len(graph.capacity))
+        self.edge_mask = self.drops == 0
+        self.version = graph.version
+        self.structure_version = graph.structure_version
+
+    def current(self, graph):
+        return graph is self.graph and graph.version == self.version
+
+    def update(self, nodes):
+        """Re-decide node indices `nodes`; call right after their ratings changed."""
+        graph = self.graph
+        if graph.structure_version != self.structure_version:
+            # New arcs have no draw yet; leave it to a new instance
+            return
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        if len(nodes):
+            indptr, _, arc_edge = graph.csr()
+            self.node_mask[nodes] = graph.rating[nodes] >= self.limit
+            arcs = np.concatenate([np.arange(indptr[u], indptr[u + 1]) for u in nodes.tolist()])
+            now = np.zeros(len(arcs), dtype=bool)
+            chosen = _dropped_arcs(graph, arcs, self.tails[arcs], self.threshold,
+                                   self.aggressiveness, keys=self.keys)
+            now[np.searchsorted(arcs, chosen)] = True
+            edges = arc_edge[arcs]
+            np.add.at(self.drops, edges, now.astype(np.int64) - self.dropped[arcs])
+            self.dropped[arcs] = now
+            self.edge_mask[edges] = self.drops[edges] == 0
+        self.version = graph.version
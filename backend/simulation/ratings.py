@@ -0,0 +1,107 @@
+# backend/simulation/ratings.py
+#
+# Node ratings of a CSRGraph with batched updates and lazy time decay. The
+# values stay in graph.rating, where preprocessing, path costs and the
+# Visualizer read them. Next to them the store keeps one timestamp per
+# node. Decay pulls a rating back toward `baseline` with the given half
+# life, and is only worked out when a node is touched (a reward or
+# penalty) or when a caller needs every rating at once (`refresh`), from
+# the time since that node was last brought up to date. Ratings are
+# clamped to [low, high], the 0..1 range the Visualizer colours.
+#
+# The stamps live in memory only. A new RatingStore (after a restart, or
+# once the graph is replaced) stamps every node with the time it is made,
+# so decay restarts from the ratings as they are then: the downtime and
+# any decay not yet written to a graph store are not made up for.
+
+import time
+
+import numpy as np
+
+
+class RatingStore:
+    """
+    Rating updates for `graph` (a CSRGraph).
+
+    With `half_life` (seconds, None disables decay) a rating r at time t0
+    reads as baseline + (r - baseline) * 0.5 ** ((t - t0) / half_life) at
+    time t. Full refreshes closer together than `resolution` of a half life
+    are skipped; touched nodes are always decayed exactly.
+    """
+
+    def __init__(self, graph, half_life=None, baseline=0.5, low=0.0, high=1.0,
+                 resolution=1e-3, clock=time.monotonic):
+        self.graph = graph
+        self.half_life = half_life
+        self.baseline = baseline
+        self.low = low
+        self.high = high
+        self.resolution = resolution
+        self.clock = clock
+        now = clock()
+        self.stamp = np.full(graph.num_nodes, now)
+        self._refreshed = now
+
+    def _grow(self, now):
+        # Nodes added to the graph since start out fresh
+        n = self.graph.num_nodes
+        if n > len(self.stamp):
+            self.stamp = np.concatenate([self.stamp, np.full(n - len(self.stamp), now)])
+
+    def _decayed(self, indices, now):
+        # Current values of `indices`, with their stamps moved up to `now`
+        values = self.graph.rating[indices]
+        if self.half_life is not None:
+            factor = 0.5 ** ((now - self.stamp[indices]) / self.half_life)
+            values = self.baseline + (values - self.baseline) * factor
+        self.stamp[indices] = now
+        return values
+
+    def refresh(self):
+        """
+        Bring every rating up to date. Returns True when ratings were
+        rewritten (so anything derived from them may be stale).
+        """
+        if self.half_life is None:
+            return False
+        now = self.clock()
+        self._grow(now)
+        if now - self._refreshed < self.resolution * self.half_life:
+            return False
+        self._refreshed = now
+        everything = np.arange(self.graph.num_nodes)
+        # Not journaled: logging every rating on each refresh would swamp a
+        # graph store's log. Nor can it be redone after a restart, since
+        # the stamps are not persisted (see the note at the top)
+        self.graph.write_ratings(everything, self._decayed(everything, now), journal=False)
+        return True
+
+    def scale(self, indices, factor):
+        """
+        Multiply the ratings of node `indices` by `factor`, all at once.
+        Repeated indices compound, like one multiplication per occurrence.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return
+        now = self.clock()
+        self._grow(now)
+        touched, slots = np.unique(indices, return_inverse=True)
+        # Decay first; multiply.at then applies the factor once per
+        # occurrence, in order, exactly like a loop of *= would
+        values = self._decayed(touched, now)
+        np.multiply.at(values, slots, factor)
+        self.graph.write_ratings(touched, np.clip(values, self.low, self.high))
+
+    def reward_paths(self, paths, factor=1.05):
+        """Apply `factor` once per hop to each hop's sending node (node-id paths)."""
+        index = self.graph.node_index
+        self.scale([index[u] for path in paths for u, _ in path], factor)
+
+    def get(self, node_id):
+        i = self.graph.node_index[node_id]
+        value = float(self.graph.rating[i])
+        if self.half_life is not None and i < len(self.stamp):
+            factor = 0.5 ** ((self.clock() - self.stamp[i]) / self.half_life)
+            value = self.baseline + (value - self.baseline) * factor
+        return value
@@ -0,0 +1,192 @@
+# backend/simulation/reachability.py
+#
+# Connected-component index over the nodes that survive preprocessing
+# (rating >= limit), so routing can turn down a source/sink pair that lives
+# in different components without a search exploring the whole reachable
+# side first.
+#
+# The index only ever over-approximates connectivity: it ignores the random
+# channel deletions of mcfp_preprocess and the capacity already used up, so
+# "different components" is always a safe rejection. Adding channels and
+# reviving nodes are unions and applied immediately; a node dropping below
+# the limit could split a component, which a union-find cannot undo, so
+# such removals are only counted and the labels are rebuilt from scratch
+# once enough of them have piled up.
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+
+# Rebuild after this many removals, or 1% of the nodes if that is more
+REBUILD_AFTER = 64
+
+
+def component_labels(n, edge_u, edge_v, alive=None):
+    """
+    Component root (its smallest node index) for each of `n` nodes, with
+    channels `edge_u`/`edge_v` between nodes that are both `alive`. Hooks
+    roots onto smaller roots and compresses, all in NumPy.
+    """
+    parent = np.arange(n, dtype=np.int64)
+    edge_u = np.asarray(edge_u, dtype=np.int64)
+    edge_v = np.asarray(edge_v, dtype=np.int64)
+    if alive is not None:
+        keep = alive[edge_u] & alive[edge_v]
+        edge_u, edge_v = edge_u[keep], edge_v[keep]
+
+    while len(edge_u):
+        ru, rv = parent[edge_u], parent[edge_v]
+        differ = ru != rv
+        if not differ.any():
+            break
+        edge_u, edge_v, ru, rv = edge_u[differ], edge_v[differ], ru[differ], rv[differ]
+        np.minimum.at(parent, np.maximum(ru, rv), np.minimum(ru, rv))
+        # Point every node straight at its root again
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+
+class ReachabilityIndex:
+    """
+    Union-find over the nodes of `graph` (CSRGraph or networkx graph)
+    rated at least `limit`. `connected(a, b)` is False only when no path
+    between the two node ids can exist in a graph preprocessed with that
+    limit. `rejections` counts the pairs turned down that way.
+    """
+
+    def __init__(self, graph, limit):
+        self.graph = graph
+        self.limit = limit
+        self.rejections = 0
+        self.rebuilds = 0
+        self.rebuild()
+
+    def rebuild(self):
+        graph = self.graph
+        if isinstance(graph, CSRGraph):
+            # Shared with the graph, so nodes it adds are indexed too
+            self.node_index = graph.node_index
+            ratings = graph.rating
+            edge_u, edge_v = graph.edge_u, graph.edge_v
+        else:
+            self.node_index = {node: i for i, node in enumerate(graph.nodes)}
+            ratings = np.array([rating for _, rating in graph.nodes(data='rating', default=0.0)],
+                               dtype=np.float64)
+            index = self.node_index
+            edge_u = np.array([index[u] for u, _ in graph.edges], dtype=np.int64)
+            edge_v = np.array([index[v] for _, v in graph.edges], dtype=np.int64)
+
+        self.alive = ratings >= self.limit
+        self.parent = component_labels(len(ratings), edge_u, edge_v, self.alive)
+        self.stale = 0
+        self.rebuilds += 1
+
+    def _rating(self, i, node):
+        if isinstance(self.graph, CSRGraph):
+            return self.graph.rating[i]
+        return self.graph.nodes[node].get('rating', 0.0)
+
+    def _grow(self):
+        # Index nodes the graph gained since the arrays were sized
+        n = len(self.node_index)
+        if n > len(self.parent):
+            extra = n - len(self.parent)
+            self.parent = np.concatenate([self.parent, np.arange(len(self.parent), n)])
+            self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+
+    def _find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, i, j):
+        ri, rj = self._find(i), self._find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+    def connected(self, a, b):
+        i, j = self.node_index.get(a), self.node_index.get(b)
+        if i is None or j is None:
+            # Unknown nodes are not routable either; find_path says so for free
+            return True
+        self._grow()
+        if self._find(i) == self._find(j):
+            return True
+        self.rejections += 1
+        return False
+
+    def add_node(self, node):
+        if not isinstance(self.graph, CSRGraph):
+            # A CSRGraph indexes its own new nodes in the shared dict
+            self.node_index.setdefault(node, len(self.node_index))
+        self._grow()
+        self.update_nodes([node])
+
+    def add_channel(self, u, v):
+        self.add_node(u)
+        self.add_node(v)
+        i, j = self.node_index[u], self.node_index[v]
+        if self.alive[i] and self.alive[j]:
+            self._union(i, j)
+
+    def update_nodes(self, nodes):
+        """Follow rating changes of `nodes` across the limit."""
+        self._grow()
+        for node in nodes:
+            i = self.node_index.get(node)
+            if i is None:
+                continue
+            alive = self._rating(i, node) >= self.limit
+            if alive == self.alive[i]:
+                continue
+            self.alive[i] = alive
+            if alive:
+                for j in self._neighbors(i, node):
+                    if self.alive[j]:
+                        self._union(i, j)
+            else:
+                self.stale += 1
+
+        if self.stale > max(REBUILD_AFTER, len(self.parent) // 100):
+            self.rebuild()
+
+    def sync(self):
+        """Catch up with rating changes that bypassed update_nodes (e.g. decay)."""
+        self._grow()
+        graph = self.graph
+        if isinstance(graph, CSRGraph):
+            ratings, ids = graph.rating, graph.node_ids
+        else:
+            ids = list(self.node_index)
+            ratings = np.array([self._rating(i, node) for i, node in enumerate(ids)])
+        changed = np.flatnonzero((ratings >= self.limit) != self.alive[:len(ratings)])
+        self.update_nodes([ids[i] for i in changed.tolist()])
+
+    def _neighbors(self, i, node):
+        graph = self.graph
+        if isinstance(graph, CSRGraph):
+            return np.concatenate([graph.edge_v[graph.edge_u == i],
+                                   graph.edge_u[graph.edge_v == i]]).tolist()
+        return [self.node_index[neighbor] for neighbor in graph[node]]
+
+    def stats(self):
+        roots = self.parent
+        while True:
+            grand = roots[roots]
+            if np.array_equal(grand, roots):
+                break
+            roots = grand
+        roots = roots[self.alive]
+        return {
+            'limit': self.limit,
+            'components': int(len(np.unique(roots))),
+            'rejections': self.rejections,
+            'stale_removals': self.stale,
+            'rebuilds': self.rebuilds,
+        }
@@ -0,0 +1,115 @@
+# backend/simulation/route_cache.py
+
+import math
+from collections import OrderedDict
+
+
+def amount_bucket(amount):
+    """Power-of-two bucket of an amount: 3 and 4 share a bucket, 5 does not."""
+    if amount <= 1:
+        return 0
+    return math.ceil(math.log2(amount))
+
+
+class RouteCache:
+    """
+    LRU cache of routed paths for repeated (source, sink) pairs.
+
+    Keys are (epoch, source, sink, amount bucket, params), where `params`
+    holds the preprocessing parameters, search strategy and solver, and
+    `epoch` is bumped by `clear()` whenever the whole graph is replaced. An
+    entry holds the node-id paths that satisfied the commodity. For the
+    cost strategies (dijkstra, astar) `params` also carries the simulator's
+    cost_version, so their routes are not reused once any rating or
+    channel changed: a still-feasible path may no longer be the cheapest.
+
+    Entries are dropped early by `invalidate(nodes)` when a channel or node
+    on their paths changes. Because preprocessing and earlier commodities
+    change the residual, a hit is only counted once the caller has replayed
+    the paths successfully (see `lookup`). A failed replay drops the entry
+    and counts as a miss.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.epoch = 0
+        self._entries = OrderedDict()
+        # node id -> keys of entries whose paths pass through it
+        self._by_node = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, source, sink, amount, params):
+        return (self.epoch, source, sink, amount_bucket(amount), params)
+
+    def lookup(self, key, replay):
+        """
+        Return `replay(paths)` for a cached entry, or None on a miss.
+        `replay` returns None when the cached paths no longer fit.
+        """
+        paths = self._entries.get(key)
+        if paths is not None:
+            self._entries.move_to_end(key)
+            result = replay(paths)
+            if result is not None:
+                self.hits += 1
+                return result
+            self._discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, key, paths):
+        if self.maxsize <= 0 or not paths:
+            return
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = paths
+        for path in paths:
+            for u, v in path:
+                self._by_node.setdefault(u, set()).add(key)
+                self._by_node.setdefault(v, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, nodes):
+        """Drop every entry whose paths touch one of `nodes`."""
+        for node in nodes:
+            for key in list(self._by_node.get(node, ())):
+                self._discard(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.epoch += 1
+        self._entries.clear()
+        self._by_node.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _discard(self, key):
+        paths = self._entries.pop(key, None)
+        if paths is None:
+            return
+        for path in paths:
+            for u, v in path:
+                for node in (u, v):
+                    keys = self._by_node.get(node)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self._by_node[node]
@@ -0,0 +1,356 @@
+# backend/simulation/shared.py
+#
+# One long-lived simulator shared by every Streamlit session (the pages hold
+# it with st.cache_resource). Payments are routed against the flow already
+# committed by earlier payments, instead of re-importing the graph and
+# rebuilding a fresh residual per button press, and their effects (channel
+# flow, rating rewards) are only kept once the payment is committed.
+#
+# Committed flow stays locked for `flow_ttl` seconds and is then settled
+# (given back to the channels), the way a forwarded payment stops holding
+# liquidity once it resolves; reset_flows releases all of it at once.
+#
+# The preprocessed graph is kept per (threshold, limit, aggressiveness)
+# instead of preprocessing on every call: routing reads committed flow
+# live, and a commit only re-decides the masks of the nodes it rewarded
+# (see PreprocessedMasks). Anything else that changes the graph (new
+# nodes or channels, rating decay) makes the next call preprocess afresh.
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from .graph_simulator import GraphSimulator
+from .graph_view import GraphView
+from .preprocess import PreprocessedMasks
+from .stats import NULL_STATS
+
+# Preprocessing settings whose masks are kept up to date at once
+PREPROCESSED_SIZE = 4
+
+
+class Payment:
+    """
+    Result of routing one set of commodities inside a transaction.
+    `flow` is the per-channel amount the payment would lock up, `stats`
+    the solver's SolveStats (NULL_STATS unless the simulator is
+    instrumented). `version` is the simulator state it was routed
+    against; it can only be committed while that is still current.
+    """
+
+    def __init__(self, success, graph, paths, flow, message="", stats=NULL_STATS, version=None):
+        self.success = success
+        self.graph = graph
+        self.paths = paths
+        self.flow = flow
+        self.message = message
+        self.stats = stats
+        self.version = version
+        self.state = "pending"
+
+
+class SharedSimulator:
+    """
+    Thread-safe wrapper around a csr-backed GraphSimulator.
+
+        with shared.transaction(commodities, threshold, limit) as payment:
+            if payment.success:
+                ...  # committed when the block exits normally
+
+    The lock is held for the whole block, so concurrent sessions see each
+    other's payments in a consistent order. A failed payment, or one whose
+    block raises, is rolled back; `payment.rollback()` inside the block
+    discards a successful one too.
+
+    `route` on its own is a preview: its payment is only committed by
+    `commit` if nothing else was committed or changed in between, and is
+    marked "stale" otherwise.
+
+    With `flow_ttl` (seconds) each commit's flow is released that long
+    after it was committed; None keeps it until reset_flows.
+    """
+
+    def __init__(self, simulator=None, flow_ttl=None):
+        self.simulator = simulator or GraphSimulator(backend="csr")
+        self.lock = threading.RLock()
+        self.committed = 0
+        self.rolled_back = 0
+        self.settled = 0
+        self.flow_ttl = flow_ttl
+        # (release time, channel indices, amounts) per commit, oldest first
+        self._held = deque()
+        # Flow already there (e.g. from a graph store) gets a full ttl too
+        self._hold(self.simulator.csr.flow.copy())
+        # Bumped whenever committed flow changes; csr.version does not see flow
+        self.flow_version = 0
+        # (threshold, limit, aggressiveness) -> [PreprocessedMasks, GraphView or None]
+        self._preprocessed = OrderedDict()
+
+    @classmethod
+    def from_csv(cls, file_path, store=None, flow_ttl=None, **kwargs):
+        """
+        Simulator over the channel CSV `file_path`. With `store` (a
+        directory, see graph_store.py) the graph is loaded from and
+        persisted to it, the CSV only seeding a new store.
+        """
+        simulator = GraphSimulator(backend="csr", **kwargs)
+        if store is not None:
+            simulator.open_store(store, csv_path=file_path)
+        else:
+            simulator.import_graph_from_csv(file_path)
+        return cls(simulator, flow_ttl=flow_ttl)
+
+    def version(self):
+        """Changes whenever a routed payment could turn out differently."""
+        return (id(self.simulator.csr), self.simulator.csr.version, self.flow_version)
+
+    def _preprocess(self, threshold, limit, aggressiveness):
+        # The kept view for these settings, remade only when its masks are stale
+        sim = self.simulator
+        sim._refresh_ratings()
+        key = (threshold, limit, aggressiveness)
+        entry = self._preprocessed.pop(key, None)
+        if entry is None or not entry[0].current(sim.csr):
+            entry = [PreprocessedMasks(sim.csr, threshold, limit, aggressiveness, rng=sim.rng), None]
+        self._preprocessed[key] = entry
+        if len(self._preprocessed) > PREPROCESSED_SIZE:
+            self._preprocessed.popitem(last=False)
+
+        masks, view = entry
+        if view is None:
+            # Own copies of the masks: later updates must not reach this view
+            view = GraphView(sim.csr, masks.node_mask.copy(), masks.edge_mask.copy())
+            sim._reachability_views[view] = sim.reachability(limit)
+            entry[1] = view
+        return view
+
+    def _reward(self, routed):
+        # Rating rewards for committed paths, carried into the kept masks
+        sim = self.simulator
+        before = sim.csr.version
+        for commodity_paths in routed:
+            sim.update_graph_with_paths(commodity_paths)
+        index = sim.csr.node_index
+        nodes = [index[node] for commodity_paths in routed for path in commodity_paths
+                 for hop in path for node in hop]
+        for entry in self._preprocessed.values():
+            masks = entry[0]
+            if masks.graph is sim.csr and masks.version == before:
+                masks.update(nodes)
+            # The view kept the ratings it was routed with
+            entry[1] = None
+
+    def _hold(self, flow):
+        # Schedule committed `flow` for release
+        if self.flow_ttl is None:
+            return
+        edges = np.flatnonzero(flow)
+        if len(edges):
+            self._held.append((time.monotonic() + self.flow_ttl, edges, flow[edges]))
+
+    def settle(self, now=None):
+        """Release the flow of commits older than `flow_ttl`; returns how many."""
+        with self.lock:
+            now = time.monotonic() if now is None else now
+            due = []
+            while self._held and self._held[0][0] <= now:
+                due.append(self._held.popleft())
+            if not due:
+                return 0
+            csr = self.simulator.csr
+            delta = np.zeros(csr.num_edges)
+            for _, edges, amounts in due:
+                np.subtract.at(delta, edges, amounts)
+            # Through add_flow, so a graph store logs the release too
+            csr.add_flow(delta)
+            self.flow_version += 1
+            self.settled += len(due)
+            return len(due)
+
+    def add_node(self, node_id, **attrs):
+        with self.lock:
+            self.simulator.add_node(node_id, **attrs)
+
+    def add_channel(self, sender_id, receiver_id, amount):
+        with self.lock:
+            return self.simulator.add_channel(sender_id, receiver_id, amount)
+
+    def route(self, commodities, threshold=.45, limit=.2, aggressiveness=0,
+              strategy="bfs", solver="greedy"):
+        """Route against the committed flow without changing anything yet."""
+        with self.lock:
+            self.settle()
+            sim = self.simulator
+            # Recorded once the payment is committed or rolled back
+            stats = sim.new_stats()
+            with stats.phase("preprocess"):
+                graph = self._preprocess(threshold, limit, aggressiveness)
+            routed = sim._route(graph, commodities, strategy=strategy, solver=solver,
+                                cache_params=(threshold, limit, aggressiveness, strategy, solver),
+                                stats=stats)
+
+            if len(routed) < len(commodities) or any(paths is None for paths in routed):
+                return Payment(False, graph, [], None, "Not all commodities can be satisfied.",
+                               stats=stats, version=self.version())
+
+            # Whatever the residual lost during routing is the payment's flow
+            start = graph.capacity - graph.flow
+            flow = start - np.asarray(sim.last_residual.remaining)
+            return Payment(True, graph, routed, flow, stats=stats, version=self.version())
+
+    def commit(self, payment):
+        """
+        Keep a routed payment's flow and rewards. Returns False, and marks
+        the payment "stale", if the simulator changed since it was routed.
+        """
+        with self.lock:
+            if payment.state != "pending" or not payment.success:
+                return False
+            sim = self.simulator
+            if payment.version != self.version():
+                sim.record_stats(payment.stats)
+                payment.state = "stale"
+                self.rolled_back += 1
+                return False
+            sim.csr.add_flow(payment.flow)
+            self._hold(payment.flow)
+            self.flow_version += 1
+            with payment.stats.phase("ratings"):
+                self._reward(payment.paths)
+            sim.record_stats(payment.stats)
+            payment.state = "committed"
+            self.committed += 1
+            return True
+
+    def rollback(self, payment):
+        with self.lock:
+            if payment.state == "pending":
+                self.simulator.record_stats(payment.stats)
+                payment.state = "rolled back"
+                self.rolled_back += 1
+
+    def transaction(self, commodities, threshold=.45, limit=.2, aggressiveness=0,
+                    strategy="bfs", solver="greedy"):
+        return _Transaction(self, (commodities, threshold, limit, aggressiveness,
+                                   strategy, solver))
+
+    def pay(self, commodities, threshold=.45, limit=.2, aggressiveness=0,
+            strategy="bfs", solver="greedy"):
+        """Route and commit in one step; same return value as multi_commodity_flow_paths."""
+        with self.transaction(commodities, threshold, limit, aggressiveness,
+                              strategy, solver) as payment:
+            if not payment.success:
+                return False, payment.message, []
+            return True, payment.graph, payment.paths
+
+    def pay_many(self, commodity_sets, threshold=.45, limit=.2, aggressiveness=0,
+                 strategy="bfs", solver="greedy"):
+        """
+        Route and commit several payments (one commodity list each) with one
+        preprocessing pass and one solve. A payment that fails gives its
+        partial flow back before the next one is routed, so this behaves
+        like calling pay for each set in order. Returns one pay-style
+        (success, graph or message, paths) tuple per set.
+        """
+        with self.lock:
+            self.settle()
+            sim = self.simulator
+            stats = sim.new_stats()
+            with stats.phase("preprocess"):
+                graph = self._preprocess(threshold, limit, aggressiveness)
+            routed = sim._route(graph, [c for commodities in commodity_sets for c in commodities],
+                                strategy=strategy, solver=solver, stop_on_failure=False,
+                                cache_params=(threshold, limit, aggressiveness, strategy, solver),
+                                stats=stats)
+
+            parts = []
+            for commodities in commodity_sets:
+                parts.append(routed[:len(commodities)])
+                routed = routed[len(commodities):]
+            if any(None in part and any(p is not None for p in part) for part in parts):
+                # Only some commodities of a payment went through, and their
+                # flow is mixed into everyone else's: settle one at a time
+                sim.record_stats(stats)
+                return [self.pay(commodities, threshold, limit, aggressiveness, strategy, solver)
+                        for commodities in commodity_sets]
+
+            flow = graph.capacity - graph.flow - np.asarray(sim.last_residual.remaining)
+            sim.csr.add_flow(flow)
+            self._hold(flow)
+            self.flow_version += 1
+            results = []
+            with stats.phase("ratings"):
+                for part in parts:
+                    if None in part:
+                        results.append((False, "Not all commodities can be satisfied.", []))
+                        self.rolled_back += 1
+                        continue
+                    self._reward(part)
+                    results.append((True, graph, part))
+                    self.committed += 1
+            sim.record_stats(stats)
+            return results
+
+    def reset_flows(self):
+        """Release every committed payment's channel flow."""
+        with self.lock:
+            csr = self.simulator.csr
+            # Through add_flow, so a graph store logs the reset too
+            csr.add_flow(-csr.flow)
+            self._held.clear()
+            self.flow_version += 1
+
+    def get_layout(self):
+        with self.lock:
+            return self.simulator.get_layout()
+
+    def get_graph_data(self, graph=None):
+        with self.lock:
+            return self.simulator.get_graph_data(graph)
+
+    def metrics(self):
+        """Prometheus text of the solver totals, empty unless instrumented."""
+        with self.lock:
+            registry = self.simulator.metrics
+            return registry.prometheus() if registry is not None else ""
+
+    def stats(self):
+        with self.lock:
+            self.settle()
+            csr = self.simulator.csr
+            return {
+                'committed': self.committed,
+                'rolled_back': self.rolled_back,
+                'settled': self.settled,
+                'held': len(self._held),
+                'locked_flow': float(csr.flow.sum()),
+                'saturated_channels': int((csr.flow >= csr.capacity).sum()),
+            }
+
+
+class _Transaction:
+    def __init__(self, shared, args):
+        self.shared = shared
+        self.args = args
+        self.payment = None
+
+    def __enter__(self):
+        self.shared.lock.acquire()
+        try:
+            self.payment = self.shared.route(*self.args)
+        except BaseException:
+            self.shared.lock.release()
+            raise
+        return self.payment
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self.payment.success:
+                self.shared.commit(self.payment)
+            else:
+                self.shared.rollback(self.payment)
+        finally:
+            self.shared.lock.release()
+        return False
@@ -0,0 +1,230 @@
+# backend/simulation/stats.py
+#
+# Per-call instrumentation for the flow solver. A GraphSimulator created
+# with instrument=True hands every routing call a SolveStats, which times
+# the solver phases and counts search work; the finished object is kept as
+# simulator.last_stats and added to simulator.metrics (a StatsRegistry) for
+# a Prometheus-style text export. Without instrumentation every call gets
+# NULL_STATS, whose methods do nothing, so the hot loop pays one no-op
+# method call per event.
+
+import threading
+import time
+
+PHASES = ("preprocess", "residual", "search", "augment", "ratings")
+# Upper bounds of the augmentations-per-commodity histogram
+AUGMENTATION_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _Timer:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timings[self.name] += time.perf_counter() - self.start
+        return False
+
+
+class SolveStats:
+    """
+    Timings and counters of one routing call.
+
+    `timings` holds seconds per phase (see PHASES). `augmentations` has
+    one entry per commodity tried: the number of paths flow was pushed
+    along for it. `expansions` counts the nodes the path searches expanded.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self.expansions = 0
+        self.augmentations = []
+        self.failed_commodities = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.rejections = 0
+
+    def phase(self, name):
+        return _Timer(self.timings, name)
+
+    def commodity(self):
+        self.augmentations.append(0)
+
+    def searched(self, expansions):
+        self.expansions += expansions
+
+    def augmented(self, count=1):
+        self.augmentations[-1] += count
+
+    def failed(self):
+        self.failed_commodities += 1
+
+    def cache_hit(self):
+        self.cache_hits += 1
+
+    def error(self):
+        self.errors += 1
+
+    def rejected(self):
+        self.rejections += 1
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def as_dict(self):
+        return {
+            'timings': dict(self.timings),
+            'total_time': self.total_time,
+            'expansions': self.expansions,
+            'augmentations': list(self.augmentations),
+            'failed_commodities': self.failed_commodities,
+            'cache_hits': self.cache_hits,
+            'errors': self.errors,
+            'rejections': self.rejections,
+        }
+
+    def __repr__(self):
+        return (f"SolveStats(total_time={self.total_time:.6f}, expansions={self.expansions}, "
+                f"commodities={len(self.augmentations)}, failed={self.failed_commodities})")
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _NullStats:
+    """Stand-in for SolveStats when instrumentation is off."""
+
+    enabled = False
+    _timer = _NullTimer()
+
+    def phase(self, name):
+        return self._timer
+
+    def commodity(self):
+        pass
+
+    def searched(self, expansions):
+        pass
+
+    def augmented(self, count=1):
+        pass
+
+    def failed(self):
+        pass
+
+    def cache_hit(self):
+        pass
+
+    def error(self):
+        pass
+
+    def rejected(self):
+        pass
+
+    def as_dict(self):
+        return {}
+
+    def __repr__(self):
+        return "NULL_STATS"
+
+    def __reduce__(self):
+        # Unpickles (e.g. from a batch worker) to the module singleton
+        return "NULL_STATS"
+
+
+NULL_STATS = _NullStats()
+
+
+class StatsRegistry:
+    """Running totals over recorded SolveStats, exported as Prometheus text."""
+
+    def __init__(self, prefix="mcfp"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.solves = 0
+            self.timings = dict.fromkeys(PHASES, 0.0)
+            self.expansions = 0
+            self.commodities = 0
+            self.augmentations = 0
+            self.failed_commodities = 0
+            self.cache_hits = 0
+            self.errors = 0
+            self.rejections = 0
+            # Cumulative counts per AUGMENTATION_BUCKETS bound, +Inf last
+            self.buckets = [0] * (len(AUGMENTATION_BUCKETS) + 1)
+
+    def record(self, stats):
+        if not stats.enabled:
+            return
+        with self._lock:
+            self.solves += 1
+            for name, seconds in stats.timings.items():
+                self.timings[name] = self.timings.get(name, 0.0) + seconds
+            self.expansions += stats.expansions
+            self.commodities += len(stats.augmentations)
+            self.augmentations += sum(stats.augmentations)
+            self.failed_commodities += stats.failed_commodities
+            self.cache_hits += stats.cache_hits
+            self.errors += stats.errors
+            self.rejections += stats.rejections
+            for count in stats.augmentations:
+                for i, bound in enumerate(AUGMENTATION_BUCKETS):
+                    if count <= bound:
+                        self.buckets[i] += 1
+                self.buckets[-1] += 1
+
+    def prometheus(self):
+        """All totals in the Prometheus text exposition format."""
+        p = self.prefix
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{p}_{name}{suffix}{labels} {value}")
+
+        with self._lock:
+            metric("solves_total", "counter", "Routing calls recorded.",
+                   [("", "", self.solves)])
+            metric("phase_seconds_total", "counter", "Time spent in each solver phase.",
+                   [("", f'{{phase="{name}"}}', repr(seconds))
+                    for name, seconds in self.timings.items()])
+            metric("search_expansions_total", "counter", "Nodes expanded by path searches.",
+                   [("", "", self.expansions)])
+            metric("failed_commodities_total", "counter", "Commodities that could not be routed.",
+                   [("", "", self.failed_commodities)])
+            metric("route_cache_hits_total", "counter", "Commodities served from the route cache.",
+                   [("", "", self.cache_hits)])
+            metric("search_errors_total", "counter", "Path searches that raised an exception.",
+                   [("", "", self.errors)])
+            metric("reachability_rejections_total", "counter",
+                   "Commodities turned down because source and sink are disconnected.",
+                   [("", "", self.rejections)])
+            bounds = [str(bound) for bound in AUGMENTATION_BUCKETS] + ["+Inf"]
+            metric("augmentations_per_commodity", "histogram",
+                   "Paths flow was pushed along per commodity.",
+                   [("_bucket", f'{{le="{bound}"}}', count)
+                    for bound, count in zip(bounds, self.buckets)]
+                   + [("_sum", "", self.augmentations), ("_count", "", self.commodities)])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,139 @@
+# backend/simulation/sweep.py
+#
+# Parameter sweeps over threshold / limit / aggressiveness for a fixed set of
+# commodities. The graph is loaded once. Preprocessing is shared between
+# settings: node masks only depend on `limit`, channel masks only on
+# (`threshold`, `aggressiveness`), and every setting draws from the same
+# per-arc random keys, so neighbouring settings differ only where the
+# parameters do. The independent routing runs are fanned out over a process
+# pool whose workers receive the graph once, at start-up.
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .csr_graph import CSRGraph
+from .graph_view import GraphView
+from .preprocess import preprocess_masks
+
+PARAMETERS = ("threshold", "limit", "aggressiveness")
+DEFAULTS = {'threshold': .45, 'limit': .2, 'aggressiveness': 0}
+COLUMNS = list(PARAMETERS) + ["success", "satisfied", "success_rate", "total_hops", "solve_time"]
+
+
+def expand_grid(grid):
+    """
+    Accepts either {'threshold': [...], 'limit': [...], ...} (full product)
+    or an explicit list of parameter dicts. Missing parameters use the
+    multi_commodity_flow_paths defaults.
+    """
+    if isinstance(grid, dict):
+        names = list(grid)
+        combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    else:
+        combos = [dict(combo) for combo in grid]
+
+    settings = []
+    for combo in combos:
+        unknown = set(combo) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters {sorted(unknown)}, expected {PARAMETERS}")
+        settings.append({**DEFAULTS, **combo})
+    return settings
+
+
+class _MaskCache:
+    # Incremental preprocessing: each distinct limit / (threshold,
+    # aggressiveness) is computed once and reused by every setting sharing it
+    def __init__(self, graph, keys):
+        self.graph = graph
+        self.keys = keys
+        self._nodes = {}
+        self._edges = {}
+
+    def masks(self, threshold, limit, aggressiveness):
+        node_mask = self._nodes.get(limit)
+        if node_mask is None:
+            node_mask = self._nodes[limit] = self.graph.rating >= limit
+        edge_mask = self._edges.get((threshold, aggressiveness))
+        if edge_mask is None:
+            _, edge_mask = preprocess_masks(self.graph, threshold, -np.inf, aggressiveness,
+                                            keys=self.keys)
+            self._edges[(threshold, aggressiveness)] = edge_mask
+        return node_mask, edge_mask
+
+
+class _SweepRunner:
+    def __init__(self, graph, commodities, strategy, solver):
+        # Imported here: graph_simulator imports this module
+        from .graph_simulator import GraphSimulator
+        self.simulator = GraphSimulator(backend="csr")
+        self.simulator.csr = graph
+        self.commodities = commodities
+        self.strategy = strategy
+        self.solver = solver
+
+    def __call__(self, job):
+        params, node_mask, edge_mask = job
+        view = GraphView(self.simulator.csr, node_mask, edge_mask)
+        start = time.perf_counter()
+        routed = self.simulator._route(view, self.commodities, strategy=self.strategy,
+                                       solver=self.solver, stop_on_failure=False)
+        elapsed = time.perf_counter() - start
+
+        satisfied = sum(paths is not None for paths in routed)
+        total = len(self.commodities)
+        return {
+            **params,
+            "success": satisfied == total,
+            "satisfied": satisfied,
+            "success_rate": satisfied / total if total else 1.0,
+            "total_hops": sum(len(path) for paths in routed if paths for path in paths),
+            "solve_time": elapsed,
+        }
+
+
+_runner = None
+
+
+def _init_worker(graph, commodities, strategy, solver):
+    global _runner
+    _runner = _SweepRunner(graph, commodities, strategy, solver)
+
+
+def _run_job(job):
+    return _runner(job)
+
+
+def run_sweep(simulator, grid, commodities, processes=None, strategy="bfs", solver="greedy"):
+    """
+    Route `commodities` once per parameter setting in `grid` and return a
+    DataFrame with one row per setting. Runs are independent: each starts
+    from full capacity and no ratings are changed. `processes=1` runs
+    inline; None uses one worker per CPU.
+    """
+    settings = expand_grid(grid)
+    graph = simulator.csr if simulator.csr is not None else CSRGraph.from_networkx(simulator.graph)
+
+    keys = simulator.rng.random(graph.csr()[2].shape[0])
+    cache = _MaskCache(graph, keys)
+    # Order so settings sharing a channel mask are adjacent
+    settings.sort(key=lambda p: (p['threshold'], p['aggressiveness'], p['limit']))
+    jobs = [(params, *cache.masks(**params)) for params in settings]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(jobs) <= 1:
+        # A copy, as each pool worker gets one: a failed search penalises
+        # its source, which must not reach the live graph's ratings
+        runner = _SweepRunner(graph.copy(), commodities, strategy, solver)
+        rows = [runner(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs)), initializer=_init_worker,
+                                 initargs=(graph, commodities, strategy, solver)) as pool:
+            rows = list(pool.map(_run_job, jobs))
+
+    return pd.DataFrame(rows, columns=COLUMNS)
@@ -0,0 +1,41 @@
+# backend/simulation/test_batch.py
+
+import numpy as np
+
+from .batch import SharedGraph, route_batches
+from .graph_view import GraphView
+from .test_graph_simulator import make_simulator
+
+PAYMENT = [{'source': "s", 'sink': "t", 'amount': 8}]
+
+
+def make_view():
+    base = make_simulator("csr").csr
+    view = GraphView(base, np.ones(base.num_nodes, dtype=bool))
+    # The view closes s-a; the base then rewards s, and the view keeps the old rating
+    view.set_capacity(base.find_edge(base.node_index["s"], base.node_index["a"]), 0)
+    base.scale_ratings([base.node_index["s"]], 1.5)
+    return base, view
+
+
+def test_shared_view_publishes_its_own_arrays():
+    base, view = make_view()
+    shared = SharedGraph(view)
+    try:
+        attached, blocks = SharedGraph.attach(shared.spec)
+        assert (attached.capacity == view.capacity).all()
+        assert (attached.rating == view.rating).all()
+        assert not (attached.rating == base.rating).all()
+        for block in blocks:
+            block.close()
+    finally:
+        shared.close()
+
+
+def test_route_batches_in_workers_matches_inline():
+    _, view = make_view()
+    inline = route_batches(view, [PAYMENT, PAYMENT], processes=1)
+    pooled = route_batches(view, [PAYMENT, PAYMENT], processes=2)
+    assert [r['paths'] for r in pooled] == [r['paths'] for r in inline]
+    # Only s-b-t is open in the view
+    assert pooled[0]['paths'] == [[[("s", "b"), ("b", "t")]]]
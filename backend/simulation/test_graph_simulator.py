@@ -0,0 +1,75 @@
+# backend/simulation/test_graph_simulator.py
+
+import pytest
+
+from .graph_simulator import BACKENDS, GraphSimulator
+
+CHANNELS = [("s", "a", 10), ("a", "t", 10), ("s", "b", 10), ("b", "t", 10)]
+
+
+def make_simulator(backend, channels=CHANNELS, rating=0.5):
+    sim = GraphSimulator(backend=backend)
+    for node in sorted({n for u, v, _ in channels for n in (u, v)}):
+        sim.add_node(node, rating=rating)
+    for u, v, capacity in channels:
+        sim.add_channel(u, v, capacity)
+    return sim
+
+
+def ratings_of(data):
+    return {node['id']: node['rating'] for node in data['nodes']}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_result_graph_shows_ratings_as_routed(backend):
+    sim = make_simulator(backend)
+    success, graph, _ = sim.multi_commodity_flow_paths(
+        [{'source': "s", 'sink': "t", 'amount': 1}], threshold=0, limit=0)
+    assert success
+    assert set(ratings_of(sim.get_graph_data(graph)).values()) == {0.5}
+    # The live graph has the rewards
+    assert ratings_of(sim.get_graph_data())["s"] > 0.5
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_result_graph_ignores_later_nodes_and_channels(backend):
+    sim = make_simulator(backend)
+    _, graph, _ = sim.multi_commodity_flow_paths(
+        [{'source': "s", 'sink': "t", 'amount': 1}], threshold=0, limit=0)
+    sim.add_node("new", rating=0.5)
+    sim.add_channel("s", "new", 5)
+    sim.add_channel("a", "b", 5)
+
+    data = sim.get_graph_data(graph)
+    assert "new" not in ratings_of(data)
+    links = {frozenset((link['source'], link['target'])) for link in data['links']}
+    assert frozenset(("a", "b")) not in links
+    assert len(links) == len(CHANNELS)
+
+
+# Unique shortest routes, so both backends must agree path for path
+PARITY_CHANNELS = [("s", "a", 10), ("a", "t", 10), ("s", "b", 6), ("b", "c", 6),
+                   ("c", "t", 6), ("t", "d", 4), ("e", "f", 5)]
+
+
+@pytest.mark.parametrize("commodities", [
+    [{'source': "s", 'sink': "t", 'amount': 8}],
+    # More than the direct route carries: the rest goes the long way
+    [{'source': "s", 'sink': "t", 'amount': 14}],
+    [{'source': "s", 'sink': "d", 'amount': 3}, {'source': "a", 'sink': "c", 'amount': 2}],
+    # Over the total capacity, and across disconnected parts
+    [{'source': "s", 'sink': "t", 'amount': 20}],
+    [{'source': "s", 'sink': "f", 'amount': 1}],
+])
+def test_backends_route_alike(commodities):
+    results = []
+    for backend in BACKENDS:
+        sim = make_simulator(backend, channels=PARITY_CHANNELS)
+        success, _, paths = sim.multi_commodity_flow_paths(commodities, threshold=0, limit=0)
+        results.append((success, [sorted(commodity) for commodity in paths],
+                        ratings_of(sim.get_graph_data())))
+    first, *others = results
+    for success, paths, ratings in others:
+        assert success == first[0]
+        assert paths == first[1]
+        assert ratings == pytest.approx(first[2])
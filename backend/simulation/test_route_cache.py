@@ -0,0 +1,71 @@
+# backend/simulation/test_route_cache.py
+
+import pytest
+
+from .graph_simulator import BACKENDS
+from .route_cache import RouteCache, amount_bucket
+from .test_graph_simulator import make_simulator
+
+PARAMS = (0, 0, 0, "bfs", "greedy")
+PATHS = [[("s", "a"), ("a", "t")]]
+
+
+def test_amount_buckets():
+    assert amount_bucket(3) == amount_bucket(4) != amount_bucket(5)
+    assert amount_bucket(0.5) == amount_bucket(1) == 0
+
+
+def test_hit_only_after_successful_replay():
+    cache = RouteCache()
+    key = cache.key("s", "t", 3, PARAMS)
+    cache.put(key, PATHS)
+    assert cache.lookup(key, lambda paths: paths) == PATHS
+    # A replay that no longer fits drops the entry
+    assert cache.lookup(key, lambda paths: None) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_invalidate_drops_entries_through_node():
+    cache = RouteCache()
+    via_a = cache.key("s", "t", 3, PARAMS)
+    via_b = cache.key("s", "u", 3, PARAMS)
+    cache.put(via_a, PATHS)
+    cache.put(via_b, [[("s", "b"), ("b", "u")]])
+    cache.invalidate(["a"])
+    assert cache.lookup(via_a, lambda paths: paths) is None
+    assert cache.lookup(via_b, lambda paths: paths) is not None
+    assert cache.invalidations == 1
+
+
+def test_clear_starts_new_epoch():
+    cache = RouteCache()
+    old = cache.key("s", "t", 3, PARAMS)
+    cache.put(old, PATHS)
+    cache.clear()
+    assert cache.key("s", "t", 3, PARAMS) != old
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = RouteCache(maxsize=1)
+    first, second = cache.key("s", "t", 3, PARAMS), cache.key("s", "t", 9, PARAMS)
+    cache.put(first, PATHS)
+    cache.put(second, PATHS)
+    assert len(cache) == 1 and cache.evictions == 1
+    assert cache.lookup(first, lambda paths: paths) is None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_simulator_drops_routes_through_changed_channel(backend):
+    sim = make_simulator(backend)
+    payment = [{'source': "s", 'sink': "t", 'amount': 1}]
+    sim.multi_commodity_flow_paths(payment, threshold=0, limit=0)
+    assert len(sim.route_cache) == 1
+    # A channel between two unrelated nodes keeps the entry
+    sim.add_node("x", rating=0.5)
+    sim.add_node("y", rating=0.5)
+    sim.add_channel("x", "y", 5)
+    assert len(sim.route_cache) == 1
+    sim.add_channel("s", "x", 5)
+    assert len(sim.route_cache) == 0
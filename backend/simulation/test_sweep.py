@@ -0,0 +1,31 @@
+# backend/simulation/test_sweep.py
+
+import pytest
+
+from . import graph_simulator
+from .test_graph_simulator import make_simulator
+
+GRID = {'threshold': [0, .1], 'limit': [0]}
+PAYMENT = [{'source': "s", 'sink': "t", 'amount': 12}]
+
+
+@pytest.mark.parametrize("backend", graph_simulator.BACKENDS)
+def test_serial_sweep_routes_every_setting(backend):
+    sim = make_simulator(backend)
+    table = sim.sweep(GRID, PAYMENT, processes=1)
+    assert len(table) == 2
+    assert table['success'].all()
+
+
+def test_serial_sweep_leaves_live_ratings_alone(monkeypatch):
+    sim = make_simulator("csr")
+    before = sim.csr.rating.copy()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("search failed")
+
+    # A failed search penalises the source of the commodity
+    monkeypatch.setattr(graph_simulator, "find_path", broken)
+    table = sim.sweep(GRID, PAYMENT, processes=1)
+    assert not table['success'].any()
+    assert (sim.csr.rating == before).all()
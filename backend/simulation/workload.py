@@ -0,0 +1,134 @@
+# backend/simulation/workload.py
+#
+# Payment streams for load testing the router. A workload is a table of
+# payments (time, source, sink, amount) ordered by arrival time in seconds.
+# It is either generated (Poisson arrivals, a skewed set of hot
+# source/sink pairs, amounts drawn from the graph's channel capacities) or
+# read back from a CSV/Parquet file written earlier, so the same stream
+# can be replayed against different commits or settings.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+WORKLOAD_COLUMNS = ["time", "source", "sink", "amount"]
+
+
+def generate_workload(node_ids, capacities, count, rate=50.0, hot_pairs=20, hot_share=0.8,
+                      skew=1.2, amount_scale=1.0, seed=None):
+    """
+    `count` payments between `node_ids`, arriving as a Poisson process of
+    `rate` payments per second. A share `hot_share` of them go between
+    `hot_pairs` fixed pairs, the k-th most popular chosen with weight
+    1 / k ** skew; the rest pick a random pair. Amounts are resampled from
+    `capacities` (the graph's channel capacities) times `amount_scale`.
+    """
+    node_ids = np.asarray(node_ids, dtype=object)
+    capacities = np.asarray(capacities, dtype=np.float64)
+    n = len(node_ids)
+    if n < 2:
+        raise ValueError("A workload needs at least two nodes")
+    rng = np.random.default_rng(seed)
+
+    def pairs(size):
+        # Sinks are drawn from the other n - 1 nodes, so source != sink
+        source = rng.integers(n, size=size)
+        return source, (source + 1 + rng.integers(n - 1, size=size)) % n
+
+    source, sink = pairs(count)
+    if hot_pairs and hot_share > 0:
+        hot_source, hot_sink = pairs(hot_pairs)
+        weights = 1.0 / np.arange(1, hot_pairs + 1) ** skew
+        pick = rng.choice(hot_pairs, size=count, p=weights / weights.sum())
+        hot = rng.random(count) < hot_share
+        source[hot], sink[hot] = hot_source[pick[hot]], hot_sink[pick[hot]]
+
+    return pd.DataFrame({
+        'time': np.cumsum(rng.exponential(1.0 / rate, size=count)),
+        'source': node_ids[source],
+        'sink': node_ids[sink],
+        'amount': rng.choice(capacities, size=count) * amount_scale,
+    })
+
+
+def save_workload(workload, file_path):
+    if str(file_path).endswith(".parquet"):
+        workload.to_parquet(file_path, index=False)
+    else:
+        workload.to_csv(file_path, index=False)
+
+
+def load_workload(file_path):
+    """Read a workload written by save_workload (or by hand), sorted by time."""
+    if str(file_path).endswith(".parquet"):
+        workload = pd.read_parquet(file_path)
+    else:
+        workload = pd.read_csv(file_path, dtype={'source': str, 'sink': str})
+    missing = [column for column in WORKLOAD_COLUMNS if column not in workload.columns]
+    if missing:
+        raise ValueError(f"Workload {file_path} is missing columns {missing}")
+    return workload[WORKLOAD_COLUMNS].sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def replay(pay, workload, speed=1.0, probe=None, probe_every=100):
+    """
+    Send every payment of `workload` to `pay(commodities)`, which returns
+    True on success. Payments are released at their arrival time divided
+    by `speed` (None sends them back to back). A late payment is sent as
+    soon as the previous one finishes, so `response` includes the time it
+    queued and `latency` only the call itself.
+
+    Every `probe_every` payments `probe()` (if given) is called for a dict
+    of extra measurements, e.g. how much capacity is locked up.
+
+    Returns (results, samples): a DataFrame with one row per payment
+    ('due', 'start', 'latency', 'response', 'success'; times in seconds
+    since the replay started) and the list of probe samples.
+    """
+    count = len(workload)
+    due = np.zeros(count)
+    start = np.zeros(count)
+    latency = np.zeros(count)
+    success = np.zeros(count, dtype=bool)
+    samples = []
+
+    begin = time.perf_counter()
+    rows = zip(workload['time'].tolist(), workload['source'].tolist(),
+               workload['sink'].tolist(), workload['amount'].tolist())
+    for i, (arrival, source, sink, amount) in enumerate(rows):
+        now = time.perf_counter() - begin
+        due[i] = arrival / speed if speed else now
+        if due[i] > now:
+            time.sleep(due[i] - now)
+        start[i] = time.perf_counter() - begin
+        success[i] = bool(pay([{'source': source, 'sink': sink, 'amount': amount}]))
+        latency[i] = time.perf_counter() - begin - start[i]
+
+        if probe is not None and ((i + 1) % probe_every == 0 or i + 1 == count):
+            sample = {'elapsed': start[i] + latency[i], 'payments': i + 1,
+                      'success_rate': float(success[:i + 1].mean())}
+            sample.update(probe())
+            samples.append(sample)
+
+    results = pd.DataFrame({'due': due, 'start': start, 'latency': latency,
+                            'response': start + latency - due, 'success': success})
+    return results, samples
+
+
+def summarize(results):
+    """Throughput, success rate and latency percentiles (ms) of a replay."""
+    if len(results) == 0:
+        return {'payments': 0}
+    wall = float((results['start'] + results['latency']).max() - results['due'].min())
+    summary = {
+        'payments': len(results),
+        'wall_time': wall,
+        'throughput': len(results) / wall if wall > 0 else float("inf"),
+        'success_rate': float(results['success'].mean()),
+    }
+    for column in ("latency", "response"):
+        p50, p95, p99 = np.percentile(results[column], [50, 95, 99]) * 1e3
+        summary.update({f'{column}_p50_ms': p50, f'{column}_p95_ms': p95,
+                        f'{column}_p99_ms': p99})
+    return summary
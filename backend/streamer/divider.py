@@ -1,11 +1,193 @@
 # backend/streamer/divider.py
+#
+# Payroll-style payouts: one payer, many recipients. Shares are computed for
+# all recipients at once with NumPy, and so is every recipient's first path
+# (one breadth-first tree from the payer); only shares wider than that path
+# are cut to fit more edge-disjoint paths. Every part is routed in one
+# multi-commodity call against the GraphSimulator (one preprocessing pass,
+# one residual shared by all parts).
+
+import numpy as np
+
+from ..simulation.csr_graph import CSRGraph
+from ..simulation.graph_simulator import GraphSimulator
+from ..simulation.graph_view import GraphView
+from ..simulation.path_search import CSRResidual, bidirectional_bfs
 
-from ..ln_client.client import LightningClient
 
 class TransactionDivider:
-    def __init__(self):
-        self.client = LightningClient()
+    def __init__(self, simulator=None, sender=None, max_parts=16, threshold=.45, limit=.2,
+                 aggressiveness=0, strategy="bidirectional", solver="greedy"):
+        # Batched routing is only fast on the array backend
+        self.simulator = simulator or GraphSimulator(backend="csr")
+        self.sender = sender
+        self.max_parts = max_parts
+        self.route_params = dict(threshold=threshold, limit=limit, aggressiveness=aggressiveness)
+        self.strategy = strategy
+        self.solver = solver
+
+    def disjoint_paths(self, net, s, t, need, closed_edges=(), limit=None):
+        """
+        Bottleneck capacities of edge-disjoint paths from s to t in residual
+        `net`, shortest first, until they add up to `need` or `limit` paths
+        (default `max_parts`) were found. `closed_edges` (e.g. a path
+        already counted) are closed first. Every closed channel is reopened
+        before returning.
+        """
+        limit = self.max_parts if limit is None else limit
+        closed = {}
+        for edge in closed_edges:
+            closed.setdefault(edge, net.remaining[edge])
+            net.remaining[edge] = 0
+        bottlenecks = []
+        while len(bottlenecks) < limit and sum(bottlenecks) < need:
+            path, _ = bidirectional_bfs(net, s, t)
+            if path is None:
+                break
+            edges = [edge for _, _, edge in path]
+            bottlenecks.append(min(net.remaining[edge] for edge in edges))
+            for edge in edges:
+                closed.setdefault(edge, net.remaining[edge])
+                net.remaining[edge] = 0
+        for edge, remaining in closed.items():
+            net.remaining[edge] = remaining
+        return bottlenecks
+
+    @staticmethod
+    def path_tree(graph, s):
+        """
+        Breadth-first tree from node index `s` over channels with spare
+        capacity, one vectorized step per hop level. Returns per node the
+        tree parent (-1 if unreached), the channel to it, and the
+        bottleneck of the tree path from `s` (0 if unreached).
+        """
+        indptr, indices, arc_edge = graph.csr()
+        n = len(indptr) - 1
+        spare = graph.capacity - graph.flow
+        parent = np.full(n, -1, dtype=np.int64)
+        parent_edge = np.full(n, -1, dtype=np.int64)
+        width = np.zeros(n)
+        parent[s], width[s] = s, np.inf
+        frontier = np.array([s], dtype=np.int64)
+        while len(frontier):
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            # Every arc leaving the frontier, as positions in `indices`
+            arcs = np.arange(counts.sum()) + np.repeat(starts - np.cumsum(counts) + counts, counts)
+            tails = np.repeat(frontier, counts)
+            heads, edges = indices[arcs], arc_edge[arcs]
+            usable = (parent[heads] < 0) & (spare[edges] > 0)
+            # First arc reaching each new node wins, as in a queue-based BFS
+            heads, first = np.unique(heads[usable], return_index=True)
+            tails, edges = tails[usable][first], edges[usable][first]
+            parent[heads], parent_edge[heads] = tails, edges
+            width[heads] = np.minimum(width[tails], spare[edges])
+            frontier = heads
+        width[s] = 0.0
+        return parent, parent_edge, width
+
+    def split(self, graph, source, recipients, total_amount):
+        """
+        Split `total_amount`. `recipients` is a list of node ids (equal
+        shares) or a {node_id: weight} dict; recipients with zero weight are
+        dropped. Each share is cut into parts sized by the bottlenecks of
+        edge-disjoint paths from `source` (a single path cannot carry more
+        than its narrowest channel), using as few paths as cover the share.
+        Returns (ids, shares, parts, part_owner, part_amount).
+
+        One breadth-first tree from `source` gives every recipient its
+        reachability and first path at once; only recipients whose share
+        that path cannot carry are searched for more paths.
+        """
+        if isinstance(recipients, dict):
+            ids = list(recipients)
+            weights = np.asarray(list(recipients.values()), dtype=np.float64)
+        else:
+            ids = list(recipients)
+            weights = np.ones(len(ids))
+        if (weights < 0).any() or not np.isfinite(weights).all():
+            raise ValueError("Recipient weights must be finite and non-negative")
+        keep = weights > 0
+        if not keep.any():
+            raise ValueError("No recipient with a positive weight to pay")
+        ids = [r for r, k in zip(ids, keep) if k]
+        weights = weights[keep]
+        shares = total_amount * weights / weights.sum()
+
+        index = graph.node_index
+        s = index.get(source)
+        rec = np.array([index.get(r, -1) for r in ids], dtype=np.int64)
+        width = np.zeros(len(ids))
+        if s is not None:
+            parent, parent_edge, tree_width = self.path_tree(graph, s)
+            width[rec >= 0] = tree_width[rec[rec >= 0]]
+
+        # Unreachable recipients keep one part, so the failure is reported
+        # once; so do those the first path already covers
+        parts = np.ones(len(ids), dtype=np.int64)
+        more = np.flatnonzero((width > 0) & (width < shares))
+        extra = {}
+        if len(more):
+            net = CSRResidual(graph)
+            for i in more.tolist():
+                t = int(rec[i])
+                first = []
+                node = t
+                while node != s:
+                    first.append(int(parent_edge[node]))
+                    node = int(parent[node])
+                widths = np.asarray([width[i]] + self.disjoint_paths(
+                    net, s, t, shares[i] - width[i], first, self.max_parts - 1))
+                covered = np.cumsum(widths)
+                n = min(int(np.searchsorted(covered, shares[i])) + 1, len(widths))
+                parts[i] = n
+                # Parts in proportion to their path's bottleneck
+                extra[i] = shares[i] * widths[:n] / covered[n - 1]
+
+        part_owner = np.repeat(np.arange(len(ids)), parts)
+        part_amount = np.repeat(shares, parts)
+        offsets = np.cumsum(parts) - parts
+        for i, amounts in extra.items():
+            part_amount[offsets[i]:offsets[i] + parts[i]] = amounts
+        return ids, shares, parts, part_owner, part_amount
+
+    def divide_payment(self, recipients, total_amount, source=None):
+        """
+        Pay `total_amount` from `source` (default: the divider's sender),
+        split over `recipients`. Parts are routed together; a part that
+        cannot be routed gives its flow back and the others still go
+        through. Returns (success, payouts) with one dict per recipient:
+        {'recipient', 'amount', 'paid', 'parts', 'paths'}.
+        """
+        source = source if source is not None else self.sender
+        if source is None:
+            raise ValueError("No sender given for the payment")
+
+        sim = self.simulator
+        graph = sim.mcfp_preprocess(**self.route_params)
+        if sim.csr is None:
+            # networkx backend: route over an array copy of the preprocessed graph
+            base = CSRGraph.from_networkx(graph)
+            graph = GraphView(base, np.ones(base.num_nodes, dtype=bool))
+            sim = GraphSimulator(backend="csr")
+            sim.csr = base
+
+        ids, shares, parts, part_owner, part_amount = self.split(
+            graph, source, recipients, total_amount)
+        commodities = [{'source': source, 'sink': ids[i], 'amount': a}
+                       for i, a in zip(part_owner.tolist(), part_amount.tolist())]
+
+        routed = sim._route(graph, commodities, strategy=self.strategy, solver=self.solver,
+                            stop_on_failure=False)
+
+        ok = np.array([paths is not None for paths in routed], dtype=bool)
+        paid = np.bincount(part_owner, weights=part_amount * ok, minlength=len(ids))
+
+        payouts = [{'recipient': r, 'amount': float(a), 'paid': float(p), 'parts': int(n),
+                    'paths': []} for r, a, p, n in zip(ids, shares, paid, parts)]
+        for owner, paths in zip(part_owner.tolist(), routed):
+            if paths is not None:
+                payouts[owner]['paths'].extend(paths)
+                self.simulator.update_graph_with_paths(paths)
 
-    def divide_payment(self, recipients, total_amount):
-        # Logic for dividing payments
-        pass
+        return bool(ok.all()), payouts
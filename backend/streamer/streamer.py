@@ -1,11 +1,213 @@
 # backend/streamer/streamer.py
+#
+# Pay-per-second streams, scheduled on a shared tick. Every stream due in a
+# tick becomes one commodity, and the whole tick is routed with a single
+# batched call against the GraphSimulator (one preprocessing pass, one
+# residual), so thousands of streams cost one routing call per tick instead
+# of one each.
+#
+# Backpressure: routing runs in a worker thread. If it takes longer than a
+# tick, the next tick starts late and every stream pays for all the ticks
+# it missed in one go (its payments are coalesced, not dropped). While the
+# scheduler lags by more than `max_lag` seconds, new streams wait before
+# they are admitted.
+#
+# A tick whose routing raises fails the streams due in it (their
+# stream_payment calls raise) instead of stopping the scheduler; the other
+# streams carry on.
+
+import asyncio
+import math
+import time
+
+from ..simulation.graph_simulator import SOLVERS, GraphSimulator
+from ..simulation.path_search import STRATEGIES
+
+
+class _Stream:
+    __slots__ = ("source", "recipient", "amount_per_tick", "ticks_left", "paid",
+                 "paid_ticks", "failed_ticks", "done")
+
+    def __init__(self, source, recipient, amount_per_tick, ticks, done):
+        self.source = source
+        self.recipient = recipient
+        self.amount_per_tick = amount_per_tick
+        self.ticks_left = ticks
+        self.paid = 0
+        self.paid_ticks = 0
+        self.failed_ticks = 0
+        self.done = done
+
+    def summary(self):
+        return {
+            'recipient': self.recipient,
+            'paid': self.paid,
+            'paid_ticks': self.paid_ticks,
+            'failed_ticks': self.failed_ticks,
+        }
 
-from ..ln_client.client import LightningClient
 
 class TransactionStreamer:
-    def __init__(self):
-        self.client = LightningClient()
+    def __init__(self, simulator=None, sender=None, tick=1.0, max_lag=5.0,
+                 threshold=.45, limit=.2, aggressiveness=0, strategy="bfs", solver="greedy"):
+        self.simulator = simulator or GraphSimulator()
+        # Default payer for stream_payment
+        self.sender = sender
+        self.tick = tick
+        self.max_lag = max_lag
+        self.route_params = dict(threshold=threshold, limit=limit, aggressiveness=aggressiveness)
+        self.strategy = strategy
+        self.solver = solver
+
+        self._streams = []
+        self._scheduler = None
+        self._admit = None
+
+        self.ticks = 0
+        self.payments = 0
+        self.failed_payments = 0
+        self.coalesced_ticks = 0
+        self.amount_routed = 0
+        self.route_time = 0.0
+        self.max_tick_lag = 0.0
+        self._total_lag = 0.0
+        self._started = None
+        self._busy = 0.0
+
+    async def stream_payment(self, recipient, amount_per_second, duration, source=None):
+        """
+        Pay `recipient` `amount_per_second` for `duration` seconds, one
+        payment per tick. Returns a summary once the stream has finished.
+        """
+        source = source if source is not None else self.sender
+        if source is None:
+            raise ValueError("No sender given for the stream")
+        # Checked here, so a bad setting fails the caller rather than a tick
+        if self.solver not in SOLVERS:
+            raise ValueError(f"Unknown solver {self.solver!r}, expected one of {SOLVERS}")
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown path search strategy {self.strategy!r}, "
+                             f"expected one of {STRATEGIES}")
+        ticks = max(1, math.ceil(duration / self.tick))
+
+        loop = asyncio.get_running_loop()
+        if self._admit is None:
+            self._admit = asyncio.Event()
+            self._admit.set()
+        # Backpressure: hold new streams back while routing is behind
+        await self._admit.wait()
+
+        stream = _Stream(source, recipient, amount_per_second * self.tick, ticks,
+                         loop.create_future())
+        self._streams.append(stream)
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.create_task(self._run())
+        return await stream.done
+
+    async def _run(self):
+        if self._started is None:
+            self._started = time.perf_counter()
+        try:
+            await self._tick_loop()
+        finally:
+            # Never leave callers or new streams waiting on a scheduler that
+            # stopped (cancelled, or failed outside a tick)
+            for stream in self._streams:
+                if not stream.done.done():
+                    stream.done.cancel()
+            self._streams = []
+            self._busy += time.perf_counter() - self._started
+            self._started = None
+            self._admit.set()
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        # Streams registered during this iteration of the loop join the first tick
+        await asyncio.sleep(0)
+        next_tick = loop.time()
+
+        while self._streams:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag = max(0.0, loop.time() - next_tick)
+            self.ticks += 1
+            self._total_lag += lag
+            self.max_tick_lag = max(self.max_tick_lag, lag)
+
+            # Ticks missed while routing was behind are paid in this one
+            elapsed = 1 + int(lag // self.tick)
+            self.coalesced_ticks += elapsed - 1
+            if lag > self.max_lag:
+                self._admit.clear()
+            else:
+                self._admit.set()
+
+            due = self._streams
+            self._streams = []
+            counts = [min(elapsed, stream.ticks_left) for stream in due]
+            commodities = [
+                {'source': stream.source, 'sink': stream.recipient,
+                 'amount': stream.amount_per_tick * n}
+                for stream, n in zip(due, counts)]
+
+            start = time.perf_counter()
+            try:
+                routed = await loop.run_in_executor(None, self._route_tick, commodities)
+            except Exception as error:
+                # Fail this tick's streams; later streams get a fresh start
+                for stream in due:
+                    if not stream.done.done():
+                        stream.done.set_exception(error)
+                next_tick += elapsed * self.tick
+                continue
+            finally:
+                self.route_time += time.perf_counter() - start
+
+            for stream, n, commodity, paths in zip(due, counts, commodities, routed):
+                stream.ticks_left -= n
+                if paths is None:
+                    stream.failed_ticks += n
+                    self.failed_payments += 1
+                else:
+                    stream.paid += commodity['amount']
+                    stream.paid_ticks += n
+                    self.payments += 1
+                    self.amount_routed += commodity['amount']
+                if stream.ticks_left > 0:
+                    self._streams.append(stream)
+                elif not stream.done.done():
+                    stream.done.set_result(stream.summary())
+
+            next_tick += elapsed * self.tick
+
+    def _route_tick(self, commodities):
+        # One preprocessing pass and one residual for the whole tick;
+        # commodities that cannot be satisfied give their flow back and the
+        # rest carry on
+        sim = self.simulator
+        graph = sim.mcfp_preprocess(**self.route_params)
+        routed = sim._route(graph, commodities, strategy=self.strategy, solver=self.solver,
+                            stop_on_failure=False)
+        for paths in routed:
+            if paths is not None:
+                sim.update_graph_with_paths(paths)
+        return routed
 
-    def stream_payment(self, recipient, amount_per_second, duration):
-        # Logic for streaming payments
-        pass
+    def stats(self):
+        """Throughput (payments per second of scheduler run time) and tick lag."""
+        busy = self._busy
+        if self._started is not None:
+            busy += time.perf_counter() - self._started
+        return {
+            'active_streams': len(self._streams),
+            'ticks': self.ticks,
+            'payments': self.payments,
+            'failed_payments': self.failed_payments,
+            'coalesced_ticks': self.coalesced_ticks,
+            'amount_routed': self.amount_routed,
+            'throughput': self.payments / busy if busy else 0.0,
+            'avg_tick_lag': self._total_lag / self.ticks if self.ticks else 0.0,
+            'max_tick_lag': self.max_tick_lag,
+            'route_time': self.route_time,
+        }
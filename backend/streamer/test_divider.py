@@ -0,0 +1,59 @@
+# backend/streamer/test_divider.py
+
+import numpy as np
+import pytest
+
+from ..simulation.graph_simulator import GraphSimulator
+from .divider import TransactionDivider
+
+# Two disjoint s->t paths of width 4 and 6, and a wide channel to r
+CHANNELS = [("s", "a", 4), ("a", "t", 4), ("s", "b", 6), ("b", "t", 6), ("s", "r", 50)]
+
+
+def make_divider(channels=CHANNELS):
+    sim = GraphSimulator(backend="csr")
+    for node in sorted({n for u, v, _ in channels for n in (u, v)} | {"alone"}):
+        sim.add_node(node)
+    for u, v, capacity in channels:
+        sim.add_channel(u, v, capacity)
+    divider = TransactionDivider(sim, sender="s", threshold=0, limit=0)
+    return divider, sim.mcfp_preprocess(threshold=0, limit=0)
+
+
+@pytest.mark.parametrize("recipients", [[], {"t": 0}, {"t": 1, "r": -1}, {"t": float("nan")}])
+def test_split_rejects_bad_weights(recipients):
+    divider, graph = make_divider()
+    with pytest.raises(ValueError):
+        divider.split(graph, "s", recipients, 10)
+
+
+def test_split_uses_one_part_when_first_path_covers():
+    divider, graph = make_divider()
+    ids, shares, parts, _, part_amount = divider.split(graph, "s", ["r", "t"], 6)
+    assert ids == ["r", "t"]
+    assert parts.tolist() == [1, 1]
+    assert part_amount.tolist() == [3, 3]
+
+
+def test_split_stops_once_paths_cover_share():
+    divider, graph = make_divider()
+    _, _, parts, part_owner, part_amount = divider.split(graph, "s", ["t"], 8)
+    assert parts.tolist() == [2]
+    assert part_owner.tolist() == [0, 0]
+    # In proportion to the bottlenecks of the two paths
+    assert sorted(part_amount.tolist()) == pytest.approx([3.2, 4.8])
+
+
+def test_split_keeps_one_part_for_unreachable():
+    divider, graph = make_divider()
+    ids, _, parts, _, _ = divider.split(graph, "s", {"alone": 1, "missing": 1, "t": 2}, 40)
+    assert ids == ["alone", "missing", "t"]
+    assert parts.tolist() == [1, 1, 2]
+
+
+def test_divide_payment_pays_every_part():
+    divider, _ = make_divider()
+    success, payouts = divider.divide_payment(["t", "r"], 16)
+    assert success
+    assert [p['paid'] for p in payouts] == [8, 8]
+    assert np.isclose(sum(p['amount'] for p in payouts), 16)
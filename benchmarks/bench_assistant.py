@@ -0,0 +1,76 @@
+# benchmarks/bench_assistant.py
+#
+# Reply latency of the Assistant page's chat loop, offline: both variants
+# talk to the FakeOpenAI stand-in (backend/assistant/fake_backend.py), whose
+# runs take a fixed time to finish.
+#   fixed     - the page's old loop: sleep one second between run polls,
+#               then list the thread's whole history
+#   adaptive  - AssistantChat: backoff polling from 50 ms up to 0.5 s, then
+#               only the messages after the last one seen
+# Each setting holds one conversation of `--turns` messages, so the old
+# loop's history listing grows as it goes.
+#
+# Run from the repository root:  python benchmarks/bench_assistant.py --turns 5
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from backend.assistant.client import AssistantChat
+from backend.assistant.fake_backend import FakeOpenAI
+
+LATENCIES = (0.1, 0.3, 0.8, 1.5, 3.0)
+
+
+def fixed_turn(client, thread_id, assistant_id, text):
+    # The loop Assistant.py used to run
+    threads = client.beta.threads
+    threads.messages.create(thread_id=thread_id, role="user", content=text)
+    run = threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
+    while run.status not in ['completed', 'failed']:
+        time.sleep(1)
+        run = threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+    messages = threads.messages.list(thread_id=thread_id)
+    return [msg.content for msg in messages.data if msg.role == 'assistant']
+
+
+def measure(latency, turns, adaptive):
+    client = FakeOpenAI(latency=latency, seed=1)
+    chat = AssistantChat(client, "asst_offline")
+    thread_id = client.beta.threads.create().id
+    chat.thread_id = thread_id
+    start = time.perf_counter()
+    for turn in range(turns):
+        text = f"question {turn}"
+        if adaptive:
+            chat.send(text)
+        else:
+            fixed_turn(client, thread_id, "asst_offline", text)
+    elapsed = time.perf_counter() - start
+    calls = sum(count for name, count in client.calls.items() if name != "threads.create")
+    return elapsed / turns, calls / turns, client.listed / turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assistant reply latency against the offline stand-in.")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency", type=float, action="append",
+                        help="run duration(s) to test, seconds (repeatable)")
+    args = parser.parse_args()
+
+    print(f"{'run time':>9} | {'fixed 1s polling':^29} | {'adaptive backoff':^29}")
+    print(f"{'':>9} | {'reply':>9} {'calls':>8} {'listed':>10} | {'reply':>9} {'calls':>8} {'listed':>10}")
+    for latency in args.latency or LATENCIES:
+        fixed = measure(latency, args.turns, adaptive=False)
+        adaptive = measure(latency, args.turns, adaptive=True)
+        print(f"{latency:8.1f}s | " + " | ".join(
+            f"{reply:8.2f}s {calls:8.1f} {listed:10.1f}" for reply, calls, listed in (fixed, adaptive)))
+    print("\nper turn: reply = wall time until the reply is in hand, calls = API requests, "
+          "listed = messages transferred")
+
+
+if __name__ == "__main__":
+    main()
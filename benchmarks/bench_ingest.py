@@ -0,0 +1,61 @@
+# benchmarks/bench_ingest.py
+#
+# Load-time comparison for import_graph_from_csv on the fixture CSVs:
+#   legacy  - the original df.iterrows() importer
+#   bulk    - whole-column import, no snapshot
+#   cached  - whole-column import served from the sidecar snapshot
+#
+# Run from the repository root:  python benchmarks/bench_ingest.py
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from backend.simulation.graph_simulator import GraphSimulator
+
+FIXTURES = ["lightning_like_graph_sm.csv", "lightning_like_graph_md.csv", "lightning_like_graph_lg.csv"]
+
+
+def legacy_import(simulator, file_path):
+    df = pd.read_csv(file_path)
+    for _, row in df.iterrows():
+        simulator.graph.add_node(row['source'], rating=row.get('rating', random.uniform(0, 1)))
+        simulator.graph.add_node(row['target'], rating=row.get('rating', random.uniform(0, 1)))
+        simulator.graph.add_edge(row['source'], row['target'], weight=row.get('capacity', 1))
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(repeat=5):
+    print(f"{'file':32} {'backend':9} {'legacy':>10} {'bulk':>10} {'cached':>10}")
+    for name in FIXTURES:
+        path = str(ROOT / name)
+        # Warm the snapshot once so "cached" measures the hit path
+        GraphSimulator().import_graph_from_csv(path)
+
+        for backend in ("networkx", "csr"):
+            # The legacy importer only ever built networkx graphs
+            legacy = "-"
+            if backend == "networkx":
+                legacy = f"{best_of(lambda: legacy_import(GraphSimulator(), path), repeat) * 1e3:.1f}ms"
+            bulk = best_of(lambda: GraphSimulator(backend=backend).import_graph_from_csv(
+                path, use_cache=False), repeat)
+            cached = best_of(lambda: GraphSimulator(backend=backend).import_graph_from_csv(
+                path), repeat)
+            print(f"{name:32} {backend:9} {legacy:>10} {bulk * 1e3:8.1f}ms {cached * 1e3:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_ln_client.py
+#
+# End-to-end payment throughput through LightningClient against the
+# in-process FakeNode, for a few pool / pipeline / batch settings. The
+# first row (one connection, one call in flight, no batching) is what a
+# naive one-payment-per-request client gets.
+#
+# Run from the repository root:  python benchmarks/bench_ln_client.py
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from backend.ln_client.client import LightningClient
+from backend.ln_client.fake_node import FakeNode
+
+SETTINGS = [
+    # pool, pipeline depth, max batch
+    (1, 1, 1),
+    (4, 1, 1),
+    (4, 4, 1),
+    (1, 1, 64),
+    (4, 4, 64),
+    (8, 8, 256),
+]
+
+
+async def run(pool, depth, batch, count, latency, failure_rate):
+    node = FakeNode(latency=latency, per_payment=1e-5, failure_rate=failure_rate, seed=1)
+    async with LightningClient(node, pool_size=pool, pipeline_depth=depth,
+                               max_batch=batch) as client:
+        start = time.perf_counter()
+        results = await client.pay_many([("Node_0", "Node_1", 1)] * count)
+        elapsed = time.perf_counter() - start
+        stats = client.stats()
+    failed = sum(result['status'] != "SUCCESS" for result in results)
+    return elapsed, stats['batches'], failed
+
+
+def main(latency=0.02, failure_rate=0.05):
+    print(f"latency {latency * 1000:.0f} ms, failure rate {failure_rate:.0%}")
+    print(f"{'pool':>4} {'depth':>5} {'batch':>5} {'payments':>8} {'calls':>6} "
+          f"{'failed':>6} {'time':>8} {'pay/s':>9}")
+    for pool, depth, batch in SETTINGS:
+        # Keep the slow settings short
+        count = 200 if pool * depth * batch < 64 else 20000
+        elapsed, calls, failed = asyncio.run(run(pool, depth, batch, count, latency, failure_rate))
+        print(f"{pool:>4} {depth:>5} {batch:>5} {count:>8} {calls:>6} {failed:>6} "
+              f"{elapsed:>7.2f}s {count / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
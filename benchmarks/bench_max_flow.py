@@ -0,0 +1,70 @@
+# benchmarks/bench_max_flow.py
+#
+# Greedy augmenting loop vs Dinic behind multi_commodity_flow_paths on the
+# md/lg fixtures. Each request is one commodity between random nodes with a
+# demand drawn from a fixed seed; every run starts from a freshly imported
+# graph so ratings are identical across solvers.
+#
+# Run from the repository root:  python benchmarks/bench_max_flow.py
+
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from backend.simulation.graph_simulator import GraphSimulator
+
+FIXTURES = ["lightning_like_graph_md.csv", "lightning_like_graph_lg.csv"]
+AMOUNTS = [0.5, 2, 5, 10, 20]
+
+
+def make_requests(node_count, count, seed, per_request=1):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        commodities = []
+        for _ in range(per_request):
+            source, sink = rng.sample(range(node_count), 2)
+            commodities.append({'source': f"Node_{source}", 'sink': f"Node_{sink}",
+                                'amount': rng.choice(AMOUNTS)})
+        requests.append(commodities)
+    return requests
+
+
+def run(path, backend, solver, requests):
+    simulator = GraphSimulator(backend=backend)
+    simulator.import_graph_from_csv(path)
+    successes = augmentations = 0
+    start = time.perf_counter()
+    for commodities in requests:
+        success, _, _ = simulator.multi_commodity_flow_paths(commodities, solver=solver)
+        successes += success
+        if solver == "dinic":
+            augmentations += sum(flow.augmentations for flow in simulator.last_flows)
+        else:
+            augmentations += sum(1 for query in simulator.last_queries if query.path)
+    return successes, augmentations, time.perf_counter() - start
+
+
+def main(count=200, seed=7):
+    print(f"{'file':32} {'backend':9} {'k':>2} {'solver':7} {'success':>8} {'augment':>8} {'time':>9}")
+    for name in FIXTURES:
+        path = str(ROOT / name)
+        probe = GraphSimulator(backend="csr")
+        probe.import_graph_from_csv(path)
+
+        # k = commodities per request; later commodities see what earlier
+        # ones left behind
+        for per_request in (1, 4):
+            requests = make_requests(probe.csr.num_nodes, count, seed, per_request)
+            for backend in ("networkx", "csr"):
+                for solver in ("greedy", "dinic"):
+                    successes, augmentations, elapsed = run(path, backend, solver, requests)
+                    print(f"{name:32} {backend:9} {per_request:2d} {solver:7} {successes:5d}/{count:<3d}"
+                          f"{augmentations:8d} {elapsed * 1e3:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
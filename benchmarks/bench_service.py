@@ -0,0 +1,151 @@
+# benchmarks/bench_service.py
+#
+# Latency of the routing service (backend/service) against routing inline,
+# the way the Streamlit pages used to. `--sessions` threads stand in for
+# concurrent users; each sends its share of one workload (see
+# backend/simulation/workload.py) one payment at a time:
+#   inline   - SharedSimulator.pay in the session thread, every session
+#              queueing on the simulator lock and preprocessing alone
+#   service  - RoutingClient.pay against a service in a separate process,
+#              which micro-batches concurrent payments into one solve
+# Both start from the same CSV and seed. With --op route, sessions send
+# read-only previews instead (SharedSimulator.route / RoutingClient.route),
+# repeating the amount for each pair, and the service coalesces identical
+# in-flight queries.
+#
+# Run from the repository root:
+#   python benchmarks/bench_service.py lightning_like_graph_lg.csv --sessions 16 --count 2000
+#   python benchmarks/bench_service.py lightning_like_graph_lg.csv --op route --hot-share 0.9
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from backend.service.client import RoutingClient
+from backend.simulation.shared import SharedSimulator
+from backend.simulation.workload import generate_workload
+
+
+def run_sessions(send, commodities, sessions):
+    # Session k sends payments k, k + sessions, ... back to back
+    latency = np.zeros(len(commodities))
+    success = np.zeros(len(commodities), dtype=bool)
+
+    def session(k):
+        for i in range(k, len(commodities), sessions):
+            start = time.perf_counter()
+            success[i] = send([commodities[i]])
+            latency[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=session, args=(k,)) for k in range(sessions)]
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - begin
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99]) * 1e3
+    return {'throughput': len(commodities) / wall, 'success_rate': float(success.mean()),
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+
+def start_service(graph, address, max_batch, linger):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.service.server", graph, "--listen", address,
+         "--max-batch", str(max_batch), "--linger", str(linger), "--no-store"],
+        cwd=ROOT, stderr=subprocess.DEVNULL)
+    client = RoutingClient(address, graph=graph)
+    for _ in range(100):
+        if process.poll() is not None:
+            break
+        try:
+            # Make sure it is our service answering, not one left running
+            if graph in client.health()['graphs']:
+                return process
+            break
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"routing service did not come up on {address}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing service vs inline routing latency.")
+    parser.add_argument("graph", help="channel CSV to route on")
+    parser.add_argument("--op", choices=("pay", "route"), default="pay")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--hot-pairs", type=int, default=20)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--amount-scale", type=float, default=0.1)
+    parser.add_argument("--address", help="where to start the service (host:port or "
+                                          "unix:/path); a private Unix socket by default")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--linger", type=float, default=0.002)
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+    graph = str(Path(args.graph).resolve())
+
+    inline = SharedSimulator.from_csv(graph)
+    csr = inline.simulator.csr
+    workload = generate_workload(csr.node_ids, csr.capacity, args.count,
+                                 hot_pairs=args.hot_pairs, hot_share=args.hot_share,
+                                 amount_scale=args.amount_scale, seed=args.seed)
+    commodities = [{'source': source, 'sink': sink, 'amount': amount}
+                   for source, sink, amount in zip(workload['source'].tolist(),
+                                                   workload['sink'].tolist(),
+                                                   workload['amount'].tolist())]
+    if args.op == "route":
+        # Previews repeat (a page rerun asks the same question again), so
+        # every pair keeps the amount it was first asked about
+        first = {}
+        for c in commodities:
+            c['amount'] = first.setdefault((c['source'], c['sink']), c['amount'])
+    print(f"{len(commodities)} {args.op} requests from {args.sessions} sessions on {args.graph}")
+
+    if args.op == "pay":
+        def send_inline(c):
+            return inline.pay(c)[0]
+    else:
+        def send_inline(c):
+            return inline.route(c).success
+
+    results = {'inline': run_sessions(send_inline, commodities, args.sessions)}
+
+    address = args.address or f"unix:{tempfile.mkdtemp()}/routing.sock"
+    process = start_service(graph, address, args.max_batch, args.linger)
+    try:
+        client = RoutingClient(address, graph=graph)
+        results['service'] = run_sessions(
+            lambda c: getattr(client, args.op)(c)[0], commodities, args.sessions)
+        service_stats = client.stats()['service']
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"\n{'':8} {'req/s':>9} {'success':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, row in results.items():
+        print(f"{name:8} {row['throughput']:9.1f} {row['success_rate']:8.1%} "
+              f"{row['p50_ms']:7.2f}ms {row['p95_ms']:7.2f}ms {row['p99_ms']:7.2f}ms")
+    print(f"\nservice: {service_stats['batches']} batches, avg {service_stats['avg_batch']:.1f} "
+          f"payments (largest {service_stats['largest_batch']}), "
+          f"{service_stats['coalesced']} coalesced requests")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'args': vars(args), 'results': results,
+                                                 'service': service_stats}, indent=2))
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
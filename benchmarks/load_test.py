@@ -0,0 +1,123 @@
+# benchmarks/load_test.py
+#
+# Sustained-traffic load test for the router. Payments from a generated or
+# replayed workload (see backend/simulation/workload.py) are pushed one at
+# a time through a persistent simulator:
+#   shared    - SharedSimulator.pay, the Streamlit pages' path: routes like
+#               multi_commodity_flow_paths and commits each payment's flow,
+#               so channels deplete as the run goes on
+#   stateless - GraphSimulator.multi_commodity_flow_paths, routing every
+#               payment from full capacity (ratings still carry over)
+# Reports throughput, p50/p95/p99 latency, success rate and, in shared
+# mode, how much capacity is locked up over time.
+#
+# Run from the repository root:
+#   python benchmarks/load_test.py lightning_like_graph_lg.csv --count 2000 --rate 100
+#   python benchmarks/load_test.py lightning_like_graph_lg.csv --save-workload w.csv --count 5000
+#   python benchmarks/load_test.py lightning_like_graph_lg.csv --workload w.csv --speed 0
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from backend.simulation.graph_simulator import GraphSimulator
+from backend.simulation.shared import SharedSimulator
+from backend.simulation.workload import (generate_workload, load_workload, replay, save_workload,
+                                         summarize)
+
+
+def graph_columns(simulator):
+    # Node ids and channel capacities, whatever the backend
+    if simulator.csr is not None:
+        return simulator.csr.node_ids, simulator.csr.capacity
+    graph = simulator.graph
+    return list(graph.nodes), [w for _, _, w in graph.edges(data='weight', default=1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a payment stream against the router.")
+    parser.add_argument("graph", help="channel CSV to load")
+    parser.add_argument("--workload", help="replay this workload file instead of generating one")
+    parser.add_argument("--save-workload", help="write the generated workload here and exit")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=50.0, help="arrivals per second")
+    parser.add_argument("--hot-pairs", type=int, default=20)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--amount-scale", type=float, default=1.0)
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="time compression of the arrivals; 0 sends back to back")
+    parser.add_argument("--mode", choices=("shared", "stateless"), default="shared")
+    parser.add_argument("--backend", choices=("csr", "networkx"), default="csr")
+    parser.add_argument("--strategy", default="bfs")
+    parser.add_argument("--solver", default="greedy")
+    parser.add_argument("--probe-every", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--output", help="write the summary and samples as JSON")
+    args = parser.parse_args()
+    if args.mode == "shared" and args.backend != "csr":
+        parser.error("shared mode needs the csr backend")
+
+    simulator = GraphSimulator(backend=args.backend, seed=args.seed)
+    simulator.import_graph_from_csv(args.graph)
+
+    if args.workload:
+        workload = load_workload(args.workload)
+    else:
+        node_ids, capacities = graph_columns(simulator)
+        workload = generate_workload(node_ids, capacities, args.count, rate=args.rate,
+                                     hot_pairs=args.hot_pairs, hot_share=args.hot_share,
+                                     skew=args.skew, amount_scale=args.amount_scale,
+                                     seed=args.seed)
+    if args.save_workload:
+        save_workload(workload, args.save_workload)
+        print(f"wrote {len(workload)} payments to {args.save_workload}")
+        return
+
+    route = dict(strategy=args.strategy, solver=args.solver)
+    probe = None
+    if args.mode == "shared":
+        shared = SharedSimulator(simulator)
+        total_capacity = float(simulator.csr.capacity.sum()) or 1.0
+
+        def pay(commodities):
+            return shared.pay(commodities, **route)[0]
+
+        def probe():
+            stats = shared.stats()
+            return {'locked_share': stats['locked_flow'] / total_capacity,
+                    'saturated_channels': stats['saturated_channels']}
+    else:
+        def pay(commodities):
+            return simulator.multi_commodity_flow_paths(commodities, **route)[0]
+
+    speed = args.speed or None
+    print(f"{len(workload)} payments over {workload['time'].iloc[-1]:.1f}s of arrivals, "
+          f"{args.mode} mode, {args.backend} backend, speed {speed or 'max'}")
+    results, samples = replay(pay, workload, speed=speed, probe=probe,
+                              probe_every=args.probe_every)
+    summary = summarize(results)
+
+    print(f"\nthroughput    {summary['throughput']:10.1f} payments/s")
+    print(f"success rate  {summary['success_rate']:10.1%}")
+    for column in ("latency", "response"):
+        print(f"{column:13} p50 {summary[f'{column}_p50_ms']:8.2f}ms  "
+              f"p95 {summary[f'{column}_p95_ms']:8.2f}ms  p99 {summary[f'{column}_p99_ms']:8.2f}ms")
+
+    if samples:
+        print(f"\n{'payments':>9} {'elapsed':>9} {'success':>8} {'locked':>8} {'saturated':>10}")
+        for sample in samples:
+            print(f"{sample['payments']:9d} {sample['elapsed']:8.2f}s {sample['success_rate']:8.1%} "
+                  f"{sample['locked_share']:8.2%} {sample['saturated_channels']:10d}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'args': vars(args), 'summary': summary,
+                                                 'samples': samples}, indent=2))
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
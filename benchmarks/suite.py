@@ -0,0 +1,204 @@
+# benchmarks/suite.py
+#
+# Timing suite for the main pipeline stages:
+#   import    - import_graph_from_csv, cold (no snapshot) and cached
+#   preprocess - mcfp_preprocess
+#   route     - multi_commodity_flow_paths over a fixed batch of requests
+#   render    - create_network_visualization of the routed graph
+# on the fixture CSVs and on synthetic lightning-like graphs of up to 1M
+# channels. Everything random (synthetic graphs, requests, simulator) is
+# seeded, so two runs on the same commit do the same work. Results are
+# written as JSON; --compare flags stages that got slower between two runs.
+#
+# Run from the repository root:
+#   python benchmarks/suite.py                       # full run
+#   python benchmarks/suite.py --quick               # fixtures + 10k synthetic
+#   python benchmarks/suite.py --compare old.json new.json
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "frontend"))
+from backend.simulation.generate_graph_csv import generate_lightning_like_graph
+from backend.simulation.graph_simulator import GraphSimulator
+from components.transaction_visualizer import create_network_visualization
+
+FIXTURES = ["lightning_like_graph_sm.csv", "lightning_like_graph_md.csv", "lightning_like_graph_lg.csv"]
+SYNTHETIC = [10_000, 100_000, 1_000_000]
+AMOUNTS = [0.5, 2, 5, 10]
+
+
+def synthetic_csv(directory, num_edges, seed):
+    # Same shape as the fixtures (BA with 5 channels per node), streamed
+    path = Path(directory) / f"synthetic_{num_edges}.csv"
+    generate_lightning_like_graph(path, num_edges // 5 + 1, 5, seed=seed)
+    return path
+
+
+def make_requests(node_ids, count, seed):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        source, sink = rng.sample(node_ids, 2) if len(node_ids) > 1 else (node_ids[0], node_ids[0])
+        requests.append([{'source': source, 'sink': sink, 'amount': rng.choice(AMOUNTS)}])
+    return requests
+
+
+def timed(fn, repeat):
+    # Best of `repeat`, plus the last return value
+    best, value = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def bench_case(case, path, backend, args, results):
+    def record(stage, seconds, **extra):
+        results.append({'case': case, 'backend': backend, 'stage': stage,
+                        'seconds': seconds, **extra})
+        print(f"{case:28} {backend:9} {stage:16} {seconds * 1e3:10.1f}ms "
+              + " ".join(f"{k}={v}" for k, v in extra.items()))
+
+    def load(use_cache):
+        simulator = GraphSimulator(backend=backend, seed=args.seed)
+        simulator.import_graph_from_csv(str(path), use_cache=use_cache)
+        return simulator
+
+    seconds, simulator = timed(lambda: load(False), args.repeat)
+    # Read sizes off the arrays; the csr `graph` property would build a networkx copy
+    if simulator.csr is not None:
+        node_ids, num_edges = simulator.csr.node_ids, simulator.csr.num_edges
+    else:
+        node_ids, num_edges = list(simulator.graph.nodes()), simulator.graph.number_of_edges()
+    num_nodes = len(node_ids)
+    record("import_cold", seconds, nodes=num_nodes, edges=num_edges)
+    load(True)  # writes the snapshot
+    seconds, simulator = timed(lambda: load(True), args.repeat)
+    record("import_cached", seconds)
+
+    seconds, _ = timed(lambda: simulator.mcfp_preprocess(), args.repeat)
+    record("preprocess", seconds)
+
+    requests = make_requests(node_ids, args.requests, args.seed)
+    last = None
+    start = time.perf_counter()
+    successes = 0
+    for commodities in requests:
+        success, graph, paths = simulator.multi_commodity_flow_paths(commodities)
+        if success:
+            successes += 1
+            last = (graph, paths)
+    record("route", time.perf_counter() - start, requests=len(requests), successes=successes)
+
+    if num_edges <= args.render_max_edges:
+        graph, paths = last if last else (None, None)
+        graph_data = simulator.get_graph_data(graph)
+        options = simulator.get_pyvis_options("force_atlas")
+        seconds, _ = timed(lambda: create_network_visualization(graph_data, options, paths),
+                           args.repeat)
+        record("render", seconds)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+    }
+
+
+def run(args):
+    sizes = [n for n in SYNTHETIC if n <= args.max_edges]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [(name, ROOT / name) for name in FIXTURES]
+        for i, size in enumerate(sizes):
+            cases.append((f"synthetic_{size}", synthetic_csv(tmp, size, args.seed + i)))
+
+        for case, path in cases:
+            for backend in args.backends:
+                size = sum(1 for _ in open(path)) - 1
+                if backend == "networkx" and size > args.nx_max_edges:
+                    continue
+                bench_case(case, path, backend, args, results)
+
+    report = {'environment': environment(),
+              'settings': {k: v for k, v in vars(args).items() if k not in ('compare', 'output')},
+              'results': results}
+    output = Path(args.output or ROOT / "benchmarks" / "results" /
+                  f"bench-{(report['environment']['commit'] or 'local')[:10]}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nwrote {output}")
+
+
+def compare(old_path, new_path, tolerance):
+    """Print per-stage ratios; returns 1 if any stage slowed down past `tolerance`."""
+    def index(path):
+        data = json.loads(Path(path).read_text())
+        return {(r['case'], r['backend'], r['stage']): r['seconds'] for r in data['results']}
+
+    old, new = index(old_path), index(new_path)
+    regressions = 0
+    print(f"{'case':28} {'backend':9} {'stage':16} {'old':>10} {'new':>10} {'ratio':>7}")
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] else float("inf")
+        flag = ""
+        # Sub-millisecond stages are too noisy to call
+        if ratio > 1 + tolerance and new[key] > 1e-3:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:28} {key[1]:9} {key[2]:16} {old[key] * 1e3:8.1f}ms {new[key] * 1e3:8.1f}ms "
+              f"{ratio:7.2f}{flag}")
+    print(f"\n{regressions} regression(s) over {tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--backends", nargs="+", default=["networkx", "csr"])
+    parser.add_argument("--max-edges", type=int, default=SYNTHETIC[-1],
+                        help="largest synthetic graph to build")
+    parser.add_argument("--nx-max-edges", type=int, default=100_000,
+                        help="skip the networkx backend above this many channels")
+    parser.add_argument("--render-max-edges", type=int, default=10_000,
+                        help="skip rendering above this many channels")
+    parser.add_argument("--quick", action="store_true", help="fixtures and the 10k graph only")
+    parser.add_argument("--output", help="JSON path (default benchmarks/results/bench-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.tolerance))
+    if args.quick:
+        args.max_edges = SYNTHETIC[0]
+        args.repeat = 1
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import os
+
+import streamlit as st
+
+from backend.assistant.fake_backend import FakeOpenAI
+
+# What a failed OpenAI request raises; without openai installed only the
+# offline stand-in runs, and it raises none of them
+try:
+    from openai import APIError
+    API_ERRORS = (APIError,)
+except ImportError:
+    API_ERRORS = ()
+
+ASSISTANT_ID = "asst_g1yHeEvq8wPwdd9L7eMVrD6g"
+# "fake" answers from the offline stand-in (backend/assistant/fake_backend.py);
+# it is also used when no OpenAI API key is configured
+BACKEND = os.environ.get("BITROUTE_ASSISTANT", "openai")
+
+
+def offline():
+    return BACKEND == "fake" or not os.environ.get("OPENAI_API_KEY")
+
+
+# Created on first use rather than at import, and shared by every session:
+# the client and the assistant lookup are paid once per server
+@st.cache_resource
+def load_assistant():
+    if offline():
+        client = FakeOpenAI(latency=float(os.environ.get("BITROUTE_FAKE_LATENCY", 0.8)))
+    else:
+        # Imported here so the offline stand-in works without openai installed
+        from openai import OpenAI
+        client = OpenAI()
+    assistant = client.beta.assistants.retrieve(assistant_id=ASSISTANT_ID)
+    return client, assistant.id
@@ -0,0 +1,33 @@
+import http.client
+import os
+
+import streamlit as st
+
+from backend.service.client import RoutingClient
+from backend.service.server import start_in_thread
+
+# Graphs the pages switch between (the small one with the Hedera testnet)
+GRAPHS = ("lightning_like_graph_md.csv", "lightning_like_graph_sm.csv")
+# Address of a routing service started separately, e.g.
+#   python -m backend.service.server lightning_like_graph_md.csv lightning_like_graph_sm.csv
+# Without one, the Streamlit server runs the service on a thread of its own
+SERVICE_ADDRESS = os.environ.get("BITROUTE_SERVICE")
+# What the client raises when the service cannot be reached at all; a
+# request the service rejects raises RoutingError instead
+SERVICE_ERRORS = (OSError, http.client.HTTPException)
+
+
+@st.cache_resource
+def _local_service():
+    _, address = start_in_thread(GRAPHS)
+    return address
+
+
+# The routing service owns one simulator per graph file, shared by every
+# page and session, so payments and rating updates carry over between
+# reruns; it persists them in a graph store next to the CSV, so they also
+# survive a restart. Pages only send requests and draw the replies, and
+# the solver never runs in a script thread.
+@st.cache_resource
+def load_simulator(graphlink):
+    return RoutingClient(SERVICE_ADDRESS or _local_service(), graph=graphlink)
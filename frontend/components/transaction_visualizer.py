@@ -0,0 +1,191 @@
+# frontend/components/transaction_visualizer.py
+import weakref
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+from matplotlib import colormaps as cm
+from pyvis.network import Network
+
+from backend.simulation.csr_graph import CSRGraph
+from backend.simulation.graph_view import GraphView
+from backend.simulation.layout import Layout
+from backend.simulation.neighborhood import focus_subgraph
+
+HTML_CACHE_SIZE = 32
+_HEX = np.array([f"{i:02x}" for i in range(256)])
+
+
+def _hex_colors(cmap, lut_index):
+    # One colormap call for a whole batch of LUT indices, formatted like
+    # mcolors.to_hex (rounded to 8 bits)
+    rgb = np.round(cmap(lut_index)[:, :3] * 255).astype(np.int64)
+    return np.char.add(np.char.add(np.char.add("#", _HEX[rgb[:, 0]]), _HEX[rgb[:, 1]]),
+                       _HEX[rgb[:, 2]]).tolist()
+
+
+def _lut_index(cmap, values):
+    # Same bucketing as calling the colormap on floats; out-of-range values
+    # get the end colours, which is what the default over/under colours are
+    return np.clip((np.asarray(values, dtype=np.float64) * cmap.N).astype(np.int64), 0, cmap.N - 1)
+
+
+def create_network_visualization(graph_data, layout_options, transaction_paths=None, positions=None):
+    net = Network(height="750px", width="750px",
+                  bgcolor="#0e1117", font_color="white")
+    net.toggle_physics(True)
+
+    # Apply the layout options to the Pyvis network
+    net.set_options(layout_options)
+
+    nodes = graph_data['nodes']
+    links = graph_data['links']
+
+    # Nodes go from red (low rating) to green, channels from green (thin)
+    # to red (widest). Channels use the reversed map, i.e. mirrored LUT
+    # indices, so all colours come out of a single colormap call.
+    red_to_green = cm['RdYlGn']
+    ratings = np.array([node['rating'] for node in nodes], dtype=np.float64)
+    weights = np.array([link.get('weight', 1) for link in links], dtype=np.float64)
+    # Find the maximum weight for normalization
+    max_weight = weights.max() if len(weights) else 1
+    lut = np.concatenate([_lut_index(red_to_green, ratings),
+                          red_to_green.N - 1 - _lut_index(red_to_green, weights / max_weight)])
+    colors = _hex_colors(red_to_green, lut) if len(lut) else []
+    node_colors, link_colors = colors[:len(nodes)], colors[len(nodes):]
+
+    # Add nodes to the network, pinned where `positions` ({id: (x, y)}) has them
+    positions = positions or {}
+    for node, rating, node_color in zip(nodes, ratings.tolist(), node_colors):
+        xy = positions.get(node['id'])
+        placement = {'x': xy[0], 'y': xy[1]} if xy is not None else {}
+        net.add_node(node['id'], label=node.get('label', ''),
+                     title=node.get('title', str(round(rating*100, 2)) + "%"), color=node_color,
+                     **placement)
+
+    # Flatten the transaction paths for easy edge checking
+    transaction_paths = transaction_paths or []
+
+    transaction_edges = set()
+    for transaction in transaction_paths:
+        for path in transaction:
+            for edge in path:
+                transaction_edges.add(edge)
+
+    # Add edges to the network with varying color based on capacity
+    for link, hex_color in zip(links, link_colors):
+        # Check if the edge is part of the transaction path
+        is_in_path = (link['source'], link['target']) in transaction_edges or (
+            link['target'], link['source']) in transaction_edges
+
+        width = 15 if is_in_path else 2  # Double the width if part of the transaction path
+        # Color transaction path differently
+        color = 'pink' if is_in_path else hex_color
+
+        net.add_edge(link['source'], link['target'], color=color, width=width)
+
+    # Return HTML of the network
+    network_html = net.generate_html()
+
+    return network_html
+
+
+# ----------------------------------------------------------------------
+# Level-of-detail rendering with an HTML cache
+# ----------------------------------------------------------------------
+
+_html_cache = OrderedDict()
+# graph object -> token, so a recycled id() can never hit a stale entry
+_tokens = weakref.WeakKeyDictionary()
+_next_token = [0]
+
+
+def graph_version(graph):
+    """Cache key part identifying `graph` in its current state."""
+    token = _tokens.get(graph)
+    if token is None:
+        _next_token[0] += 1
+        token = _tokens[graph] = _next_token[0]
+    if isinstance(graph, (CSRGraph, GraphView)):
+        return token, graph.version
+    if isinstance(graph, Layout):
+        # Layouts are replaced rather than changed in place
+        return token, graph.key
+    # networkx graphs carry no version; size changes are all we can see
+    return token, graph.number_of_nodes(), graph.number_of_edges()
+
+
+def _paths_key(transaction_paths):
+    return tuple(tuple(tuple(map(tuple, path)) for path in commodity)
+                 for commodity in transaction_paths or [])
+
+
+def _screen_positions(layout, node_ids):
+    # Fit the shown part of the layout to a canvas that grows with the node
+    # count, so focused subgraphs are spread out as much as full ones
+    positions = layout.positions(node_ids)
+    if not positions:
+        return positions
+    xy = np.array(list(positions.values()))
+    xy -= (xy.max(axis=0) + xy.min(axis=0)) / 2
+    xy *= 40 * np.sqrt(len(xy)) / max(np.abs(xy).max(), 1e-9)
+    return dict(zip(positions, map(tuple, xy.tolist())))
+
+
+def render_transaction_graph(graph, layout_options, transaction_paths=None, hops=1,
+                             max_nodes=250, focus=True, layout=None):
+    """
+    HTML for `graph` (as returned by multi_commodity_flow_paths / pay)
+    with `transaction_paths` highlighted. With `focus`, only the routed
+    paths and their `hops`-hop neighbourhood (at most `max_nodes` nodes)
+    are drawn. With a `layout` (GraphSimulator.get_layout) nodes are
+    pinned to its positions; pair it with the "precomputed" pyvis options.
+    Results are cached by (graph version, paths, parameters, layout).
+    """
+    key = (graph_version(graph), _paths_key(transaction_paths), layout_options,
+           hops, max_nodes, focus, graph_version(layout) if layout is not None else None)
+    html = _html_cache.get(key)
+    if html is not None:
+        _html_cache.move_to_end(key)
+        return html
+
+    shown = focus_subgraph(graph, transaction_paths, hops, max_nodes) if focus else graph
+    if isinstance(shown, (CSRGraph, GraphView)):
+        graph_data = shown.node_link_data()
+    else:
+        graph_data = nx.node_link_data(shown)
+    html = render_graph_data(graph_data, layout_options, transaction_paths, layout)
+
+    _html_cache[key] = html
+    while len(_html_cache) > HTML_CACHE_SIZE:
+        _html_cache.popitem(last=False)
+    return html
+
+
+def render_graph_data(graph_data, layout_options, transaction_paths=None, layout=None):
+    """
+    HTML for node-link `graph_data` that was already cut down for display,
+    e.g. the 'graph' of a routing service reply (see backend/service).
+    Data carrying a 'version' graph attribute, as service replies do, is
+    cached by (version, paths, options, layout).
+    """
+    version = graph_data.get('graph', {}).get('version')
+    key = None
+    if version is not None:
+        key = ('data', version, _paths_key(transaction_paths), layout_options,
+               graph_version(layout) if layout is not None else None)
+        html = _html_cache.get(key)
+        if html is not None:
+            _html_cache.move_to_end(key)
+            return html
+
+    positions = None
+    if layout is not None:
+        positions = _screen_positions(layout, [node['id'] for node in graph_data['nodes']])
+    html = create_network_visualization(graph_data, layout_options, transaction_paths, positions)
+
+    if key is not None:
+        _html_cache[key] = html
+        while len(_html_cache) > HTML_CACHE_SIZE:
+            _html_cache.popitem(last=False)
+    return html
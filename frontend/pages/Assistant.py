@@ -1,53 +1,29 @@
-import time
 import streamlit as st
-from openai import OpenAI
-import json
-import os
 
-# Initialize the OpenAI client
-client = OpenAI()
+from backend.assistant.client import AssistantChat, AssistantError
+from components.assistant import API_ERRORS, load_assistant, offline
 
-# Retrieve an existing assistant
-assistant = client.beta.assistants.retrieve(
-    assistant_id="asst_g1yHeEvq8wPwdd9L7eMVrD6g"
-)
-
-if 'thread_id' not in st.session_state:
-    # If not, create a new thread and store its ID in the session state
-    thread = client.beta.threads.create()
-    st.session_state['thread_id'] = thread.id
 
 # Function to manage chat interaction
 def chat_with_assistant(user_message):
-    # Add a user message to the thread
-    client.beta.threads.messages.create(
-        thread_id=st.session_state['thread_id'],
-        role="user",
-        content=user_message
-    )
-
-    # Run the assistant on the thread
-    run = client.beta.threads.runs.create(
-        thread_id=st.session_state['thread_id'],
-        assistant_id=assistant.id
-    )
-
-    # Check the run status and wait for completion
-    while run.status not in ['completed', 'failed']:
-        time.sleep(1)  # Sleep to prevent rapid polling
-        run = client.beta.threads.runs.retrieve(
-            thread_id=st.session_state['thread_id'],
-            run_id=run.id
-        )
+    # The client is created on first use and shared (see
+    # components/assistant.py); each session keeps its own thread, which
+    # remembers the last message seen so only new replies are fetched
+    if 'assistant_chat' not in st.session_state:
+        client, assistant_id = load_assistant()
+        st.session_state['assistant_chat'] = AssistantChat(
+            client, assistant_id, thread_id=st.session_state.get('thread_id'))
+    chat = st.session_state['assistant_chat']
 
-    # Retrieve the messages from the thread after run completion
-    if run.status == 'completed':
-        messages = client.beta.threads.messages.list(
-            thread_id=st.session_state['thread_id']
-        )
-        return [msg.content for msg in messages.data if msg.role == 'assistant']
-    else:
+    try:
+        replies = chat.send(user_message)
+    except AssistantError:
         return ["Sorry, I couldn't complete the request."]
+    except API_ERRORS as e:
+        return [f"Sorry, the assistant service could not be reached ({type(e).__name__})."]
+    finally:
+        st.session_state['thread_id'] = chat.thread_id
+    return replies or ["Sorry, I couldn't complete the request."]
 
 # Streamlit app layout enhancements
 st.set_page_config(page_title="BitRoute Optimizer", layout="wide")
@@ -75,6 +51,8 @@ st.sidebar.markdown("""
 # Main chat interface
 st.title("🤖 BitRoute Support Assistant")
 st.markdown("Welcome to the BitRoute AI support chat. Ask me anything about optimizing your Bitcoin transactions!")
+if offline():
+    st.info("No OpenAI API key configured: answers come from an offline stand-in.")
 
 # User input
 user_input = st.text_input("Enter your query:", max_chars=500)
@@ -82,15 +60,19 @@ user_input = st.text_input("Enter your query:", max_chars=500)
 # Chat display area
 chat_history_container = st.empty()  # Placeholder to display chat history
 
-# If user input is given, process the conversation
+# If user input is given, process the conversation. Reruns keep the text
+# input, so a query is only sent once and its reply is shown again after
 if user_input:
     # Get the assistant's response
     try:
-        assistant_responses = chat_with_assistant(user_input)
+        if st.session_state.get('last_query') != user_input:
+            with st.spinner("Waiting for the assistant..."):
+                st.session_state['last_reply'] = "\n\n".join(chat_with_assistant(user_input))
+            st.session_state['last_query'] = user_input
         # Display the chat history with the response
         chat_history = chat_history_container.text_area(
             "Chat History",
-            value=str(assistant_responses[0][0].text.value),
+            value=st.session_state['last_reply'],
             height=300,
             key='chatbox',
             help="This is the history of your conversation with the AI assistant."
@@ -1,8 +1,10 @@
+import json
+
 import streamlit as st
 from pathlib import Path
 import sys
 
-from backend.simulation.graph_simulator import GraphSimulator
+from components.simulator import load_simulator
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
@@ -24,6 +26,13 @@ st.markdown(
     """
 )
 
+# Same routing service as the other pages (see components/simulator.py),
+# whose graph store keeps added nodes across reruns and restarts
+graphlink = "lightning_like_graph_md.csv"
+if 'hedera' in st.session_state:
+        graphlink = "lightning_like_graph_sm.csv"
+simulator = load_simulator(graphlink)
+
 # Sidebar
 st.sidebar.header("Node Manager")
 st.sidebar.info("Use the form to add nodes to your graph.")
@@ -33,16 +42,27 @@ with st.form("node_addition_form", clear_on_submit=True):
     st.subheader("Add Node Form")
     node_id = st.text_input("Node ID", help="Enter a unique identifier for the node.")
     node_attrs = st.text_area("Node Attributes (JSON Format)", help="Enter the node attributes in JSON format.")
+    rating = st.slider("Initial Rating", 0.0, 1.0, 0.5, help="Nodes rated below the routing limit are skipped.")
     add_to_public_ledger = st.checkbox("Add to Public Ledger", value=False, help="Check to add this node to the public ledger.")
     submit_button = st.form_submit_button("Add Node")
 
     if submit_button and node_id:
-        simulator = GraphSimulator()
-        simulator.add_node(node_id, node_attrs)
-        
-        # TODO: add public ledger option
-        
-        st.success(f"Node {node_id} added successfully!")
+        try:
+            attrs = json.loads(node_attrs) if node_attrs.strip() else {}
+        except ValueError as e:
+            attrs = None
+            st.error(f"Node attributes are not valid JSON: {e}")
+        if attrs is not None and not isinstance(attrs, dict):
+            attrs = None
+            st.error("Node attributes must be a JSON object.")
+
+        if attrs is not None:
+            attrs['rating'] = rating
+            simulator.add_node(node_id, **attrs)
+
+            # TODO: add public ledger option
+
+            st.success(f"Node {node_id} added successfully!")
 
 # Public Ledger Option
 if add_to_public_ledger:
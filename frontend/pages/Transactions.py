@@ -2,7 +2,8 @@ import time
 import streamlit as st
 from streamlit_extras.switch_page_button import switch_page
 
-from backend.simulation.graph_simulator import GraphSimulator
+from backend.service.client import RoutingError
+from components.simulator import SERVICE_ERRORS, load_simulator
 
 st.set_page_config(
     page_title="BitRoute Transact",
@@ -20,6 +21,16 @@ st.sidebar.markdown("""
 - Enhanced Privacy 🔒
 - Cost-Effective 💰
 """)
+# Committed payments hold channel flow until they settle; this frees it now
+if st.sidebar.button("Reset channel flow"):
+    reset_graph = "lightning_like_graph_sm.csv" if 'hedera' in st.session_state else "lightning_like_graph_md.csv"
+    try:
+        load_simulator(reset_graph).reset_flows()
+        st.sidebar.success("Committed flow released.")
+    except RoutingError as e:
+        st.sidebar.error(e.message)
+    except SERVICE_ERRORS as e:
+        st.sidebar.error(f"The routing service could not be reached ({type(e).__name__}).")
 
 # Initialize session state variables if not already set
 if 'user_address' not in st.session_state:
@@ -53,16 +64,23 @@ if st.button("Process Transaction"):
     st.session_state['user_address'] = user_address
     st.session_state['recipient_address'] = recipient_address
     
-    simulator = GraphSimulator()
     graphlink = "lightning_like_graph_md.csv"
     
     if 'hedera' in st.session_state:
         graphlink = "lightning_like_graph_sm.csv"
         
-    simulator.import_graph_from_csv(graphlink)
+    simulator = load_simulator(graphlink)
     
     commodities = [{'source': user_address, 'sink': recipient_address, 'amount': amount}]
-    success, graph, paths = simulator.multi_commodity_flow_paths(commodities, threshold, limit, aggressiveness)
+    # Unknown nodes and rejected requests come back as a RoutingError
+    try:
+        success, graph, paths = simulator.pay(commodities, threshold, limit, aggressiveness)
+    except RoutingError as e:
+        st.error(f"Transaction Failed!: {e.message}")
+        st.stop()
+    except SERVICE_ERRORS as e:
+        st.error(f"Transaction Failed!: the routing service could not be reached ({type(e).__name__}).")
+        st.stop()
     
     if success:
         placeholder = st.empty()  # Create a placeholder outside the loop
@@ -1,9 +1,7 @@
 # frontend/app.py
-import networkx as nx
-from backend.simulation.graph_simulator import GraphSimulator
-from matplotlib import colormaps as cm
-import matplotlib.colors as mcolors
-from pyvis.network import Network
+from backend.simulation.graph_simulator import PYVIS_OPTIONS
+from components.simulator import load_simulator
+from components.transaction_visualizer import render_graph_data
 import streamlit as st
 
 # Sidebar with application information
@@ -15,71 +13,22 @@ st.sidebar.markdown("""
 - Cost-Effective 💰
 """)
 
-def create_network_visualization(graph_data, layout_options, transaction_paths=None):
-    net = Network(height="750px", width="750px",
-                  bgcolor="#0e1117", font_color="white")
-    net.toggle_physics(True)
-
-    # Apply the layout options to the Pyvis network
-    net.set_options(layout_options)
-
-    # Create a color map from green to red
-    green_to_red = cm.get_cmap('RdYlGn_r')  # Reverse Red-Yellow-Green colormap
-    red_to_green = cm.get_cmap('RdYlGn')  # Reverse Red-Yellow-Green colormap
-
-    # Find the maximum weight for normalization
-    max_weight = max([link.get('weight', 1) for link in graph_data['links']])
-
-    # Add nodes to the network
-    for node in graph_data['nodes']:
-        node_color = mcolors.to_hex(red_to_green(node['rating']))
-        net.add_node(node['id'], label=node.get('label', ''),
-                     title=node.get('title', str(round(node['rating']*100, 2)) + "%"), color=node_color)
-
-    # Flatten the transaction paths for easy edge checking
-    transaction_paths = transaction_paths or []
-
-    transaction_edges = set()
-    for transaction in transaction_paths:
-        for path in transaction:
-            for edge in path:
-                transaction_edges.add(edge)
-
-    print(transaction_edges)
-
-    # Add edges to the network with varying color based on capacity
-    for link in graph_data['links']:
-        weight = link.get('weight', 1)
-        norm_weight = weight / max_weight  # Normalize weight
-        # Convert normalized weight to hex color
-        hex_color = mcolors.to_hex(green_to_red(norm_weight))
-
-        # Check if the edge is part of the transaction path
-        is_in_path = (link['source'], link['target']) in transaction_edges or (
-            link['target'], link['source']) in transaction_edges
-
-        width = 15 if is_in_path else 2  # Double the width if part of the transaction path
-        # Color transaction path differently
-        color = 'pink' if is_in_path else hex_color
-
-        net.add_edge(link['source'], link['target'], color=color, width=width)
-
-    # Return HTML of the network
-    network_html = net.generate_html()
-
-    return network_html
-
 st.title("BitRoute Network Graph Simulator")
 
-# Initialize the graph simulator
-simulator = GraphSimulator()
-layout_options = simulator.get_pyvis_options("force_atlas")
-
+# Client of the routing service shared with the other pages (see components/simulator.py)
 graphlink = "lightning_like_graph_md.csv"
 if 'hedera' in st.session_state:
         graphlink = "lightning_like_graph_sm.csv"
         
-simulator.import_graph_from_csv(graphlink)
+simulator = load_simulator(graphlink)
+# Committed payments hold channel flow until they settle; this frees it now
+if st.sidebar.button("Reset channel flow"):
+    simulator.reset_flows()
+    st.sidebar.success("Committed flow released.")
+# Node positions are computed server-side once per graph, so the browser
+# draws with physics off instead of stabilizing on every render
+layout = simulator.get_layout()
+layout_options = PYVIS_OPTIONS["precomputed"]
 
 # Simplified input for source, sink, and amount
 input_string = st.text_input("Enter source, sink, and amount separated by commas (e.g., source,sink,amount;source,sink,amount)")
@@ -93,6 +42,15 @@ with col5:
 with col6:
     aggressiveness = st.slider("Aggressiveness", 0, 5, 0)
 
+# Level of detail: draw only the routed paths and their surroundings
+col7, col8, col9 = st.columns(3)
+with col7:
+    focus = st.checkbox("Focus on routed paths", value=True)
+with col8:
+    hops = st.slider("Neighbourhood hops", 0, 3, 1, disabled=not focus)
+with col9:
+    max_nodes = st.slider("Node budget", 50, 1000, 250, 50, disabled=not focus)
+
 commodities = []
 for transaction in split_input:
     parsed_input = transaction.split(',')
@@ -101,16 +59,27 @@ for transaction in split_input:
         source, sink, amount = parsed_input[0].strip(), parsed_input[1].strip(), float(parsed_input[2].strip())
         commodities.append({'source': source, 'sink': sink, 'amount': amount})
     
-# Button to find paths
-if st.button("Find Paths"):
-    success, h, transaction_paths = simulator.multi_commodity_flow_paths(
-        commodities, threshold, limit, aggressiveness)
+# Finding paths only previews them; the payment's flow and rating rewards
+# are kept only when it is sent
+col10, col11 = st.columns(2)
+with col10:
+    find = st.button("Find Paths")
+with col11:
+    send = st.button("Send Payment")
+if find or send:
+    # The service cuts the graph down to what gets drawn before sending it
+    routing = simulator.pay if send else simulator.route
+    success, graph_data, transaction_paths = routing(
+        commodities, threshold, limit, aggressiveness,
+        view={'hops': hops, 'max_nodes': max_nodes, 'focus': focus})
     
     if not success:
         st.write("No viable paths found or not enough capacity.")
     else:
-        graph_data = nx.node_link_data(h)
-        graph_html = create_network_visualization(graph_data, layout_options, transaction_paths)
+        if send:
+            st.success("Payment sent: its flow is held on these channels until it settles.")
+        graph_html = render_graph_data(graph_data, layout_options, transaction_paths,
+                                       layout=layout)
         bg = "<style>:root {background-color: #0e1117; margin: 0px; padding: 0px;}</style>"
 
         st.components.v1.html(bg + graph_html, height=770, width=752)